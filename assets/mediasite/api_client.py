@@ -10,22 +10,140 @@ License: MIT - see license.txt
 import base64
 import json
 import ssl
+import time
+import logging
+import threading
 import requests
+import assets.mediasite.resilience as resilience
+import assets.mediasite.cache as cache
+import assets.mediasite.metrics as metrics
+import assets.mediasite.pagination as pagination
+import assets.mediasite.batch as batch
+import assets.mediasite.transport as transport
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 requests.packages.urllib3.disable_warnings()
 
+#seconds to keep using Basic authentication after an auth ticket could not be obtained
+TICKET_RETRY_SECONDS = 300
+
+#longest request url sent when splitting long filters (the IIS default query string limit)
+MAX_URL_LENGTH = 2048
+
 class client:
-	def __init__(self, serviceroot, sfapikey, username, password):
+	def __init__(self, serviceroot, sfapikey, username, password, pooled=False, pool_size=10, max_connections_per_host=10, keep_alive=True, http2=False, http2_prior_knowledge=False, auth_tickets=False, ticket_minutes=60, ticket_scheme="SfIdentTicket", retry_policy=None, circuit_breaker=None, rate_limiter=None, response_cache=None, request_metrics=None):
 		"""
 		params:
 			serviceroot: root URL to send API requests to
 			sfapikey: Mediasite API key for making requests
 			username: Mediasite API username for making requests
 			password: Mediasite API password for making requests
+			pooled: when true, reuse one long-lived session (and its connections) for all requests
+			pool_size: number of per-host connection pools kept by the pooled session
+			max_connections_per_host: maximum number of open connections to any one host
+			keep_alive: whether pooled connections should be kept open between requests
+			http2: when true, send requests with the HTTP/2 transport so concurrent requests share one connection (requires httpx)
+			http2_prior_knowledge: speak HTTP/2 without negotiation, for plain http servers which support it
+			auth_tickets: when true, authenticate once for a Mediasite auth ticket and send the ticket with every request instead of Basic credentials
+			ticket_minutes: lifetime requested for auth tickets, they are renewed shortly before expiring
+			ticket_scheme: authorization scheme auth tickets are sent with
+			retry_policy: resilience.retry_policy deciding when failed requests are retried (defaults used if not provided)
+			circuit_breaker: resilience.circuit_breaker failing fast while the server is down (defaults used if not provided)
+			rate_limiter: optional rate_limit.rate_limiter capping the request rate of reads and writes
+			response_cache: optional cache.response_cache for GET responses of slowly changing collections
+			request_metrics: metrics.request_metrics recording latency, status codes and bytes of every request (defaults used if not provided)
 		"""
 		self.serviceroot = serviceroot
 		self.sfapikey = sfapikey
 		self.username = username
 		self.password = password
+		self.pooled = pooled
+		self.session = None
+		self.retry_policy = retry_policy if retry_policy else resilience.retry_policy()
+		self.circuit_breaker = circuit_breaker if circuit_breaker else resilience.circuit_breaker()
+		self.rate_limiter = rate_limiter
+		self.response_cache = response_cache
+		self.metrics = request_metrics if request_metrics else metrics.request_metrics(serviceroot=serviceroot)
+		self.auth_tickets = auth_tickets
+		self.ticket_minutes = ticket_minutes
+		self.ticket_scheme = ticket_scheme
+		self.ticket_authorization = None
+		self.ticket_expires = 0
+		self.ticket_lock = threading.Lock()
+
+		#callable which puts requests on the wire, replaceable with a recording or replaying transport (see transport.py)
+		self.transport = self.send_http
+		self.http2_transport = None
+
+		if http2:
+			self.http2_transport = transport.http2_transport(self.get_request_headers(), max_connections_per_host, keep_alive, http2_prior_knowledge)
+			self.transport = self.http2_transport
+
+		elif pooled:
+			self.session = self.create_session(pool_size, max_connections_per_host, keep_alive)
+
+	def create_session(self, pool_size, max_connections_per_host, keep_alive):
+		"""
+		Creates a pooled requests session with Mediasite headers already in place, so that
+		connections (and their TLS handshakes) are reused between requests.
+
+		params:
+			pool_size: number of per-host connection pools kept by the session
+			max_connections_per_host: maximum number of open connections to any one host
+			keep_alive: whether connections should be kept open between requests
+
+		returns:
+			configured requests session
+		"""
+		session = requests.Session()
+
+		#block once the per-host limit is reached rather than opening (and discarding) extra connections
+		adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=max_connections_per_host, pool_block=True)
+		session.mount("https://", adapter)
+		session.mount("http://", adapter)
+
+		session.verify = False
+		session.headers.update(self.get_request_headers())
+		session.headers["Connection"] = "keep-alive" if keep_alive else "close"
+
+		return session
+
+	def close(self):
+		"""
+		Closes the pooled session or HTTP/2 transport (if any) and all of its open connections
+		"""
+		if self.session:
+			self.session.close()
+
+		if self.http2_transport:
+			self.http2_transport.close()
+
+	def get_connection_stats(self):
+		"""
+		Gathers connection reuse statistics from the pooled session
+
+		returns:
+			dictionary with the number of requests sent, connections opened and connections reused
+			(or requests, most concurrent streams and negotiated http versions for the HTTP/2 transport)
+		"""
+		if self.http2_transport:
+			return dict(self.http2_transport.get_stats(), http2=True)
+
+		stats = {"pooled":self.pooled, "requests":0, "connections_opened":0, "connections_reused":0}
+
+		if not self.session:
+			return stats
+
+		for adapter in set(self.session.adapters.values()):
+			pools = adapter.poolmanager.pools
+			for key in pools.keys():
+				pool = pools[key]
+				stats["requests"] += pool.num_requests
+				stats["connections_opened"] += pool.num_connections
+
+		stats["connections_reused"] = stats["requests"] - stats["connections_opened"]
+
+		return stats
 
 	#formatting for login credentials needed by Mediasite
 	def get_basic_auth_header_value(self):
@@ -39,7 +157,78 @@ class client:
 		return_string  = "Basic "+str(base64.b64encode(bytes(self.username+":"+self.password,"utf-8")).decode("utf-8"))
 		return return_string
 
-	def request(self, request_type, resource, odata_attributes, post_vars):
+	def get_request_headers(self):
+		"""
+		Creates header values required for Mediasite API requests
+
+		returns:
+			dictionary of headers to send with each request
+		"""
+		return {
+			"sfapikey" : self.sfapikey,
+			"Accept":"application/json",
+			"Authorization":self.get_basic_auth_header_value()
+			}
+
+	def get_authorization(self):
+		"""
+		Finds the Authorization header value for the next request, obtaining a new auth ticket when
+		none is held or the current one is about to expire
+
+		returns:
+			authorization header value (Basic credentials while no ticket can be obtained)
+		"""
+		#one thread obtains the ticket while others wait for it rather than each requesting their own
+		with self.ticket_lock:
+			if time.monotonic() >= self.ticket_expires:
+				self.ticket_authorization = self.request_ticket()
+
+			return self.ticket_authorization or self.get_basic_auth_header_value()
+
+	def request_ticket(self):
+		"""
+		Obtains a Mediasite auth ticket for the configured user (requires the "Manage Auth Tickets" operation)
+
+		returns:
+			authorization header value for the ticket, or None if no ticket could be obtained
+		"""
+		ticket_id = None
+
+		try:
+			rsp = self.send_once("post", self.serviceroot + "AuthorizationTickets",
+								json={"Username":self.username, "MinutesToLive":self.ticket_minutes},
+								headers={"Authorization":self.get_basic_auth_header_value()})
+
+			error = "status " + str(rsp.status_code)
+			if rsp.ok:
+				ticket_id = rsp.json().get("TicketId")
+
+		except (requests.exceptions.RequestException, ValueError) as e:
+			error = str(e)
+
+		if not ticket_id:
+			logging.warning("Could not obtain a Mediasite auth ticket, using Basic authentication: " + error)
+			self.ticket_expires = time.monotonic() + TICKET_RETRY_SECONDS
+			return None
+
+		#renew a minute (or a tenth of the lifetime for short lived tickets) before the server expires it
+		self.ticket_expires = time.monotonic() + self.ticket_minutes * 60 - min(60, self.ticket_minutes * 6)
+
+		return self.ticket_scheme + " " + base64.b64encode(bytes(self.username + ":" + ticket_id, "utf-8")).decode("utf-8")
+
+	def invalidate_ticket(self, authorization):
+		"""
+		Drops an auth ticket the server no longer accepts so the next request obtains a new one
+
+		params:
+			authorization: authorization header value the rejected request was sent with
+		"""
+		with self.ticket_lock:
+			if self.ticket_authorization == authorization:
+				self.ticket_authorization = None
+				self.ticket_expires = 0
+
+	def request(self, request_type, resource, odata_attributes, post_vars, select=None, stream=False):
 		"""
 		Performs API request based on parameter data
 
@@ -48,41 +237,45 @@ class client:
 			resource:  resource within the API to make requests on, for ex. "Presentations"
 			odata_attributes: odata attributes to use when making the requests
 			post_vars: variables to send when making post requests
+			select: optional list of entity properties to request ($select), all properties if not provided
+			stream: for "get" requests, defer downloading the response body so it can be decoded as it arrives (bypasses the response cache)
 		"""
-		self.resource = resource
-		self.odata_attributes = odata_attributes
-
-		#What we're requesting
-		url = self.serviceroot + self.resource + "?" + self.odata_attributes
+		odata_attributes = self.add_select(odata_attributes, select)
 
-		# Header values required for request
-		auth_values = {
-			"sfapikey" : self.sfapikey,
-			"Accept":"application/json",
-			"Authorization":self.get_basic_auth_header_value()
-			}
+		#What we're requesting (built only from the arguments, the client holds no per-request state so it can be shared between threads)
+		url = self.serviceroot + resource + "?" + odata_attributes
 
 		try:
-			if request_type == "get":
-				rsp = requests.get(url, headers=auth_values, verify=False)
+			if request_type == "get" and stream:
+				rsp = self.send("get", url, stream=True)
+
+			elif request_type == "get" and self.response_cache and self.response_cache.is_cacheable(resource):
+				rsp = self.cached_get(resource, url)
+
+			elif request_type == "get":
+				rsp = self.send("get", url)
 
 			elif request_type == "post":
-				rsp = requests.post(url, headers=auth_values, json=post_vars, verify=False)
+				rsp = self.send("post", url, json=post_vars)
 
 			elif request_type == "put":
-				rsp = requests.put(url, headers=auth_values, json=post_vars, verify=False)
+				rsp = self.send("put", url, json=post_vars)
 
 			elif request_type == "delete":
-				rsp = requests.delete(url, headers=auth_values, verify=False)
+				rsp = self.send("delete", url)
 
 			elif request_type == "patch":
-				rsp = requests.patch(url, headers=auth_values, json=post_vars, verify=False)
+				rsp = self.send("patch", url, json=post_vars)
 
 			elif request_type == "get stream":
-				rsp = requests.get(resource, headers=auth_values, verify=False, stream=True)
+				rsp = self.send("get", resource, stream=True)
 
 			elif request_type == "get job":
-				rsp = requests.get(resource, headers=auth_values, verify=False)
+				rsp = self.send("get", resource)
+
+			#writes make cached listings of the same collection out of date
+			if request_type in ("post", "put", "patch", "delete"):
+				self.invalidate_cache(resource)
 			
 			return rsp
 
@@ -90,3 +283,385 @@ class client:
 		except requests.exceptions.RequestException as e:
 
 			return "Error: " + str(e)
+
+	def request_many(self, specs, max_workers=8):
+		"""
+		Performs many API requests concurrently, for ex. status for every recorder
+
+		params:
+			specs: list of request arguments, each a tuple of request parameters (request_type, resource, odata_attributes, post_vars)
+				or a dictionary of request keyword arguments
+			max_workers: maximum number of requests in flight at the same time
+
+		returns:
+			list of results in the same order as specs, each a response object or an "Error: ..." string as returned by request
+		"""
+		if not specs:
+			return []
+
+		def perform(spec):
+			return self.request(**spec) if isinstance(spec, dict) else self.request(*spec)
+
+		with ThreadPoolExecutor(max_workers=min(max_workers, len(specs))) as executor:
+			return list(executor.map(perform, specs))
+
+	def add_select(self, odata_attributes, select):
+		"""
+		Adds a $select projection to odata attributes so only the listed properties are returned
+
+		params:
+			odata_attributes: odata attributes to use when making the requests
+			select: list of entity properties to request, or None for all properties
+
+		returns:
+			odata attribute string including the $select projection
+		"""
+		if not select:
+			return odata_attributes
+
+		projection = "$select=" + ",".join(select)
+
+		return odata_attributes + "&" + projection if odata_attributes else projection
+
+	def or_filters(self, resource, property_name, values, conditions="", select=None, max_url_length=MAX_URL_LENGTH):
+		"""
+		Creates $filter attributes matching any of many values of one property, for ex. the children of
+		every folder on one level of the tree, splitting the values between as few filters as keep each
+		(encoded) request url within max_url_length
+
+		params:
+			resource: collection within the API the filters are used on, for ex. "Folders"
+			property_name: name of the property compared, for ex. "ParentFolderId"
+			values: values the property may equal
+			conditions: optional expression every match must also satisfy, for ex. "Recycled eq false"
+			select: list of entity properties the requests will select, so their length is allowed for
+			max_url_length: longest url allowed, including room for the $top and $skip of paged requests
+
+		returns:
+			list of odata attribute strings, each "$filter=(property eq 'a' or property eq 'b' ...) and conditions"
+		"""
+		suffix = " and " + conditions if conditions else ""
+		separator_length = len(requests.utils.requote_uri(" or "))
+
+		#room left once the parts common to every request are allowed for
+		available = max_url_length - len(requests.utils.requote_uri(self.serviceroot + resource + "?" + "$filter=()" + suffix
+										+ self.add_select("&$top=1000000&$skip=1000000", select)))
+
+		filters = []
+		clauses = []
+		length = 0
+
+		for value in values:
+			clause = property_name + " eq '" + str(value).replace("'", "''") + "'"
+			clause_length = len(requests.utils.requote_uri(clause))
+
+			if clauses and length + separator_length + clause_length > available:
+				filters.append("$filter=(" + " or ".join(clauses) + ")" + suffix)
+				clauses = []
+				length = 0
+
+			length += clause_length + (separator_length if clauses else 0)
+			clauses.append(clause)
+
+		if clauses:
+			filters.append("$filter=(" + " or ".join(clauses) + ")" + suffix)
+
+		return filters
+
+	def paginate_matching(self, resource, property_name, values, conditions="", page_size=500, workers=4, select=None):
+		"""
+		Gathers every entity of a collection whose property equals any of many values, for ex. the
+		presentations of every folder in a subtree, with a few OR-filtered listings (see or_filters)
+		paged through concurrently
+
+		params:
+			resource: collection within the API to page through, for ex. "Presentations"
+			property_name: name of the property compared, for ex. "ParentFolderId"
+			values: values the property may equal
+			conditions: optional expression every match must also satisfy, for ex. "Recycled eq false"
+			page_size: number of entities to request per page
+			workers: maximum number of listings requested at the same time
+			select: optional list of entity properties to request ($select), all properties if not provided
+
+		returns:
+			list of matching entities, or an "Error: ..." string if any page could not be gathered
+		"""
+		filters = self.or_filters(resource, property_name, values, conditions, select)
+		if not filters:
+			return []
+
+		def gather(odata_attributes):
+			pages = self.paginate(resource, odata_attributes, page_size, select=select)
+			entities = list(pages)
+
+			return pages.error or entities
+
+		with ThreadPoolExecutor(max_workers=min(workers, len(filters))) as executor:
+			results = list(executor.map(gather, filters))
+
+		entities = []
+		for result in results:
+			if isinstance(result, str):
+				return result
+
+			entities.extend(result)
+
+		return entities
+
+	def cached_get(self, resource, url):
+		"""
+		Performs a GET request through the response cache, revalidating expired entries with
+		If-None-Match/If-Modified-Since where the server provided validators
+
+		params:
+			resource: resource within the API the request is made on
+			url: full url of the request
+
+		returns:
+			requests response object (possibly served from the cache)
+		"""
+		entry, fresh = self.response_cache.lookup(url)
+
+		if fresh:
+			return entry.response
+
+		headers = self.response_cache.get_conditional_headers(entry) if entry else None
+		rsp = self.send("get", url, headers=headers)
+
+		if rsp.status_code == 304 and entry:
+			return self.response_cache.refresh(url, resource, entry)
+
+		if rsp.status_code == 200:
+			self.response_cache.store(url, resource, rsp)
+
+		return rsp
+
+	def invalidate_cache(self, resource):
+		"""
+		Drops cached responses of the collection a resource belongs to
+
+		params:
+			resource: resource within the API which was written to
+		"""
+		if self.response_cache:
+			self.response_cache.invalidate(resource)
+
+	def get_cache_stats(self):
+		"""
+		Gathers response cache hit and miss counters
+
+		returns:
+			dictionary with response cache statistics
+		"""
+		return self.response_cache.get_stats() if self.response_cache else {}
+
+	def get_metrics(self):
+		"""
+		Gathers latency, status code and throughput figures of requests made so far
+
+		returns:
+			dictionary snapshot of request metrics (see metrics.request_metrics.get_snapshot)
+		"""
+		return self.metrics.get_snapshot()
+
+	def get_resilience_stats(self):
+		"""
+		Gathers retry and circuit breaker counters for monitoring
+
+		returns:
+			dictionary with retry policy and circuit breaker statistics
+		"""
+		return {"retry":self.retry_policy.get_stats(), "circuit_breaker":self.circuit_breaker.get_stats()}
+
+	def get_rate_limit_stats(self):
+		"""
+		Gathers rate limiter counters for reads and writes
+
+		returns:
+			dictionary with requests, waits and seconds waited for each limited method class
+		"""
+		return self.rate_limiter.get_stats() if self.rate_limiter else {}
+
+	def send(self, method, url, json=None, data=None, headers=None, stream=False):
+		"""
+		Sends one http request, retrying throttled or failed requests as allowed by the retry policy
+		and failing fast while the circuit breaker is open
+
+		params:
+			method: http method, for ex. "get"
+			url: full url to send the request to
+			json: object to send as a json body
+			data: raw body to send (used instead of json)
+			headers: additional header values for this request
+			stream: whether to defer downloading the response body
+
+		returns:
+			requests response object (raises requests.exceptions.RequestException on failure)
+		"""
+		attempt = 0
+		ticket_renewed = False
+		request_headers = headers
+
+		while True:
+			if not self.circuit_breaker.allow_request():
+				raise resilience.circuit_open_error("Mediasite circuit breaker is open, request to "+url+" was not sent")
+
+			#every attempt (including retries) takes from the rate limit budget
+			if self.rate_limiter:
+				self.rate_limiter.acquire(method)
+
+			if self.auth_tickets:
+				authorization = self.get_authorization()
+				request_headers = dict(headers or {}, Authorization=authorization)
+
+			try:
+				rsp = self.send_once(method, url, json, data, request_headers, stream)
+
+			except requests.exceptions.RequestException as e:
+				self.circuit_breaker.record_failure()
+
+				if not self.retry_policy.should_retry(method, attempt):
+					raise
+
+				delay = self.retry_policy.get_delay(attempt)
+				logging.warning("Retrying "+method+" "+url+" in "+str(round(delay, 2))+"s after error: "+str(e))
+
+			else:
+				#throttling and client errors mean the server is up, only server errors count against it
+				if rsp.status_code >= 500:
+					self.circuit_breaker.record_failure()
+				else:
+					self.circuit_breaker.record_success()
+
+				#a ticket revoked or expired early is renewed once and the request sent again
+				if self.auth_tickets and rsp.status_code == 401 and not ticket_renewed and authorization.startswith(self.ticket_scheme + " "):
+					ticket_renewed = True
+					self.invalidate_ticket(authorization)
+					rsp.close()
+					continue
+
+				if not self.retry_policy.should_retry(method, attempt, rsp):
+					return rsp
+
+				delay = self.retry_policy.get_delay(attempt, rsp)
+				logging.warning("Retrying "+method+" "+url+" in "+str(round(delay, 2))+"s after status "+str(rsp.status_code))
+				rsp.close()
+
+			attempt += 1
+			time.sleep(delay)
+
+	def send_once(self, method, url, json=None, data=None, headers=None, stream=False):
+		"""
+		Sends one http request through the transport, recording its metrics
+
+		params:
+			method: http method, for ex. "get"
+			url: full url to send the request to
+			json: object to send as a json body
+			data: raw body to send (used instead of json)
+			headers: additional header values for this request
+			stream: whether to defer downloading the response body
+
+		returns:
+			requests response object (raises requests.exceptions.RequestException on failure)
+		"""
+
+		token = self.metrics.start(method, url)
+
+		try:
+			rsp = self.transport(method, url, json, data, headers, stream)
+
+		except requests.exceptions.RequestException as e:
+			self.metrics.finish(token, error=e)
+			raise
+
+		self.metrics.finish(token, rsp, bytes_sent=metrics.get_request_size(rsp))
+		return rsp
+
+	def send_http(self, method, url, json=None, data=None, headers=None, stream=False):
+		"""
+		Sends one http request with the header values required by Mediasite
+
+		returns:
+			requests response object (raises requests.exceptions.RequestException on failure)
+		"""
+
+		#pooled sessions already carry the header values required for requests
+		if self.session:
+			return self.session.request(method, url, headers=headers, json=json, data=data, verify=False, stream=stream)
+
+		request_headers = self.get_request_headers()
+		if headers:
+			request_headers.update(headers)
+
+		return requests.request(method, url, headers=request_headers, json=json, data=data, verify=False, stream=stream)
+
+	def batch(self, max_operations=100):
+		"""
+		Creates an OData $batch for packing many operations into few requests
+
+		params:
+			max_operations: maximum number of operations sent in any one $batch request
+
+		returns:
+			batch.batch which operations can be added to and then executed
+		"""
+		return batch.batch(self, max_operations)
+
+	def paginate(self, resource, odata_attributes="", page_size=100, select=None, stream=False):
+		"""
+		Creates a lazy iterator over every entity of a collection, one page at a time
+
+		params:
+			resource: collection within the API to page through, for ex. "Folders"
+			odata_attributes: additional odata attributes such as a $filter (without $top or $skip)
+			page_size: number of entities to request per page
+			select: optional list of entity properties to request ($select), all properties if not provided
+			stream: when true each page is decoded while it is still arriving (see json_stream.streamed_page)
+
+		returns:
+			pagination.pager which yields entities and records any request error in its error attribute
+		"""
+		return pagination.pager(self, resource, self.add_select(odata_attributes, select), page_size, stream)
+
+	def scan(self, resource, odata_attributes="", page_size=100, workers=4, ordered=True, select=None, stream=False):
+		"""
+		Creates an iterator over every entity of a collection which requests the pages after the
+		first one concurrently
+
+		params:
+			resource: collection within the API to scan, for ex. "Presentations"
+			odata_attributes: additional odata attributes such as a $filter (without $top or $skip)
+			page_size: number of entities to request per page
+			workers: maximum number of pages requested at the same time
+			ordered: when false, pages are yielded in the order they arrive rather than collection order
+			select: optional list of entity properties to request ($select), all properties if not provided
+			stream: when true each page is decoded while it is still arriving (see json_stream.streamed_page)
+
+		returns:
+			pagination.parallel_pager which yields entities and records any request error in its error attribute
+		"""
+		return pagination.parallel_pager(self, resource, self.add_select(odata_attributes, select), page_size, workers, ordered, stream)
+
+	def seek(self, resource, conditions="", page_size=100, key="Id", select=None, stream=False, key_types=None):
+		"""
+		Creates an iterator over every entity of a collection which requests each page after the last
+		key received ("key gt ...") rather than at a growing $skip offset
+
+		params:
+			resource: collection within the API to page through, for ex. "Presentations"
+			conditions: optional $filter expression (without "$filter="), combined with the key filter of each page
+			page_size: number of entities to request per page
+			key: unique, sortable property entities are ordered and sought by, or a tuple of properties unique together
+			select: optional list of entity properties to request ($select), the key is always included
+			stream: when true each page is decoded while it is still arriving (see json_stream.streamed_page)
+			key_types: optional dictionary of key property to its odata type when not a string or number, for ex. {"LastModified":"datetime"}
+
+		returns:
+			pagination.keyset_pager which yields entities in key order and records any request error in its error attribute
+		"""
+		keys = key if isinstance(key, tuple) else (key,)
+		if select:
+			select = tuple(select) + tuple(k for k in keys if k not in select)
+
+		return pagination.keyset_pager(self, resource, conditions, self.add_select("", select), page_size, key, stream, key_types)
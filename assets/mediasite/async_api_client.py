@@ -0,0 +1,214 @@
+"""
+Class for creating asyncio connections to Mediasite API. Mirrors the request
+surface of api_client.client so many requests can be kept in flight from one process.
+
+Requires the aiohttp library.
+
+License: MIT - see license.txt
+"""
+
+import asyncio
+import base64
+import json
+from requests.utils import requote_uri
+
+try:
+    import aiohttp
+    import yarl
+except ImportError:
+    aiohttp = None
+
+class response():
+    def __init__(self, url, status_code, headers, content):
+        """
+        Fully read response of an asyncio request. Provides the parts of requests.Response
+        used throughout the mediasite modules so results can be handled the same way.
+
+        params:
+            url: url the request was made to
+            status_code: http status code of the response
+            headers: dictionary of response headers
+            content: response body as bytes
+        """
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.ok = status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.text)
+
+class client():
+    def __init__(self, serviceroot, sfapikey, username, password, max_in_flight=100, max_connections_per_host=100, keep_alive=True):
+        """
+        params:
+            serviceroot: root URL to send API requests to
+            sfapikey: Mediasite API key for making requests
+            username: Mediasite API username for making requests
+            password: Mediasite API password for making requests
+            max_in_flight: maximum number of requests awaiting a response at any one time
+            max_connections_per_host: maximum number of open connections to any one host
+            keep_alive: whether connections should be kept open between requests
+        """
+        if aiohttp is None:
+            raise ImportError("The aiohttp library is required for the asyncio Mediasite client")
+
+        self.serviceroot = serviceroot
+        self.sfapikey = sfapikey
+        self.username = username
+        self.password = password
+        self.max_in_flight = max_in_flight
+        self.max_connections_per_host = max_connections_per_host
+        self.keep_alive = keep_alive
+        self.session = None
+        self.semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def get_basic_auth_header_value(self):
+        """
+        Creates authentication string necessary for making Mediasite API requests
+
+        returns:
+            String specifically created for making Mediasite API requests based on
+            useraname and password provided to class.
+        """
+        return "Basic "+str(base64.b64encode(bytes(self.username+":"+self.password,"utf-8")).decode("utf-8"))
+
+    def get_request_headers(self):
+        """
+        Creates header values required for Mediasite API requests
+
+        returns:
+            dictionary of headers to send with each request
+        """
+        return {
+            "sfapikey":self.sfapikey,
+            "Accept":"application/json",
+            "Authorization":self.get_basic_auth_header_value()
+            }
+
+    async def get_session(self):
+        """
+        Creates the aiohttp session on first use (sessions must be created inside a running event loop)
+
+        returns:
+            aiohttp client session shared by all requests of this client
+        """
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=0,
+                                            limit_per_host=self.max_connections_per_host,
+                                            force_close=not self.keep_alive,
+                                            ssl=False
+                                            )
+            self.session = aiohttp.ClientSession(connector=connector, headers=self.get_request_headers())
+            self.semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        return self.session
+
+    async def close(self):
+        """
+        Closes the aiohttp session and all of its open connections
+        """
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    async def request(self, request_type, resource, odata_attributes, post_vars):
+        """
+        Performs API request based on parameter data
+
+        params:
+            request_type: type of request to make, for ex. "get","post", etc.
+            resource:  resource within the API to make requests on, for ex. "Presentations"
+            odata_attributes: odata attributes to use when making the requests
+            post_vars: variables to send when making post requests
+
+        returns:
+            fully read response object, or an "Error: ..." string if the request failed
+        """
+
+        #job and stream requests are made against a full link provided by mediasite
+        if request_type in ("get stream", "get job"):
+            url = resource
+        else:
+            url = self.serviceroot + resource + "?" + odata_attributes
+
+        method = request_type.split(" ")[0].upper()
+        json_data = post_vars if method in ("POST", "PUT", "PATCH") else None
+
+        #quote the url as the requests library does, aiohttp would otherwise send spaces within $filter as "+"
+        url = yarl.URL(requote_uri(url), encoded=True)
+
+        session = await self.get_session()
+
+        try:
+            async with self.semaphore:
+                async with session.request(method, url, json=json_data) as rsp:
+                    content = await rsp.read()
+                    return response(str(rsp.url), rsp.status, dict(rsp.headers), content)
+
+        #catch all exceptions and return them
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return "Error: " + str(e)
+
+    async def gather_pages(self, resource, odata_attributes, page_size=100, select=None):
+        """
+        Gathers every entity of a collection by reading the first page and then requesting
+        all remaining $skip windows concurrently
+
+        params:
+            resource: collection within the API to gather, for ex. "Catalogs"
+            odata_attributes: additional odata attributes such as a $filter (without $top or $skip)
+            page_size: number of entities to request per page
+            select: optional list of entity properties to request ($select), all properties if not provided
+
+        returns:
+            list of entities in collection order, or an "Error: ..." string if any page failed
+        """
+        if select:
+            odata_attributes = odata_attributes + "&$select=" + ",".join(select) if odata_attributes else "$select=" + ",".join(select)
+
+        prefix = odata_attributes + "&" if odata_attributes else ""
+
+        first = await self.request("get", resource, prefix+"$top="+str(page_size)+"&$skip=0", "")
+        if type(first) is str:
+            return first
+
+        first_json = first.json()
+        result_list = self.get_page_value(first_json)
+        if type(result_list) is str or not result_list:
+            return result_list
+
+        #servers may cap page sizes below what was requested, so size the windows by what was received
+        step = min(page_size, len(result_list))
+        total = int(first_json.get("odata.count", len(result_list)))
+
+        pages = await asyncio.gather(*[self.request("get", resource, prefix+"$top="+str(step)+"&$skip="+str(skip), "")
+                                        for skip in range(step, total, step)])
+
+        for page in pages:
+            value = page if type(page) is str else self.get_page_value(page.json())
+            if type(value) is str:
+                return value
+            result_list.extend(value)
+
+        return result_list
+
+    def get_page_value(self, page_json):
+        """
+        returns:
+            list of entities within a page, or an "Error: ..." string if the server returned an odata error
+        """
+        if "odata.error" in page_json:
+            return "Error: "+page_json["odata.error"]["code"]+": "+page_json["odata.error"]["message"]["value"]
+
+        return list(page_json.get("value", []))
@@ -0,0 +1,284 @@
+"""
+OData $batch support for packing many Mediasite API operations into few requests
+
+License: MIT - see license.txt
+"""
+
+import json
+import logging
+import uuid
+import requests
+
+class batch_response():
+    def __init__(self, status_code, headers, content):
+        """
+        Response to one operation of a $batch request. Provides the parts of requests.Response
+        used throughout the mediasite modules so results can be handled the same way.
+
+        params:
+            status_code: http status code of the operation
+            headers: dictionary of response headers of the operation
+            content: response body of the operation as bytes
+        """
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.ok = status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.text)
+
+class operation():
+    def __init__(self, request_type, resource, odata_attributes, post_vars):
+        """
+        One operation queued within a $batch
+
+        params:
+            request_type: type of request to make, for ex. "get","post", etc.
+            resource:  resource within the API to make requests on, for ex. "Presentations"
+            odata_attributes: odata attributes to use when making the requests
+            post_vars: variables to send when making post requests
+
+        Note: once the batch is executed, response holds a batch_response or an "Error: ..." string
+        """
+        self.request_type = request_type
+        self.resource = resource
+        self.odata_attributes = odata_attributes
+        self.post_vars = post_vars
+        self.response = None
+
+class batch():
+    def __init__(self, api_client, max_operations=100):
+        """
+        Collects operations and sends them as OData $batch requests. Reads are sent as plain batch
+        parts and every write is sent in its own changeset so one failed write does not roll back others.
+
+        params:
+            api_client: mediasite api client used to make requests
+            max_operations: maximum number of operations sent in any one $batch request
+        """
+        self.api_client = api_client
+        self.max_operations = max_operations
+        self.operations = []
+
+    def __len__(self):
+        return len(self.operations)
+
+    def add(self, request_type, resource, odata_attributes="", post_vars=""):
+        """
+        Queues an operation to be sent with the batch
+
+        returns:
+            operation whose response is filled in when the batch is executed
+        """
+        batch_operation = operation(request_type, resource, odata_attributes, post_vars)
+        self.operations.append(batch_operation)
+        return batch_operation
+
+    def execute(self):
+        """
+        Sends all queued operations in $batch requests of at most max_operations each
+
+        returns:
+            list of responses (batch_response or "Error: ..." string) in the order operations were added
+        """
+        pending = [batch_operation for batch_operation in self.operations if batch_operation.response is None]
+
+        for i in range(0, len(pending), self.max_operations):
+            self.send(pending[i:i+self.max_operations])
+
+        return [batch_operation.response for batch_operation in self.operations]
+
+    def get_operation_part(self, batch_operation):
+        """
+        Creates the application/http part for one operation
+
+        returns:
+            part as a string
+        """
+        url = self.api_client.serviceroot + batch_operation.resource
+        if batch_operation.odata_attributes:
+            url += "?" + batch_operation.odata_attributes
+
+        lines = ["Content-Type: application/http",
+                "Content-Transfer-Encoding: binary",
+                "",
+                batch_operation.request_type.upper() + " " + url + " HTTP/1.1",
+                "Accept: application/json"
+                ]
+
+        if batch_operation.request_type in ("post", "put", "patch"):
+            lines += ["Content-Type: application/json", "", json.dumps(batch_operation.post_vars)]
+        else:
+            lines += [""]
+
+        return "\r\n".join(lines)
+
+    def get_body(self, operations, boundary):
+        """
+        Creates the multipart/mixed body of a $batch request
+
+        returns:
+            body as a string
+        """
+        parts = []
+
+        for batch_operation in operations:
+            if batch_operation.request_type == "get":
+                parts.append(self.get_operation_part(batch_operation))
+            else:
+                changeset_boundary = "changeset_" + uuid.uuid4().hex
+                parts.append("Content-Type: multipart/mixed; boundary=" + changeset_boundary + "\r\n\r\n" +
+                            "--" + changeset_boundary + "\r\n" +
+                            self.get_operation_part(batch_operation) + "\r\n" +
+                            "--" + changeset_boundary + "--")
+
+        return "".join(["--" + boundary + "\r\n" + part + "\r\n" for part in parts]) + "--" + boundary + "--\r\n"
+
+    def send(self, operations):
+        """
+        Sends one $batch request and maps each sub-response back onto its operation
+        """
+        boundary = "batch_" + uuid.uuid4().hex
+
+        logging.info("Sending batch of "+str(len(operations))+" operations")
+
+        try:
+            rsp = self.api_client.send("post", self.api_client.serviceroot + "$batch",
+                                        data=self.get_body(operations, boundary).encode("utf-8"),
+                                        headers={"Content-Type":"multipart/mixed; boundary=" + boundary}
+                                        )
+        except requests.exceptions.RequestException as e:
+            self.set_error(operations, "Error: " + str(e))
+            return
+
+        if rsp.status_code >= 400:
+            self.set_error(operations, "Error: batch request failed with status " + str(rsp.status_code) + ": " + rsp.text)
+            return
+
+        try:
+            responses = parse_batch_response(rsp.content, rsp.headers.get("Content-Type", ""))
+        except ValueError as e:
+            self.set_error(operations, "Error: unable to parse batch response: " + str(e))
+            return
+
+        if len(responses) != len(operations):
+            self.set_error(operations, "Error: batch returned " + str(len(responses)) + " responses for " + str(len(operations)) + " operations")
+            return
+
+        for batch_operation, response in zip(operations, responses):
+            batch_operation.response = response
+
+            #writes make cached listings of the same collection out of date
+            if batch_operation.request_type != "get":
+                self.api_client.invalidate_cache(batch_operation.resource)
+
+    def set_error(self, operations, error):
+        logging.error(error)
+        for batch_operation in operations:
+            batch_operation.response = error
+
+def get_boundary(content_type):
+    """
+    Finds the multipart boundary within a Content-Type header value
+    """
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.strip().partition("=")
+        if key.lower() == "boundary":
+            return value.strip('"')
+
+    return ""
+
+def split_headers(content):
+    """
+    Splits a block of header lines from the content following it
+
+    returns:
+        tuple of header dictionary (lowercase names) and remaining content as bytes
+    """
+    crlf = content.find(b"\r\n\r\n")
+    lf = content.find(b"\n\n")
+
+    if crlf != -1 and (lf == -1 or crlf < lf):
+        head, rest = content[:crlf], content[crlf+4:]
+    elif lf != -1:
+        head, rest = content[:lf], content[lf+2:]
+    else:
+        head, rest = content, b""
+
+    headers = {}
+    for line in head.decode("utf-8").splitlines():
+        name, _, value = line.partition(":")
+        if value:
+            headers[name.strip().lower()] = value.strip()
+
+    return headers, rest
+
+def split_multipart(content, boundary):
+    """
+    Splits a multipart body into its parts
+
+    returns:
+        list of (header dictionary, content) tuples (raises ValueError without a boundary or the closing delimiter)
+    """
+    if not boundary:
+        raise ValueError("multipart body without a boundary")
+
+    delimiter = b"--" + boundary.encode("utf-8")
+    parts = []
+
+    for part in content.split(delimiter)[1:]:
+        if part.startswith(b"--"):
+            return parts
+
+        #the line break before each delimiter belongs to the delimiter
+        part = part[2:] if part.startswith(b"\r\n") else part.lstrip(b"\n")
+        part = part[:-2] if part.endswith(b"\r\n") else part.rstrip(b"\n")
+
+        parts.append(split_headers(part))
+
+    raise ValueError("multipart body ends before its closing delimiter --" + boundary + "--")
+
+def parse_http_part(content):
+    """
+    Parses an application/http part into a batch_response (raises ValueError if it has no http status line)
+    """
+    status_line, _, rest = content.partition(b"\n")
+    status = status_line.split()
+
+    if len(status) < 2 or not status[0].startswith(b"HTTP/") or not status[1].isdigit():
+        raise ValueError("invalid status line in batch part: " + repr(status_line[:100]))
+
+    status_code = int(status[1])
+    headers, body = split_headers(rest)
+
+    return batch_response(status_code, headers, body)
+
+def parse_batch_response(content, content_type):
+    """
+    Parses a multipart/mixed $batch response into one response per operation. Changesets
+    answered with a single response (for ex. after a failure) are mapped to that response.
+
+    params:
+        content: body of the $batch response as bytes
+        content_type: Content-Type header value of the $batch response
+
+    returns:
+        list of batch_response objects in request order (raises ValueError if the body is malformed or truncated)
+    """
+    responses = []
+
+    for headers, part in split_multipart(content, get_boundary(content_type)):
+        part_type = headers.get("content-type", "")
+
+        if part_type.startswith("multipart/mixed"):
+            for changeset_headers, changeset_part in split_multipart(part, get_boundary(part_type)):
+                responses.append(parse_http_part(changeset_part))
+        else:
+            responses.append(parse_http_part(part))
+
+    return responses
@@ -0,0 +1,160 @@
+"""
+Response cache for Mediasite API reference data (templates, recorders, folders, etc.)
+
+License: MIT - see license.txt
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+#suggested lifetimes (seconds) for reference data which rarely changes within a run
+DEFAULT_TTLS = {
+    "Templates":3600,
+    "Recorders":600,
+    "Folders":60
+    }
+
+def get_collection(resource):
+    """
+    Finds the collection name of a resource, for ex. "Folders('1')/Presentations" -> "Folders"
+    """
+    for separator in ("(", "/", "?"):
+        resource = resource.split(separator)[0]
+
+    return resource
+
+class cache_entry():
+    def __init__(self, resource, response, expires):
+        self.collection = get_collection(resource)
+        self.response = response
+        self.expires = expires
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+
+class response_cache():
+    def __init__(self, ttls=None, max_entries=1000):
+        """
+        LRU cache of GET responses with a lifetime for each collection. Expired entries which carry
+        an ETag or Last-Modified header are revalidated with a conditional request rather than dropped.
+
+        params:
+            ttls: dictionary of collection name to lifetime in seconds, collections not listed are not cached
+            max_entries: maximum number of responses held before the least recently used is evicted
+        """
+        self.ttls = ttls if ttls is not None else dict(DEFAULT_TTLS)
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"hits":0, "misses":0, "stale":0, "revalidated":0, "evictions":0, "invalidations":0}
+
+    def is_cacheable(self, resource):
+        return self.ttls.get(get_collection(resource), 0) > 0
+
+    def lookup(self, url):
+        """
+        Finds the cached entry for a url
+
+        returns:
+            tuple of (entry or None, whether the entry is still fresh)
+        """
+        with self.lock:
+            entry = self.entries.get(url)
+
+            if entry is None:
+                self.stats["misses"] += 1
+                return None, False
+
+            self.entries.move_to_end(url)
+
+            if entry.expires > time.monotonic():
+                self.stats["hits"] += 1
+                return entry, True
+
+            #expired entries without validators cannot be revalidated
+            if not entry.etag and not entry.last_modified:
+                del self.entries[url]
+                self.stats["misses"] += 1
+                return None, False
+
+            self.stats["stale"] += 1
+            return entry, False
+
+    def get_conditional_headers(self, entry):
+        """
+        Creates headers for revalidating an expired entry
+
+        returns:
+            dictionary of If-None-Match and/or If-Modified-Since headers
+        """
+        headers = {}
+
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+        return headers
+
+    def store(self, url, resource, response):
+        """
+        Caches a successful response, evicting the least recently used entries beyond max_entries
+        """
+        with self.lock:
+            self.insert(url, cache_entry(resource, response, time.monotonic() + self.ttls.get(get_collection(resource), 0)))
+
+    def insert(self, url, entry):
+        """
+        Adds (or replaces) the entry of a url as the most recently used (lock must be held)
+        """
+        self.entries[url] = entry
+        self.entries.move_to_end(url)
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def refresh(self, url, resource, entry):
+        """
+        Extends the lifetime of an entry the server confirmed is unchanged (304 Not Modified). An entry
+        evicted or invalidated since it was looked up is not inserted again: a write may have landed
+        after the server answered, so the next lookup misses instead.
+
+        params:
+            url: full url of the request
+            resource: resource within the API the request was made on
+            entry: cache_entry returned by lookup for the url
+
+        returns:
+            the cached response
+        """
+        with self.lock:
+            if self.entries.get(url) is entry:
+                entry.expires = time.monotonic() + self.ttls.get(get_collection(resource), 0)
+                self.entries.move_to_end(url)
+
+            self.stats["revalidated"] += 1
+            return entry.response
+
+    def invalidate(self, resource):
+        """
+        Drops every cached response belonging to the collection of a resource which was written to
+        """
+        collection = get_collection(resource)
+
+        with self.lock:
+            for url in [url for url, entry in self.entries.items() if entry.collection == collection]:
+                del self.entries[url]
+                self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self.entries)
+            lookups = stats["hits"] + stats["misses"] + stats["stale"]
+            stats["hit_ratio"] = round((stats["hits"] + stats["revalidated"]) / lookups, 3) if lookups else 0
+            return stats
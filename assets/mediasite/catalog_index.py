@@ -0,0 +1,156 @@
+"""
+In-memory index of Mediasite catalogs by id, by linked folder and by name, loaded from one
+paginated sweep of all catalogs and kept current as catalogs are created and deleted
+
+License: MIT - see license.txt
+"""
+
+import threading
+
+class catalog_index():
+    def __init__(self):
+        """
+        Maps catalogs by Id, LinkedFolderId and Name. Names are matched without regard to case, as the
+        Mediasite API does for $filter comparisons.
+        """
+        self.lock = threading.RLock()
+        self.catalogs = {}
+        self.by_folder = {}
+        self.by_name = {}
+        self.loaded = False
+
+        #catalogs added or removed while sweeps are in flight, as (sequence, catalog or None, catalog id)
+        self.sweeps = 0
+        self.sequence = 0
+        self.journal = []
+
+    def begin_sweep(self):
+        """
+        Starts recording the catalogs added and removed while a sweep gathers every catalog, so they
+        can be applied again over the (by then older) sweep results
+
+        returns:
+            token to pass to load, or to end_sweep if the sweep failed
+        """
+        with self.lock:
+            self.sweeps += 1
+            return self.sequence
+
+    def end_sweep(self):
+        with self.lock:
+            self.sweeps = max(self.sweeps - 1, 0)
+            if not self.sweeps:
+                self.journal = []
+
+    def load(self, catalogs, since=None):
+        """
+        Replaces the index contents with the catalogs of a full sweep
+
+        params:
+            catalogs: list of catalog entities, each with at least an Id
+            since: token from begin_sweep, catalogs added or removed after it are applied over the sweep results
+        """
+        with self.lock:
+            self.catalogs = {}
+            self.by_folder = {}
+            self.by_name = {}
+
+            for catalog in catalogs:
+                self.store(catalog)
+
+            if since is not None:
+                for sequence, catalog, catalog_id in self.journal:
+                    if sequence > since:
+                        self.apply(catalog, catalog_id)
+
+                self.end_sweep()
+
+            self.loaded = True
+
+    def store(self, catalog):
+        """
+        Adds a catalog to every map (lock must be held)
+        """
+        self.catalogs[catalog["Id"]] = catalog
+        self.by_folder.setdefault(catalog.get("LinkedFolderId"), {})[catalog["Id"]] = catalog
+        self.by_name.setdefault(catalog.get("Name", "").lower(), {})[catalog["Id"]] = catalog
+
+    def unstore(self, catalog):
+        """
+        Removes a catalog from the folder and name maps (lock must be held)
+        """
+        for mapping, key in ((self.by_folder, catalog.get("LinkedFolderId")), (self.by_name, catalog.get("Name", "").lower())):
+            catalogs = mapping.get(key, {})
+            catalogs.pop(catalog["Id"], None)
+            if not catalogs:
+                mapping.pop(key, None)
+
+    def apply(self, catalog, catalog_id):
+        """
+        Adds (or replaces) a catalog, or drops the catalog with the id when catalog is None (lock must be held)
+        """
+        existing = self.catalogs.pop(catalog_id, None)
+        if existing:
+            self.unstore(existing)
+
+        if catalog is not None:
+            self.store(catalog)
+
+    def record(self, catalog, catalog_id):
+        """
+        Applies a change, journaling it while sweeps are in flight (lock must be held)
+        """
+        self.apply(catalog, catalog_id)
+
+        if self.sweeps:
+            self.sequence += 1
+            self.journal.append((self.sequence, catalog, catalog_id))
+
+    def add(self, catalog):
+        """
+        Adds a created or changed catalog
+
+        params:
+            catalog: catalog entity with at least an Id
+        """
+        with self.lock:
+            self.record(catalog, catalog["Id"])
+
+    def remove(self, catalog_id):
+        """
+        Drops a deleted catalog
+        """
+        with self.lock:
+            self.record(None, catalog_id)
+
+    def get_catalog(self, catalog_id):
+        with self.lock:
+            return self.catalogs.get(catalog_id)
+
+    def get_by_linked_folder(self, folder_id):
+        """
+        returns:
+            list of catalogs linked to the folder
+        """
+        with self.lock:
+            return list(self.by_folder.get(folder_id, {}).values())
+
+    def find_by_name(self, catalog_name):
+        """
+        returns:
+            list of catalogs with the given name
+        """
+        with self.lock:
+            return list(self.by_name.get(catalog_name.lower(), {}).values())
+
+    def get_all(self):
+        """
+        returns:
+            list of every indexed catalog, in the order they were loaded or added
+        """
+        with self.lock:
+            return list(self.catalogs.values())
+
+    def get_stats(self):
+        with self.lock:
+            return {"catalogs":len(self.catalogs), "linked_folders":len(self.by_folder), "loaded":self.loaded}
@@ -13,8 +13,16 @@ import sys
 import logging
 import json
 import time
+import threading
 import assets.mediasite.model as model
 import assets.mediasite.api_client as api_client
+import assets.mediasite.async_api_client as async_api_client
+import assets.mediasite.resilience as resilience
+import assets.mediasite.rate_limit as rate_limit
+import assets.mediasite.cache as cache
+import assets.mediasite.metrics as metrics
+import assets.mediasite.folder_index as folder_index
+import assets.mediasite.metadata_cache as metadata_cache
 import assets.mediasite.modules.module as module
 import assets.mediasite.modules.schedule as schedule
 import assets.mediasite.modules.catalog as catalog
@@ -34,6 +42,18 @@ class controller():
         self.model = model.model()
         self.config_data = config_data
         self.api_client = self.create_api_client(config_data)
+        self.async_api_client = None
+        self.batch_requests = config_data.get("mediasite_batch_requests", False)
+        self.stream_decoding = config_data.get("mediasite_stream_decoding", False)
+        self.keyset_paging = config_data.get("mediasite_keyset_paging", False)
+        self.breadth_first_folders = config_data.get("mediasite_breadth_first_folders", False)
+        self.job_poll_interval = config_data.get("mediasite_job_poll_interval", 5)
+        self.metadata_cache = metadata_cache.metadata_cache(config_data["mediasite_metadata_cache"]) if config_data.get("mediasite_metadata_cache") else None
+        self.metadata_cache_max_age = config_data.get("mediasite_metadata_cache_max_age", 86400)
+
+        if config_data.get("mediasite_folder_index", False):
+            self.model.set_folder_index(folder_index.folder_index(max_age=config_data.get("mediasite_folder_index_max_age", 300)))
+
         self.module = module.module(self)
         self.schedule = schedule.schedule(self)
         self.catalog = catalog.catalog(self)
@@ -57,9 +77,120 @@ class controller():
         return api_client.client(config_data["mediasite_base_url"],
                                         config_data["mediasite_api_secret"],
                                         config_data["mediasite_api_user"],
-                                        config_data["mediasite_api_pass"]
+                                        config_data["mediasite_api_pass"],
+                                        pooled=config_data.get("mediasite_pooled_transport", False),
+                                        pool_size=config_data.get("mediasite_pool_size", 10),
+                                        max_connections_per_host=config_data.get("mediasite_max_connections_per_host", 10),
+                                        keep_alive=config_data.get("mediasite_keep_alive", True),
+                                        http2=config_data.get("mediasite_http2", False),
+                                        http2_prior_knowledge=config_data.get("mediasite_http2_prior_knowledge", False),
+                                        auth_tickets=config_data.get("mediasite_auth_tickets", False),
+                                        ticket_minutes=config_data.get("mediasite_auth_ticket_minutes", 60),
+                                        ticket_scheme=config_data.get("mediasite_auth_ticket_scheme", "SfIdentTicket"),
+                                        retry_policy=resilience.retry_policy(max_retries=config_data.get("mediasite_max_retries", 3),
+                                                                            backoff_base=config_data.get("mediasite_retry_backoff", 0.5)
+                                                                            ),
+                                        circuit_breaker=resilience.circuit_breaker(failure_threshold=config_data.get("mediasite_circuit_breaker_threshold", 5),
+                                                                                    recovery_timeout=config_data.get("mediasite_circuit_breaker_timeout", 30)
+                                                                                    ),
+                                        rate_limiter=self.create_rate_limiter(config_data),
+                                        response_cache=self.create_response_cache(config_data),
+                                        request_metrics=metrics.request_metrics(slow_threshold=self.get_slow_request_threshold(config_data),
+                                                                                serviceroot=config_data["mediasite_base_url"]
+                                                                                )
+                                        )
+
+    def get_slow_request_threshold(self, config_data):
+        """
+        Reads the slow request log threshold from configuration
+
+        returns:
+            threshold in seconds, or None if slow requests should not be logged
+        """
+        slow_request_ms = config_data.get("mediasite_slow_request_ms")
+        return slow_request_ms / 1000 if slow_request_ms else None
+
+    def operation(self, name):
+        """
+        Labels the request metrics of every request made by the current thread within a with block
+
+        params:
+            name: operation name, for ex. "schedule_row"
+        """
+        return self.api_client.metrics.operation(name)
+
+    def create_response_cache(self, config_data):
+        """
+        Creates a response cache for the Mediasite api client if cache lifetimes are configured
+
+        params:
+            config_data: dictionary containing information relevant to setting up mediasite api connection
+
+        returns:
+            cache.response_cache object, or None if caching is not configured
+        """
+
+        if "mediasite_cache_ttls" not in config_data:
+            return None
+
+        return cache.response_cache(ttls=config_data["mediasite_cache_ttls"] or None,
+                                    max_entries=config_data.get("mediasite_cache_max_entries", 1000)
+                                    )
+
+    def create_rate_limiter(self, config_data):
+        """
+        Creates a rate limiter for the Mediasite api client if any request rate is configured
+
+        params:
+            config_data: dictionary containing information relevant to setting up mediasite api connection
+
+        returns:
+            rate_limit.rate_limiter object, or None if no rates are configured
+        """
+
+        if not config_data.get("mediasite_read_rate") and not config_data.get("mediasite_write_rate"):
+            return None
+
+        return rate_limit.rate_limiter(read_rate=config_data.get("mediasite_read_rate"),
+                                        write_rate=config_data.get("mediasite_write_rate"),
+                                        read_burst=config_data.get("mediasite_read_burst"),
+                                        write_burst=config_data.get("mediasite_write_burst"),
+                                        state_path=config_data.get("mediasite_rate_limit_file")
+                                        )
+
+    def create_async_api_client(self, config_data):
+        """
+        Loads configuration file data and creates new asyncio Mediasite api client
+
+        params:
+            config_data: dictionary containing information relevant to setting up mediasite api connection
+
+        returns:
+            Configured asyncio Mediasite web api client object
+        """
+
+        return async_api_client.client(config_data["mediasite_base_url"],
+                                        config_data["mediasite_api_secret"],
+                                        config_data["mediasite_api_user"],
+                                        config_data["mediasite_api_pass"],
+                                        max_in_flight=config_data.get("mediasite_max_in_flight", 100),
+                                        max_connections_per_host=config_data.get("mediasite_max_connections_per_host", 10),
+                                        keep_alive=config_data.get("mediasite_keep_alive", True)
                                         )
 
+    def get_async_api_client(self):
+        """
+        Gathers the asyncio Mediasite api client, creating it on first use
+
+        returns:
+            asyncio Mediasite web api client object
+        """
+
+        if self.async_api_client is None:
+            self.async_api_client = self.create_async_api_client(self.config_data)
+
+        return self.async_api_client
+
     def connection_validated(self):
         """
         Validates Mediasite connection through web api through request for "home" information from Mediasite
@@ -79,6 +210,57 @@ class controller():
             self.model.set_current_connection_valid(True)
             return True
 
+    def warm_start(self, revalidate=True):
+        """
+        Fills the model with reference data (root folder id, templates, recorders, catalogs and the folder
+        index when enabled) from the metadata cache snapshot, gathering whatever has no snapshot younger
+        than mediasite_metadata_cache_max_age from the API. Without a metadata cache everything is gathered.
+
+        params:
+            revalidate: when true, collections restored from the snapshot are gathered again (and the
+                snapshot saved) in a background thread
+
+        returns:
+            the background revalidation thread, or None if nothing needs revalidating
+        """
+        if self.metadata_cache is None:
+            metadata_cache.gather(self, None)
+            return None
+
+        started = time.time()
+        missing = metadata_cache.restore(self, self.metadata_cache, self.metadata_cache_max_age)
+        metadata_cache.gather(self, self.metadata_cache, missing)
+
+        restored = [collection for collection in metadata_cache.get_collections(self) if collection not in missing]
+
+        logging.info("Warm start restored "+str(len(restored))+" collections from "+self.metadata_cache.path
+                        +" in "+str(round(time.time() - started, 3))+" seconds")
+
+        if not revalidate or not restored:
+            return None
+
+        thread = threading.Thread(target=self.revalidate_metadata, args=(restored,), name="metadata-revalidation", daemon=True)
+        thread.start()
+
+        return thread
+
+    def revalidate_metadata(self, collections=metadata_cache.COLLECTIONS):
+        """
+        Gathers reference data from the API into the model and saves it to the metadata cache
+
+        params:
+            collections: names of the collections to gather (see metadata_cache.COLLECTIONS)
+
+        returns:
+            list of collections which could not be gathered
+        """
+        failed = metadata_cache.gather(self, self.metadata_cache, collections)
+
+        if failed:
+            logging.error("Unable to revalidate cached Mediasite metadata: "+", ".join(failed))
+
+        return failed
+
     def experienced_request_errors(self, request_result):
         """
         Checks for errors experienced from web_api Python requests.
@@ -105,39 +287,64 @@ class controller():
         arguments:
             job_link_url: unique link to Mediasite job which can be used for gathering status
         """
-        while 1:
-            #gather information on the job status
-            job_result = self.api_client.request("get job", job_link_url, "", "").json()
-            
-            if self.experienced_request_errors(job_result):
-                return job_result
-            else:
-                if "Status" in job_result.keys():
-                    job_result_status = job_result["Status"]
-
-                    #if successful we return
-                    if job_result_status == "Successful":
-                        logging.info("Job was successful")
-                        return
-
-                    #if the job fails or is canceled for some reason exit
-                    elif job_result_status == "Disabled" or job_result_status == "Failed" or job_result_status == "Cancelled":
-                        logging.error("Job did not complete successfully with a status of "+job_result_status)
-                        logging.error("Job status information: "+job_result["StatusMessage"])
-                        return
-                    #if the job is queued or working we wait for the job to finish or fail
-                    else:
-                        logging.info("Waiting for job to complete. Job status: "+job_result_status)
-                        time.sleep(5)
+        return self.wait_for_jobs_to_complete([job_link_url])[0]
+
+    def wait_for_jobs_to_complete(self, job_link_urls):
+        """
+        Waits for many Mediasite jobs at once, checking the status of every outstanding job
+        (concurrently) each round rather than waiting for one job after another.
+
+        arguments:
+            job_link_urls: list of links to Mediasite jobs
+
+        returns:
+            list of results in the same order as job_link_urls, each None once the job has finished
+            (successfully or not) or the request error or job information without a status
+        """
+        results = [None] * len(job_link_urls)
+        pending = list(range(len(job_link_urls)))
+
+        while pending:
+            #gather information on the status of every job still outstanding
+            responses = self.api_client.request_many([("get job", job_link_urls[position], "", "") for position in pending])
+            working = []
+
+            for position, response in zip(pending, responses):
+                job_result = response if self.experienced_request_errors(response) else response.json()
+
+                if type(job_result) is str or "Status" not in job_result.keys():
+                    results[position] = job_result
+                    continue
+
+                job_result_status = job_result["Status"]
+
+                #if successful we are done with the job
+                if job_result_status == "Successful":
+                    logging.info("Job was successful")
+
+                #if the job fails or is canceled for some reason stop waiting on it
+                elif job_result_status == "Disabled" or job_result_status == "Failed" or job_result_status == "Cancelled":
+                    logging.error("Job did not complete successfully with a status of "+job_result_status)
+                    logging.error("Job status information: "+job_result["StatusMessage"])
+
+                #if the job is queued or working we wait for the job to finish or fail
                 else:
-                    return job_result
+                    logging.info("Waiting for job to complete. Job status: "+job_result_status)
+                    working.append(position)
+
+            pending = working
+            if pending:
+                time.sleep(self.job_poll_interval)
 
-    def process_scheduling_data_row(self, schedule_data):
+        return results
+
+    def process_scheduling_data_row(self, schedule_data, path_cache=None):
         """
         Process scheduling data provided in pre-specified format.
 
         params:
             schedule_data: list which contain pertinent mediasite scheduling data
+            path_cache: optional folder path cache shared by the rows of a run (see folder.create_path_cache)
 
         returns:
             output indicating which rows of scheduling information were successfully scheduled
@@ -153,7 +360,7 @@ class controller():
             return row_result
 
         #parse and create folders
-        parent_folder_id = self.folder.parse_and_create_folders(schedule_data["mediasite_folders"], schedule_data["mediasite_folder_root_id"])
+        parent_folder_id = self.folder.parse_and_create_folders(schedule_data["mediasite_folders"], schedule_data["mediasite_folder_root_id"], path_cache)
         
         #set the current schedule data parent folder id
         schedule_data["schedule_parent_folder_id"] = parent_folder_id
@@ -196,6 +403,144 @@ class controller():
 
         return row_result
 
+    def get_batch_operation_result(self, batch_operation):
+        """
+        Gathers the result of an executed batch operation in the same form the module methods return
+
+        params:
+            batch_operation: operation queued on an api_client batch which has been executed
+
+        returns:
+            decoded json of the operation response, or an "Error: ..." string
+        """
+
+        result = batch_operation.response
+
+        if self.experienced_request_errors(result):
+            return result
+
+        #settings and association requests only return a 204 http code on success
+        if not result.content:
+            return {}
+
+        result = result.json()
+
+        if "odata.error" in result:
+            logging.error(result["odata.error"]["code"]+": "+result["odata.error"]["message"]["value"])
+
+        return result
+
+    def process_scheduling_data_rows_batched(self, schedule_data_list):
+        """
+        Process many rows of scheduling data, packing the requests of every row into shared OData $batch
+        requests. Work happens in two phases so later requests can use ids created by earlier ones:
+        modules, catalogs and schedules are created first, then catalog reports, catalog settings,
+        module associations and schedule recurrences.
+
+        params:
+            schedule_data_list: list of schedule data dictionaries in pre-specified format
+
+        returns:
+            list of row results in the same form as process_scheduling_data_row
+        """
+
+        result_list = []
+        rows = []
+        module_ids = set()
+        path_cache = self.folder.create_path_cache()
+
+        #validation and folder creation are still performed per row, folders shared between rows are resolved once
+        for schedule_data in schedule_data_list:
+            row_result = {}
+            result_list.append(row_result)
+
+            validation_result = self.validate_scheduling_data(schedule_data)
+
+            if "error" in validation_result.keys():
+                row_result["error"] = validation_result["error"]
+                continue
+
+            #modules of earlier rows are not created until the batch is sent, so repeats within it are caught here
+            if schedule_data["module_include"]:
+                if schedule_data["module_id"].lower() in module_ids:
+                    row_result["error"] = "Error: " + schedule_data["schedule_name"] + " - Submitted ModuleId already exists."
+                    logging.error(row_result["error"])
+                    continue
+
+                module_ids.add(schedule_data["module_id"].lower())
+
+            schedule_data["schedule_parent_folder_id"] = self.folder.parse_and_create_folders(schedule_data["mediasite_folders"], schedule_data["mediasite_folder_root_id"], path_cache)
+            rows.append((schedule_data, row_result))
+
+        #first phase: modules, catalogs and schedules
+        creation_batch = self.api_client.batch()
+        creation_operations = []
+
+        for schedule_data, row_result in rows:
+            operations = {}
+
+            if schedule_data["module_include"]:
+                operations["module_result"] = self.module.create_module(schedule_data["module_name"], schedule_data["module_id"], creation_batch)
+
+            if schedule_data["catalog_include"]:
+                operations["catalog_result"] = self.catalog.create_catalog(schedule_data["catalog_name"], schedule_data["catalog_description"], schedule_data["schedule_parent_folder_id"], creation_batch)
+
+            operations["schedule_result"] = self.schedule.create_schedule(schedule_data, creation_batch)
+            creation_operations.append(operations)
+
+        creation_batch.execute()
+
+        for (schedule_data, row_result), operations in zip(rows, creation_operations):
+            for key, batch_operation in operations.items():
+                row_result[key] = self.get_batch_operation_result(batch_operation)
+
+            if type(row_result["schedule_result"]) is dict and "Id" in row_result["schedule_result"]:
+                self.model.add_schedule(row_result["schedule_result"])
+
+            if "catalog_result" in row_result:
+                self.catalog.add_to_index(row_result["catalog_result"])
+
+        #second phase: requests which depend on ids created in the first phase
+        association_batch = self.api_client.batch()
+        association_operations = []
+
+        for schedule_data, row_result in rows:
+            operations = {"recurrence_result":[]}
+            catalog_result = row_result.get("catalog_result", {})
+            module_result = row_result.get("module_result", {})
+            schedule_result = row_result["schedule_result"]
+
+            if type(catalog_result) is dict and "Id" in catalog_result:
+                operations["analytics_result"] = self.report.create_catalog_report(schedule_data["catalog_name"], catalog_result["Id"], association_batch)
+
+                if schedule_data["catalog_enable_download"]:
+                    self.catalog.enable_catalog_downloads(catalog_result["Id"], association_batch)
+
+                if not schedule_data["catalog_allow_links"]:
+                    self.catalog.disable_catalog_allow_links(catalog_result["Id"], association_batch)
+
+                if type(module_result) is dict and "Id" in module_result:
+                    self.catalog.add_module_to_catalog(catalog_result["Id"], module_result["Id"], association_batch)
+
+            if type(schedule_result) is dict:
+                schedule_result["folder_directory"] = schedule_data["mediasite_folders"]
+
+                if "Id" in schedule_result:
+                    operations["recurrence_result"] = self.schedule.create_recurrence(schedule_data, schedule_result, association_batch)
+
+            association_operations.append(operations)
+
+        association_batch.execute()
+
+        for (schedule_data, row_result), operations in zip(rows, association_operations):
+            if "analytics_result" in operations:
+                row_result["analytics_result"] = self.get_batch_operation_result(operations["analytics_result"])
+
+            row_result["recurrence_result"] = [self.schedule.record_recurrence_result(batch_operation.response)
+                                                for batch_operation in operations["recurrence_result"]]
+
+        return result_list
+
     def validate_scheduling_data(self, schedule_data):
         """
         Validate user entered data and notify them of any corrections using error dialogs
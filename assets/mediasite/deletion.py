@@ -0,0 +1,237 @@
+"""
+Concurrent deletion of a Mediasite folder subtree: the presentations, schedules and catalogs of
+every folder are deleted with a bounded pool of workers, then the folders themselves bottom-up one
+depth at a time while the delete jobs of each depth are waited on together. A folder whose contents,
+delete request or delete job failed is left in place along with every folder above it.
+
+License: MIT - see license.txt
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class progress():
+    def __init__(self, interval=5, callback=None):
+        """
+        Thread-safe progress and throughput counters for a deletion run
+
+        params:
+            interval: minimum seconds between progress log messages
+            callback: optional callable(stats) called with get_stats() as each item completes
+        """
+        self.interval = interval
+        self.callback = callback
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.reported = self.started
+        self.total = 0
+        self.completed = {}
+        self.errors = 0
+
+    def add_total(self, count):
+        with self.lock:
+            self.total += count
+
+    def complete(self, kind, error=False):
+        """
+        Records one deleted (or failed) item, logging progress at most once per interval
+
+        params:
+            kind: type of the item, for ex. "presentations"
+            error: true if the item could not be deleted
+        """
+        with self.lock:
+            self.completed[kind] = self.completed.get(kind, 0) + 1
+            if error:
+                self.errors += 1
+
+            now = time.time()
+            report = now - self.reported >= self.interval
+            if report:
+                self.reported = now
+
+        stats = self.get_stats()
+
+        if report:
+            logging.info("Deleted "+str(stats["completed"])+" of "+str(stats["total"])+" items ("+str(stats["per_second"])+" per second)")
+
+        if self.callback:
+            self.callback(stats)
+
+    def get_stats(self):
+        with self.lock:
+            completed = sum(self.completed.values())
+            seconds = time.time() - self.started
+
+            return {"total":self.total, "completed":completed, "errors":self.errors, "by_kind":dict(self.completed),
+                    "seconds":round(seconds, 3), "per_second":round(completed / seconds, 1) if seconds else 0.0}
+
+class delete_pipeline():
+    def __init__(self, mediasite, workers=8, progress_callback=None):
+        """
+        params:
+            mediasite: controller used for the requests
+            workers: maximum number of requests in flight at the same time
+            progress_callback: optional callable(stats) called as each item is deleted (see progress.get_stats)
+        """
+        self.mediasite = mediasite
+        self.workers = workers
+        self.progress = progress(callback=progress_callback)
+
+    def run_concurrently(self, function, items):
+        """
+        returns:
+            list of the results of function for each item, in the same order as items
+        """
+        if not items:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(items))) as executor:
+            return list(executor.map(function, items))
+
+    def gather_contents(self, folder_ids):
+        """
+        Gathers the presentations and schedules of each folder and the catalogs linked to any of them
+
+        returns:
+            list of (kind, id, name, folder id) tuples of items to delete, or the request error
+        """
+        def gather(folder_id):
+            return (self.mediasite.folder.get_folder_presentations(folder_id, select=("Id", "Title")),
+                    self.mediasite.folder.get_folder_schedules(folder_id, select=("Id", "Name")))
+
+        items = []
+
+        for folder_id, (presentations, schedules) in zip(folder_ids, self.run_concurrently(gather, folder_ids)):
+            #folders whose contents could not be listed are still deleted, as they were before
+            if not self.mediasite.experienced_request_errors(presentations):
+                items.extend(("presentations", presentation["Id"], presentation["Title"], folder_id) for presentation in presentations)
+
+            if not self.mediasite.experienced_request_errors(schedules):
+                items.extend(("schedules", schedule["Id"], schedule["Name"], folder_id) for schedule in schedules)
+
+        #catalogs are gathered afresh with one sweep and then looked up by linked folder
+        catalogs = self.mediasite.catalog.get_all_catalogs(select=("Id", "Name", "LinkedFolderId"))
+        if self.mediasite.experienced_request_errors(catalogs):
+            return catalogs
+
+        by_folder = {}
+        for catalog in catalogs:
+            by_folder.setdefault(catalog.get("LinkedFolderId"), []).append(catalog)
+
+        for folder_id in folder_ids:
+            items.extend(("catalogs", catalog["Id"], catalog.get("Name", catalog["Id"]), folder_id) for catalog in by_folder.get(folder_id, []))
+
+        return items
+
+    def delete_item(self, item):
+        """
+        returns:
+            true if the item was deleted
+        """
+        kind, item_id, name, folder_id = item
+
+        logging.info("Deleting "+kind[:-1]+" "+name+" to ensure capability to delete parent folder(s).")
+
+        if kind == "presentations":
+            result = self.mediasite.presentation.delete_presentation(item_id)
+        elif kind == "schedules":
+            result = self.mediasite.schedule.delete_schedule(item_id)
+        else:
+            result = self.mediasite.catalog.delete_catalog(item_id)
+
+        failed = type(result) is str or not result.ok
+        self.progress.complete(kind, failed)
+
+        return not failed
+
+    def delete_folder(self, folder_id):
+        """
+        returns:
+            link to the delete job of the folder, or None if it could not be deleted
+        """
+        result = self.mediasite.folder.delete_folder(folder_id)
+
+        if type(result) is str or not result.ok:
+            self.progress.complete("folders", True)
+            return None
+
+        return result.json()["odata.id"]
+
+    def run(self, parent_id):
+        """
+        Deletes a folder along with every folder, presentation, schedule and catalog below it
+
+        params:
+            parent_id: id of the folder to delete
+
+        returns:
+            result of the delete job of the folder (see controller.wait_for_job_to_complete), or the request error
+        """
+        folders = self.mediasite.folder.get_child_folders(parent_id, select=("Id", "ParentFolderId"))
+        if self.mediasite.experienced_request_errors(folders):
+            return folders
+
+        #parents are always listed before their children, so depths can be found in one pass
+        depths = {parent_id:0}
+        parents = {}
+        for folder in folders:
+            depths[folder["Id"]] = depths.get(folder["ParentFolderId"], 0) + 1
+            parents[folder["Id"]] = folder["ParentFolderId"]
+
+        #remove presentations, schedules and catalogs first as these can prevent folders from being deleted
+        items = self.gather_contents(list(depths))
+        if self.mediasite.experienced_request_errors(items):
+            return items
+
+        self.progress.add_total(len(items) + len(depths))
+
+        #a folder still holding content is kept, and with it every folder above it
+        blocked = set()
+        for item, deleted in zip(items, self.run_concurrently(self.delete_item, items)):
+            if not deleted:
+                self.block(item[3], parents, blocked)
+
+        #delete the deepest folders first, waiting on the jobs of each depth together before moving up
+        job_result = None
+        for depth in sorted(set(depths.values()), reverse=True):
+            folder_ids = [folder_id for folder_id in depths if depths[folder_id] == depth and folder_id not in blocked]
+
+            for folder_id in depths:
+                if depths[folder_id] == depth and folder_id in blocked:
+                    logging.error("Not deleting folder "+folder_id+" as content below it could not be deleted")
+                    self.progress.complete("folders", True)
+
+            jobs = []
+            for folder_id, job_link in zip(folder_ids, self.run_concurrently(self.delete_folder, folder_ids)):
+                if job_link:
+                    jobs.append((folder_id, job_link))
+                elif folder_id in parents:
+                    self.block(parents[folder_id], parents, blocked)
+
+            for (folder_id, job_link), result in zip(jobs, self.mediasite.wait_for_jobs_to_complete([job_link for folder_id, job_link in jobs])):
+                self.progress.complete("folders", type(result) is str)
+                if folder_id == parent_id:
+                    job_result = result
+                elif type(result) is str:
+                    self.block(parents[folder_id], parents, blocked)
+
+        stats = self.progress.get_stats()
+        logging.info("Deleted "+str(stats["completed"] - stats["errors"])+" of "+str(stats["total"])+" items in "+str(stats["seconds"])+" seconds ("+str(stats["per_second"])+" per second)")
+
+        return job_result
+
+    def block(self, folder_id, parents, blocked):
+        """
+        Keeps a folder and every folder above it (up to the folder being deleted) from being deleted
+
+        params:
+            folder_id: id of the folder to keep
+            parents: parent folder ids by folder id
+            blocked: set of ids of the folders kept, added to
+        """
+        while folder_id is not None and folder_id not in blocked:
+            blocked.add(folder_id)
+            folder_id = parents.get(folder_id)
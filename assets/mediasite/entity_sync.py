@@ -0,0 +1,188 @@
+"""
+Incremental synchronization of a Mediasite API collection into a local store: after one full crawl
+only entities modified since the newest one already stored are requested, and deletions are found by
+a periodic reconcile which lists ids alone. Both page by key rather than by $skip, so an entity modified
+during a crawl cannot shift another past the crawl unseen.
+
+License: MIT - see license.txt
+"""
+
+import time
+import logging
+import threading
+
+class entity_sync():
+    def __init__(self, resource, conditions="", modified_property="LastModified", reconcile_interval=86400):
+        """
+        Keeps a store of every entity of a collection matching the conditions, by id
+
+        params:
+            resource: collection within the API to synchronize, for ex. "Presentations"
+            conditions: optional $filter expression every stored entity must satisfy
+            modified_property: property holding the time an entity was last modified
+            reconcile_interval: seconds after which a sync first reconciles deletions, None to only reconcile when asked
+        """
+        self.resource = resource
+        self.conditions = conditions
+        self.modified_property = modified_property
+        self.reconcile_interval = reconcile_interval
+        self.lock = threading.RLock()
+        self.entities = {}
+        self.high_water_mark = ""
+        self.reconciled = 0
+        self.stats = {"syncs":0, "fetched":0, "skipped":0, "removed":0, "reconciles":0}
+
+    def get_conditions(self, since=""):
+        """
+        returns:
+            $filter expression selecting entities matching the conditions (modified at or after since when given)
+        """
+        expressions = [self.conditions] if self.conditions else []
+
+        #changes within the same second as the mark are requested again rather than missed
+        if since:
+            expressions.append(self.modified_property+" ge datetime'"+since.rstrip("Z")+"'")
+
+        return " and ".join(expressions)
+
+    def crawl(self, api_client, since="", page_size=1000, select=None):
+        """
+        Pages through the matching entities oldest first, by keyset on (modified time, Id). With $skip
+        paging an entity modified mid-crawl moves to the end of the order and shifts the next one onto
+        a page already read, where it is missed for good as its modified time is below the new mark.
+
+        returns:
+            pagination.keyset_pager
+        """
+        return api_client.seek(self.resource, self.get_conditions(since), page_size, (self.modified_property, "Id"), select,
+                                key_types={self.modified_property:"datetime"})
+
+    def store(self, entity):
+        """
+        Adds or replaces an entity (lock must be held)
+        """
+        self.entities[entity["Id"]] = entity
+
+        if entity.get(self.modified_property, "") > self.high_water_mark:
+            self.high_water_mark = entity[self.modified_property]
+
+    def sync(self, api_client, page_size=1000, select=None):
+        """
+        Brings the store up to date, with a full crawl the first time and only modified entities afterwards
+
+        params:
+            api_client: api_client.client used for the requests
+            page_size: number of entities requested per page
+            select: optional list of entity properties to request (must include Id and the modified property)
+
+        returns:
+            dictionary with the number of entities fetched, skipped (stored and not requested again), removed
+            by a reconcile and held in total, or the request error
+        """
+        if self.reconcile_interval is not None and self.high_water_mark and time.time() - self.reconciled >= self.reconcile_interval:
+            removed = self.reconcile(api_client, page_size)
+            if type(removed) is not int:
+                return removed
+        else:
+            removed = 0
+
+        with self.lock:
+            since = self.high_water_mark
+            previous = len(self.entities)
+
+        logging.info("Synchronizing "+self.resource+(" modified since "+since if since else " (full crawl)"))
+
+        pages = self.crawl(api_client, since, page_size, select)
+        fetched = 0
+        refetched = 0
+
+        for entity in pages:
+            with self.lock:
+                refetched += entity["Id"] in self.entities
+                self.store(entity)
+            fetched += 1
+
+        if pages.error:
+            return pages.error
+
+        with self.lock:
+            if not since:
+                self.reconciled = time.time()
+
+            result = {"fetched":fetched, "skipped":previous - refetched, "removed":removed,
+                        "total":len(self.entities), "full":not since}
+
+            self.stats["syncs"] += 1
+            self.stats["fetched"] += result["fetched"]
+            self.stats["skipped"] += result["skipped"]
+
+        logging.info("Synchronized "+self.resource+": "+str(result["fetched"])+" fetched, "+str(result["skipped"])+" skipped")
+
+        return result
+
+    def reconcile(self, api_client, page_size=1000):
+        """
+        Lists the ids of every matching entity, dropping stored entities which no longer exist (or no longer
+        match the conditions) and fetching any which exist but were missed
+
+        params:
+            api_client: api_client.client used for the requests
+            page_size: number of ids requested per page
+
+        returns:
+            number of entities removed from the store, or the request error
+        """
+        pages = api_client.seek(self.resource, self.get_conditions(), page_size, select=("Id",))
+        ids = set(entity["Id"] for entity in pages)
+
+        if pages.error:
+            return pages.error
+
+        with self.lock:
+            removed = [entity_id for entity_id in self.entities if entity_id not in ids]
+            missing = [entity_id for entity_id in ids if entity_id not in self.entities]
+
+            for entity_id in removed:
+                del self.entities[entity_id]
+
+        #entities which came to match the conditions without being modified since the mark
+        if missing:
+            entities = api_client.paginate_matching(self.resource, "Id", missing, self.conditions, page_size)
+            if isinstance(entities, str):
+                return entities
+
+            with self.lock:
+                for entity in entities:
+                    self.store(entity)
+
+        with self.lock:
+            self.reconciled = time.time()
+            self.stats["reconciles"] += 1
+            self.stats["removed"] += len(removed)
+
+        return len(removed)
+
+    def restore(self, entities, reconciled=0):
+        """
+        Replaces the store with entities saved earlier (see metadata_cache), which the next sync brings up to date
+
+        params:
+            entities: list of entities
+            reconciled: time of the last reconcile of the saved entities
+        """
+        with self.lock:
+            self.entities = {}
+            self.high_water_mark = ""
+
+            for entity in entities:
+                self.store(entity)
+
+            self.reconciled = reconciled
+
+    def get_all(self):
+        with self.lock:
+            return list(self.entities.values())
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, total=len(self.entities), high_water_mark=self.high_water_mark)
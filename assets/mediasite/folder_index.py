@@ -0,0 +1,297 @@
+"""
+In-memory index of the Mediasite folder tree, loaded with one paginated sweep of all non-recycled
+folders and kept current with incremental LastModified refreshes
+
+License: MIT - see license.txt
+"""
+
+import time
+import logging
+import threading
+
+#properties kept for each folder
+FOLDER_PROPERTIES = ("Id", "Name", "ParentFolderId", "LastModified", "Recycled")
+
+class folder_index():
+    def __init__(self, root_id="", max_age=300):
+        """
+        Maps folders by id, by parent and by path below the root folder. Folder names are matched
+        without regard to case, as the Mediasite API does for $filter comparisons.
+
+        params:
+            root_id: id of the (hidden) Mediasite root folder which paths are relative to
+            max_age: seconds after which the index is refreshed before answering, None to only refresh when asked
+        """
+        self.root_id = root_id
+        self.max_age = max_age
+        self.lock = threading.RLock()
+        self.update_lock = threading.Lock()
+        self.folders = {}
+        self.children = {}
+        self.paths = {}
+        self.high_water_mark = ""
+        self.refreshed = 0
+        self.loaded = False
+
+    def load(self, api_client, page_size=500, workers=4):
+        """
+        Replaces the index contents with every non-recycled folder, requesting pages concurrently
+
+        params:
+            api_client: api_client.client used for the requests
+            page_size: number of folders requested per page
+            workers: maximum number of pages requested at the same time
+
+        returns:
+            number of folders indexed, or the request error
+        """
+        logging.info("Loading Mediasite folder index")
+
+        started = time.time()
+        folders = api_client.scan("Folders", "$filter=Recycled eq false", page_size, workers, ordered=False, select=FOLDER_PROPERTIES)
+        entities = list(folders)
+
+        if folders.error:
+            return folders.error
+
+        with self.lock:
+            self.folders = {}
+            self.children = {}
+            self.paths = {}
+            self.high_water_mark = ""
+
+            for folder in entities:
+                self.store(folder)
+
+            self.refreshed = started
+            self.loaded = True
+
+        logging.info("Indexed "+str(len(entities))+" Mediasite folders")
+
+        return len(entities)
+
+    def restore(self, folders, refreshed):
+        """
+        Replaces the index contents with folders saved earlier (see metadata_cache), which the next
+        refresh brings up to date
+
+        params:
+            folders: list of folder entities
+            refreshed: time the folders were last loaded or refreshed from the API
+        """
+        with self.lock:
+            self.folders = {}
+            self.children = {}
+            self.paths = {}
+            self.high_water_mark = ""
+
+            for folder in folders:
+                self.store(folder)
+
+            self.refreshed = refreshed
+            self.loaded = True
+
+    def refresh(self, api_client, page_size=500):
+        """
+        Applies folders created, renamed, moved or recycled since the last load or refresh
+
+        params:
+            api_client: api_client.client used for the requests
+            page_size: number of folders requested per page
+
+        returns:
+            number of changed folders applied, or the request error
+        """
+        if not self.loaded or not self.high_water_mark:
+            return self.load(api_client, page_size)
+
+        started = time.time()
+
+        #changes within the same second as the mark are requested again rather than missed
+        folders = api_client.paginate("Folders", "$filter=LastModified ge datetime'"+self.high_water_mark.rstrip("Z")+"'",
+                                    page_size, select=FOLDER_PROPERTIES)
+        entities = list(folders)
+
+        if folders.error:
+            return folders.error
+
+        with self.lock:
+            for folder in entities:
+                if folder.get("Recycled"):
+                    self.remove(folder["Id"])
+                else:
+                    self.add(folder)
+
+            self.refreshed = started
+
+        return len(entities)
+
+    def is_stale(self):
+        return not self.loaded or (self.max_age is not None and time.time() - self.refreshed >= self.max_age)
+
+    def ensure_current(self, api_client):
+        """
+        Loads the index on first use and refreshes it once it is older than max_age. Concurrent
+        callers wait for one load or refresh instead of each making their own.
+
+        returns:
+            true if the index can be used (false if it could not be loaded)
+        """
+        with self.update_lock:
+            if self.is_stale():
+                result = self.refresh(api_client)
+
+                if type(result) is not int:
+                    logging.error("Unable to update the Mediasite folder index: "+str(result))
+
+            return self.loaded
+
+    def store(self, folder):
+        """
+        Adds a folder to the id and parent maps (lock must be held, paths are not updated)
+        """
+        folder = {name:folder[name] for name in FOLDER_PROPERTIES if name in folder}
+        self.folders[folder["Id"]] = folder
+        self.children.setdefault(folder.get("ParentFolderId", ""), {})[folder["Id"]] = folder
+
+        if folder.get("LastModified", "") > self.high_water_mark:
+            self.high_water_mark = folder["LastModified"]
+
+    def add(self, folder):
+        """
+        Adds a created or changed folder, moving it (and its subtree) if its name or parent changed
+
+        params:
+            folder: folder entity with at least Id, Name and ParentFolderId
+        """
+        with self.lock:
+            existing = self.folders.get(folder["Id"])
+
+            if existing:
+                self.children.get(existing.get("ParentFolderId", ""), {}).pop(existing["Id"], None)
+
+                #paths below a renamed or moved folder change with it
+                if existing.get("Name") != folder.get("Name") or existing.get("ParentFolderId") != folder.get("ParentFolderId"):
+                    self.paths = {}
+
+            self.store(folder)
+
+            #a new folder joins the path map once built, unless folders below it were indexed first (as a refresh can)
+            if not existing and self.paths:
+                path = self.get_path(folder["Id"])
+
+                if path is None or self.children.get(folder["Id"]):
+                    self.paths = {}
+                else:
+                    self.paths.setdefault(path.lower(), folder["Id"])
+
+    def remove(self, folder_id):
+        """
+        Drops a deleted or recycled folder along with every folder below it
+        """
+        with self.lock:
+            for descendant in self.get_descendants(folder_id):
+                self.folders.pop(descendant["Id"], None)
+                self.children.pop(descendant["Id"], None)
+
+            folder = self.folders.pop(folder_id, None)
+            if folder:
+                self.children.get(folder.get("ParentFolderId", ""), {}).pop(folder_id, None)
+
+            self.children.pop(folder_id, None)
+            self.paths = {}
+
+    def get_folders(self):
+        """
+        returns:
+            list of every indexed folder
+        """
+        with self.lock:
+            return [dict(folder) for folder in self.folders.values()]
+
+    def get_folder(self, folder_id):
+        with self.lock:
+            folder = self.folders.get(folder_id)
+            return dict(folder) if folder else None
+
+    def get_children(self, parent_id):
+        """
+        returns:
+            list of folders directly within the parent folder
+        """
+        with self.lock:
+            return [dict(folder) for folder in self.children.get(parent_id, {}).values()]
+
+    def get_descendants(self, parent_id):
+        """
+        returns:
+            list of folders at every depth below the parent folder, each followed by its own descendants
+        """
+        with self.lock:
+            result = []
+            stack = list(reversed(self.get_children(parent_id)))
+
+            while stack:
+                folder = stack.pop()
+                result.append(folder)
+                stack.extend(reversed(self.get_children(folder["Id"])))
+
+            return result
+
+    def find_children_by_name(self, parent_id, folder_name):
+        """
+        returns:
+            list of folders within the parent folder with the given name
+        """
+        name = folder_name.lower()
+        return [folder for folder in self.get_children(parent_id) if folder.get("Name", "").lower() == name]
+
+    def find_by_name(self, folder_name):
+        """
+        returns:
+            list of folders anywhere in the tree with the given name
+        """
+        name = folder_name.lower()
+
+        with self.lock:
+            return [dict(folder) for folder in self.folders.values() if folder.get("Name", "").lower() == name]
+
+    def get_path(self, folder_id):
+        """
+        returns:
+            path of the folder below the root, for ex. "/Current/Spring 2018/Test", or None if it is not indexed
+        """
+        with self.lock:
+            names = []
+
+            while folder_id in self.folders:
+                folder = self.folders[folder_id]
+                names.append(folder.get("Name", ""))
+                folder_id = folder.get("ParentFolderId", "")
+
+            if not names or (self.root_id and folder_id != self.root_id):
+                return None
+
+            return "/" + "/".join(reversed(names))
+
+    def get_id_by_path(self, folder_path):
+        """
+        Finds a folder by its path below the root, for ex. "/Current/Spring 2018/Test"
+
+        returns:
+            folder id, or None if no folder has the path
+        """
+        key = "/" + "/".join(name for name in folder_path.lower().split("/") if name)
+
+        with self.lock:
+            if not self.paths:
+                for folder_id in self.folders:
+                    path = self.get_path(folder_id)
+                    if path is not None:
+                        self.paths.setdefault(path.lower(), folder_id)
+
+            return self.paths.get(key)
+
+    def get_stats(self):
+        with self.lock:
+            return {"folders":len(self.folders), "loaded":self.loaded, "refreshed":self.refreshed, "high_water_mark":self.high_water_mark}
@@ -0,0 +1,172 @@
+"""
+Memoized resolution of folder paths (for ex. "Current/Fall 2026/CHEM/1113") to folder ids, so
+rows of a scheduling run which share path prefixes look each folder up only once
+
+License: MIT - see license.txt
+"""
+
+import threading
+
+class path_node():
+    def __init__(self, folder_id, parent_id=None, name=""):
+        """
+        One folder within the path trie
+
+        params:
+            folder_id: id of the folder, or None for a negative entry (a folder known not to exist)
+            parent_id: id of the parent folder
+            name: lowercase folder name
+        """
+        self.folder_id = folder_id
+        self.parent_id = parent_id
+        self.name = name
+        self.children = {}
+
+        #folders created during the run have no children other than those created since
+        self.complete = False
+
+class path_cache():
+    def __init__(self):
+        """
+        Thread-safe trie of folder paths below their starting folders, holding positive entries for
+        folders found or created and negative entries for folders known to be missing. Concurrent
+        resolutions of the same folder wait for each other so a folder is never created twice.
+        """
+        self.lock = threading.Lock()
+        self.nodes = {}
+        self.segment_locks = {}
+        self.stats = {"hits":0, "lookups":0, "negative_hits":0, "created":0, "invalidations":0}
+
+    def get_node(self, folder_id):
+        """
+        Finds (or adds) the node of a folder (lock must be held)
+        """
+        node = self.nodes.get(folder_id)
+        if node is None:
+            node = self.nodes[folder_id] = path_node(folder_id)
+
+        return node
+
+    def resolve(self, parent_id, folder_path, find, create):
+        """
+        Resolves each folder of a path in turn, creating those which do not exist
+
+        params:
+            parent_id: id of the folder the path starts from
+            folder_path: folder names delimited by "/"
+            find: callable(name, parent_id) returning the id of an existing folder, "" if there is none, or None if the lookup failed
+            create: callable(name, parent_id) returning the id of the created folder, or None if it could not be created
+
+        returns:
+            id of the lowest folder resolved (the last one of the path unless a lookup or creation failed)
+        """
+        for name in folder_path.split("/"):
+            if name == "":
+                continue
+
+            folder_id = self.resolve_segment(parent_id, name, find, create)
+            if not folder_id:
+                break
+
+            parent_id = folder_id
+
+        return parent_id
+
+    def resolve_segment(self, parent_id, name, find, create):
+        key = (parent_id, name.lower())
+
+        with self.lock:
+            child = self.get_node(parent_id).children.get(key[1])
+            if child is not None and child.folder_id:
+                self.stats["hits"] += 1
+                return child.folder_id
+
+            segment_lock = self.segment_locks.setdefault(key, threading.Lock())
+
+        #only one thread looks up (and creates) any one folder, others wait and then find it cached
+        with segment_lock:
+            with self.lock:
+                parent = self.get_node(parent_id)
+                child = parent.children.get(key[1])
+
+                if child is not None and child.folder_id:
+                    self.stats["hits"] += 1
+                    return child.folder_id
+
+                known_missing = child is not None or parent.complete
+                if known_missing:
+                    self.stats["negative_hits"] += 1
+
+            if not known_missing:
+                with self.lock:
+                    self.stats["lookups"] += 1
+
+                folder_id = find(name, parent_id)
+                if folder_id is None:
+                    return None
+
+                if folder_id:
+                    self.add(parent_id, name, folder_id)
+                    return folder_id
+
+                with self.lock:
+                    parent.children[key[1]] = path_node(None, parent_id, key[1])
+
+            folder_id = create(name, parent_id)
+            if not folder_id:
+                return None
+
+            with self.lock:
+                self.stats["created"] += 1
+
+            self.add(parent_id, name, folder_id, created=True)
+            return folder_id
+
+    def add(self, parent_id, name, folder_id, created=False):
+        """
+        Records a folder which was found or created, replacing any negative entry for its name
+
+        params:
+            parent_id: id of the parent folder
+            name: folder name
+            folder_id: id of the folder
+            created: whether the folder was just created (and so has no children yet)
+        """
+        with self.lock:
+            node = self.nodes.get(folder_id)
+
+            #a folder first seen as the start of a path gains its place in the trie, a moved folder starts over
+            if node is None or (node.parent_id is not None and node.parent_id != parent_id):
+                node = self.nodes[folder_id] = path_node(folder_id, parent_id, name.lower())
+                node.complete = created
+            else:
+                node.parent_id = parent_id
+                node.name = name.lower()
+
+            self.get_node(parent_id).children[name.lower()] = node
+
+    def invalidate(self, folder_id):
+        """
+        Forgets a deleted folder and every path below it
+        """
+        with self.lock:
+            node = self.nodes.pop(folder_id, None)
+            if node is None:
+                return
+
+            self.stats["invalidations"] += 1
+
+            parent = self.nodes.get(node.parent_id)
+            if parent is not None and parent.children.get(node.name) is node:
+                del parent.children[node.name]
+
+            stack = list(node.children.values())
+            while stack:
+                child = stack.pop()
+                if child.folder_id:
+                    self.nodes.pop(child.folder_id, None)
+                stack.extend(child.children.values())
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, folders=len(self.nodes))
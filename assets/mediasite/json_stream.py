@@ -0,0 +1,290 @@
+"""
+Incremental decoding of Mediasite API (OData) collection responses. Entities of the "value"
+array are yielded as soon as they have arrived instead of after the whole body is read.
+
+Uses the ijson library as a faster streaming backend and orjson for decoding whole bodies
+when they are installed.
+
+License: MIT - see license.txt
+"""
+
+import json
+import codecs
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+WHITESPACE = " \t\n\r"
+
+#errors raised by the decoding backends for invalid or truncated bodies (ijson's are not ValueErrors)
+DECODE_ERRORS = (ValueError, ijson.JSONError) if ijson is not None else (ValueError,)
+
+def loads(content):
+    """
+    Decodes a complete json body, using orjson when installed
+
+    params:
+        content: response body as bytes
+
+    returns:
+        decoded value (raises ValueError if the body is not valid json)
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+
+    return json.loads(content)
+
+class value_decoder():
+    def __init__(self, chunks):
+        """
+        Pure python incremental decoder. Walks the top level object of a collection response,
+        decoding the elements of the "value" array as soon as their text is complete, so only
+        the current chunk and the entities completed within it are held in memory. Elements
+        completed within a chunk are decoded together with one json.loads call, and an element
+        spanning chunks with json.JSONDecoder.raw_decode.
+
+        params:
+            chunks: iterable of response body chunks (bytes)
+        """
+        self.chunks = iter(chunks)
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.finished = False
+        self.metadata = {}
+        self.chunks_read = 0
+        self.batch_failed = -1
+
+    def read_more(self):
+        """
+        Appends the next chunk of the body to the buffer, dropping text which was already decoded
+
+        returns:
+            false once the body has been read completely
+        """
+        if self.finished:
+            return False
+
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.finished = True
+            self.buffer = self.buffer[self.position:] + self.text_decoder.decode(b"", final=True)
+        else:
+            self.buffer = self.buffer[self.position:] + self.text_decoder.decode(chunk)
+
+        self.position = 0
+        self.chunks_read += 1
+        return True
+
+    def peek(self):
+        """
+        Skips whitespace and returns the next character without consuming it (empty at the end of the body)
+        """
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in WHITESPACE:
+                self.position += 1
+
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+
+            if not self.read_more():
+                return ""
+
+    def expect(self, characters):
+        character = self.peek()
+        if character not in characters or not character:
+            raise ValueError("Expected one of "+repr(characters)+" at offset "+str(self.position)+", found "+repr(character))
+
+        self.position += 1
+        return character
+
+    def decode_next(self):
+        """
+        Decodes the json value starting at the current position, reading more of the body as needed
+
+        returns:
+            decoded value
+        """
+        self.peek()
+
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buffer, self.position)
+
+                #a number at the end of the buffer may continue in the next chunk
+                if end < len(self.buffer) or self.finished:
+                    self.position = end
+                    return value
+
+            except json.JSONDecodeError:
+                if self.finished:
+                    raise
+
+            self.read_more()
+
+    def decode_batch(self):
+        """
+        Decodes every object element of the value array completed within the buffer with one call. The
+        text up to the last "}," is tried as an array: a cut within a string or a nested object leaves
+        it invalid, so a successful decode always ends on an element boundary.
+
+        returns:
+            list of decoded elements (position moves past the "," following the last), or None if there is
+            no such boundary and the elements are to be decoded one at a time
+        """
+        #a failed attempt is not repeated until more of the body has been read
+        if self.batch_failed == self.chunks_read:
+            return None
+
+        cut = self.buffer.rfind("},", self.position)
+        if cut == -1:
+            return None
+
+        try:
+            values = self.json_decoder.decode("[" + self.buffer[self.position:cut+1] + "]")
+        except json.JSONDecodeError:
+            self.batch_failed = self.chunks_read
+            return None
+
+        self.position = cut + 2
+        return values
+
+    def __iter__(self):
+        self.expect("{")
+
+        if self.peek() == "}":
+            self.position += 1
+            return
+
+        while True:
+            key = self.decode_next()
+            self.expect(":")
+
+            if key == "value" and self.peek() == "[":
+                self.position += 1
+
+                if self.peek() == "]":
+                    self.position += 1
+                else:
+                    while True:
+                        values = self.decode_batch()
+                        if values:
+                            yield from values
+                            continue
+
+                        yield self.decode_next()
+
+                        if self.expect(",]") == "]":
+                            break
+            else:
+                self.metadata[key] = self.decode_next()
+
+            if self.expect(",}") == "}":
+                return
+
+def iter_ijson_values(raw, metadata):
+    """
+    Yields entities of the "value" array using ijson, recording top level properties in metadata
+
+    params:
+        raw: file-like object with the response body
+        metadata: dictionary which top level properties (odata.count, odata.nextLink, etc.) are added to
+    """
+    in_value = False
+    key = None
+    builder = None
+    nesting = 0
+
+    for prefix, event, value in ijson.parse(raw, use_float=True):
+
+        #build entities and nested top level properties (for ex. odata.error) from their events
+        if builder is not None:
+            builder.event(event, value)
+
+            if event in ("start_map", "start_array"):
+                nesting += 1
+            elif event in ("end_map", "end_array"):
+                nesting -= 1
+
+            if nesting == 0:
+                if in_value:
+                    yield builder.value
+                else:
+                    metadata[key] = builder.value
+                builder = None
+
+            continue
+
+        if event == "map_key":
+            key = value
+
+        elif in_value and event == "end_array":
+            in_value = False
+
+        elif not in_value and key == "value" and event == "start_array":
+            in_value = True
+
+        elif event in ("start_map", "start_array"):
+            #the opening of the top level object itself
+            if key is None:
+                continue
+
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+            nesting = 1
+
+        elif event not in ("end_map", "end_array"):
+            if in_value:
+                yield value
+            else:
+                metadata[key] = value
+
+class streamed_page():
+    def __init__(self, response, backend="auto", chunk_size=65536):
+        """
+        One collection page whose entities are decoded while the body is still arriving.
+        Properties outside the value array are available in metadata once iteration has
+        finished (odata.count is usually available as soon as the first entity is yielded).
+
+        params:
+            response: requests response object made with stream=True
+            backend: "ijson", "json" (pure python) or "auto" to use ijson when installed
+            chunk_size: number of bytes read from the connection at once
+        """
+        self.response = response
+        self.backend = backend
+        self.chunk_size = chunk_size
+        self.metadata = {}
+
+    def get(self, key, default=None):
+        return self.metadata.get(key, default)
+
+    def __contains__(self, key):
+        return key in self.metadata
+
+    def __iter__(self):
+        try:
+            if self.backend == "ijson" or (self.backend == "auto" and ijson is not None):
+                if ijson is None:
+                    raise ImportError("The ijson library is required for the ijson decoding backend")
+
+                #let urllib3 undo any content encoding before ijson reads the raw stream
+                self.response.raw.decode_content = True
+                yield from iter_ijson_values(self.response.raw, self.metadata)
+
+            else:
+                decoder = value_decoder(self.response.iter_content(self.chunk_size))
+                decoder.metadata = self.metadata
+                yield from decoder
+
+        finally:
+            #return the connection to the pool even if the consumer stopped early
+            self.response.close()
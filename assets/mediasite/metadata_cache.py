@@ -0,0 +1,235 @@
+"""
+On-disk (SQLite) snapshot of the reference data held by the model (root folder id, templates,
+recorders, catalogs and the folder index), so a new process can start from the last snapshot and
+revalidate it against the Mediasite API in the background
+
+License: MIT - see license.txt
+"""
+
+import json
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+
+#snapshots written with a different schema version are discarded rather than migrated (version 1
+#catalog snapshots could hold catalogs with only Id, Name and LinkedFolderId)
+SCHEMA_VERSION = 2
+
+#model collections kept in the snapshot, in the order they are restored and gathered
+COLLECTIONS = ("RootFolder", "Templates", "Recorders", "Catalogs", "Folders")
+
+class metadata_cache():
+    def __init__(self, path):
+        """
+        SQLite store of entity collections. Each collection is saved whole, recording when it was saved
+        and when each of its entities was last seen unchanged.
+
+        params:
+            path: path of the SQLite database file (created if it does not exist)
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.stats = {"restored":0, "saved":0, "discarded":0}
+
+        with self.transaction() as connection:
+            self.create_schema(connection)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Opens a connection to the database for one transaction (connections are not shared between threads)
+        """
+        connection = sqlite3.connect(self.path, timeout=30)
+
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def create_schema(self, connection):
+        """
+        Creates the tables, dropping those of any other schema version
+        """
+        connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = connection.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+
+        if row is not None and row[0] != str(SCHEMA_VERSION):
+            logging.info("Discarding metadata cache with schema version "+row[0])
+            connection.execute("DROP TABLE IF EXISTS collections")
+            connection.execute("DROP TABLE IF EXISTS entities")
+            self.stats["discarded"] += 1
+
+        connection.execute("CREATE TABLE IF NOT EXISTS collections (name TEXT PRIMARY KEY, saved REAL, count INTEGER)")
+        connection.execute("CREATE TABLE IF NOT EXISTS entities (collection TEXT, position INTEGER, data TEXT, saved REAL, "
+                            "PRIMARY KEY (collection, position))")
+        connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+
+    def save(self, collection, entities):
+        """
+        Replaces the snapshot of a collection. Entities unchanged since the last save keep the time
+        they were first saved with that content.
+
+        params:
+            collection: collection name, for ex. "Templates"
+            entities: list of json serializable entities
+        """
+        now = time.time()
+        rows = [json.dumps(entity, sort_keys=True) for entity in entities]
+
+        with self.lock, self.transaction() as connection:
+            previous = dict(connection.execute("SELECT data, saved FROM entities WHERE collection = ?", (collection,)).fetchall())
+
+            connection.execute("DELETE FROM entities WHERE collection = ?", (collection,))
+            connection.executemany("INSERT INTO entities (collection, position, data, saved) VALUES (?, ?, ?, ?)",
+                                    [(collection, position, data, previous.get(data, now)) for position, data in enumerate(rows)])
+            connection.execute("INSERT OR REPLACE INTO collections (name, saved, count) VALUES (?, ?, ?)", (collection, now, len(rows)))
+
+            self.stats["saved"] += 1
+
+    def load(self, collection, max_age=None):
+        """
+        Loads the snapshot of a collection
+
+        params:
+            collection: collection name, for ex. "Templates"
+            max_age: seconds after which a snapshot is too old to use, None to use any snapshot
+
+        returns:
+            tuple of the list of entities and the time the snapshot was saved, or (None, None) if there is no usable snapshot
+        """
+        with self.transaction() as connection:
+            row = connection.execute("SELECT saved FROM collections WHERE name = ?", (collection,)).fetchone()
+
+            if row is None or (max_age is not None and time.time() - row[0] > max_age):
+                return None, None
+
+            entities = [json.loads(data) for (data,) in connection.execute("SELECT data FROM entities WHERE collection = ? ORDER BY position", (collection,))]
+
+        with self.lock:
+            self.stats["restored"] += 1
+
+        return entities, row[0]
+
+    def set_value(self, key, value):
+        """
+        Saves a value kept alongside the snapshot, for ex. the time of the last presentation reconcile
+        """
+        with self.lock, self.transaction() as connection:
+            connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def get_value(self, key, default=None):
+        """
+        returns:
+            value saved with set_value, or default if there is none
+        """
+        with self.transaction() as connection:
+            row = connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+
+        return json.loads(row[0]) if row is not None else default
+
+    def get_ages(self):
+        """
+        returns:
+            dictionary of collection name to the age of its snapshot in seconds
+        """
+        with self.transaction() as connection:
+            return {name:time.time() - saved for name, saved in connection.execute("SELECT name, saved FROM collections")}
+
+    def clear(self):
+        with self.lock, self.transaction() as connection:
+            connection.execute("DELETE FROM entities")
+            connection.execute("DELETE FROM collections")
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats)
+
+def get_collections(mediasite):
+    """
+    returns:
+        names of the collections kept in the snapshot for this controller (Folders only when the folder index is enabled)
+    """
+    return [collection for collection in COLLECTIONS if collection != "Folders" or mediasite.model.get_folder_index() is not None]
+
+def restore(mediasite, cache, max_age=None):
+    """
+    Fills the model from the snapshot
+
+    params:
+        mediasite: controller whose model is filled
+        cache: metadata_cache holding the snapshot
+        max_age: seconds after which a snapshot is too old to use, None to use any snapshot
+
+    returns:
+        list of collections without a usable snapshot
+    """
+    missing = []
+
+    for collection in get_collections(mediasite):
+        index = mediasite.model.get_folder_index()
+        entities, saved = cache.load(collection, max_age)
+
+        if entities is None:
+            missing.append(collection)
+        elif collection == "RootFolder":
+            if entities:
+                mediasite.model.set_root_parent_folder_id(entities[0]["Id"])
+        elif collection == "Templates":
+            mediasite.model.set_templates(entities)
+        elif collection == "Recorders":
+            mediasite.model.set_recorders(entities)
+        elif collection == "Catalogs":
+            mediasite.model.set_catalogs(entities)
+        elif collection == "Folders":
+            index.root_id = mediasite.model.get_root_parent_folder_id()
+            index.restore(entities, saved)
+
+    return missing
+
+def gather(mediasite, cache, collections=COLLECTIONS):
+    """
+    Gathers collections from the Mediasite API into the model and saves them to the snapshot. The
+    folder index, when enabled and already filled, is refreshed with folders modified since rather than reloaded.
+
+    params:
+        mediasite: controller whose model is filled
+        cache: metadata_cache the collections are saved to, or None to only fill the model
+        collections: names of the collections to gather
+
+    returns:
+        list of collections which could not be gathered
+    """
+    failed = []
+
+    for collection in collections:
+        index = mediasite.model.get_folder_index()
+
+        if collection == "RootFolder":
+            root_id = mediasite.folder.gather_root_folder_id()
+            #the id is itself a string, so only "Error: ..." strings are errors
+            result = root_id if root_id.startswith("Error: ") else [root_id]
+            entities = [{"Id":root_id}]
+        elif collection == "Templates":
+            result = entities = mediasite.template.gather_templates()
+        elif collection == "Recorders":
+            result = entities = mediasite.recorder.gather_recorders()
+        elif collection == "Catalogs":
+            #the index keeps catalogs created or deleted during the sweep, so it is saved rather than the sweep itself
+            result = mediasite.catalog.get_all_catalogs(workers=4)
+            entities = mediasite.model.get_catalogs()
+        elif collection == "Folders" and index is not None:
+            with index.update_lock:
+                result = index.refresh(mediasite.api_client) if index.loaded else mediasite.folder.load_index()
+            entities = index.get_folders()
+        else:
+            continue
+
+        if mediasite.experienced_request_errors(result):
+            failed.append(collection)
+        elif cache is not None:
+            cache.save(collection, entities)
+
+    return failed
@@ -0,0 +1,288 @@
+"""
+Latency and throughput instrumentation for Mediasite API requests
+
+License: MIT - see license.txt
+"""
+
+import re
+import time
+import json
+import logging
+import threading
+import contextlib
+
+#histogram bucket upper bounds in seconds, the last bucket holds everything slower
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+#entity keys such as ('a1b2...') or (1234) are replaced so each resource shape is one series
+ENTITY_KEY_PATTERN = re.compile(r"\([^()]*\)")
+
+def normalize_resource(url, serviceroot=""):
+    """
+    Reduces a request url to its resource shape, for ex.
+    "https://host/api/v1/Schedules('abc')/Recurrences?$top=10" -> "Schedules('...')/Recurrences"
+    """
+    if serviceroot and url.startswith(serviceroot):
+        url = url[len(serviceroot):]
+
+    resource = url.split("?")[0]
+    return ENTITY_KEY_PATTERN.sub("('...')", resource)
+
+class histogram():
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        Fixed bucket latency histogram (not thread-safe, guarded by request_metrics)
+
+        params:
+            buckets: ascending bucket upper bounds in seconds
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                index = i
+                break
+
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def get_percentile(self, percentile):
+        """
+        Estimates a percentile as the upper bound of the bucket it falls in
+
+        returns:
+            latency in seconds (the observed maximum for the overflow bucket)
+        """
+        if not self.count:
+            return 0
+
+        rank = percentile / 100 * self.count
+        seen = 0
+
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+
+        return self.max
+
+class request_metrics():
+    def __init__(self, slow_threshold=None, serviceroot=""):
+        """
+        Records latency, status codes, bytes transferred and in-flight requests for every request,
+        keyed by the current operation, http method and normalized resource
+
+        params:
+            slow_threshold: optional seconds after which a request is written to the slow request log
+            serviceroot: root URL of the API, removed from urls when normalizing resources
+        """
+        self.slow_threshold = slow_threshold
+        self.serviceroot = serviceroot
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.series = {}
+        self.in_flight = {}
+        self.started = time.time()
+
+    @contextlib.contextmanager
+    def operation(self, name):
+        """
+        Labels every request made by the current thread within the block with an operation name,
+        for ex. with metrics.operation("delete_folder_by_path"): ...
+        """
+        stack = self.local.__dict__.setdefault("operations", [])
+        stack.append(name)
+
+        try:
+            yield
+        finally:
+            stack.pop()
+
+    def get_operation(self):
+        stack = getattr(self.local, "operations", None)
+        return stack[-1] if stack else ""
+
+    def start(self, method, url):
+        """
+        Marks a request as in flight
+
+        returns:
+            token to pass to finish once the request completes
+        """
+        key = (self.get_operation(), method.upper(), normalize_resource(url, self.serviceroot))
+
+        with self.lock:
+            self.in_flight[key[2]] = self.in_flight.get(key[2], 0) + 1
+
+        return key, url, time.perf_counter()
+
+    def finish(self, token, response=None, error=None, bytes_sent=0):
+        """
+        Records the outcome of a request started with start
+
+        params:
+            token: value returned by start
+            response: response received, or None if the request raised an exception
+            error: exception raised by the request, if any
+            bytes_sent: size of the request body
+        """
+        key, url, started = token
+        elapsed = time.perf_counter() - started
+
+        if response is not None:
+            status = str(response.status_code)
+            bytes_received = get_response_size(response)
+        else:
+            status = type(error).__name__ if error is not None else "error"
+            bytes_received = 0
+
+        with self.lock:
+            self.in_flight[key[2]] -= 1
+
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {"latency":histogram(), "statuses":{}, "bytes_sent":0, "bytes_received":0}
+
+            series["latency"].observe(elapsed)
+            series["statuses"][status] = series["statuses"].get(status, 0) + 1
+            series["bytes_sent"] += bytes_sent
+            series["bytes_received"] += bytes_received
+
+        if self.slow_threshold is not None and elapsed >= self.slow_threshold:
+            logging.warning("Slow Mediasite request ("+str(round(elapsed * 1000))+"ms, status "+status+"): "+key[1]+" "+url
+                            +(" during "+key[0] if key[0] else ""))
+
+    def reset(self):
+        with self.lock:
+            self.series = {}
+            self.started = time.time()
+
+    def get_snapshot(self):
+        """
+        Summarizes recorded requests
+
+        returns:
+            dictionary with one entry per operation, method and resource plus in-flight counts
+        """
+        with self.lock:
+            series_list = []
+
+            for (operation, method, resource), series in sorted(self.series.items()):
+                latency = series["latency"]
+                series_list.append({
+                    "operation":operation,
+                    "method":method,
+                    "resource":resource,
+                    "count":latency.count,
+                    "statuses":dict(series["statuses"]),
+                    "bytes_sent":series["bytes_sent"],
+                    "bytes_received":series["bytes_received"],
+                    "latency_ms":{
+                        "mean":round(latency.sum / latency.count * 1000, 2) if latency.count else 0,
+                        "p50":round(latency.get_percentile(50) * 1000, 2),
+                        "p95":round(latency.get_percentile(95) * 1000, 2),
+                        "p99":round(latency.get_percentile(99) * 1000, 2),
+                        "max":round(latency.max * 1000, 2)
+                        }
+                    })
+
+            elapsed = time.time() - self.started
+            total = sum(series["count"] for series in series_list)
+
+            return {"since":self.started,
+                    "requests":total,
+                    "requests_per_second":round(total / elapsed, 2) if elapsed > 0 else 0,
+                    "in_flight":{resource:count for resource, count in self.in_flight.items() if count},
+                    "series":series_list
+                    }
+
+    def to_json(self):
+        return json.dumps(self.get_snapshot(), indent=4)
+
+    def to_prometheus(self):
+        """
+        Renders recorded requests in the Prometheus text exposition format
+
+        returns:
+            string of metric lines
+        """
+        lines = [
+            "# HELP mediasite_request_duration_seconds Mediasite API request latency",
+            "# TYPE mediasite_request_duration_seconds histogram"
+            ]
+
+        with self.lock:
+            series_items = sorted(self.series.items())
+
+            for (operation, method, resource), series in series_items:
+                labels = get_labels(operation=operation, method=method, resource=resource)
+                latency = series["latency"]
+                cumulative = 0
+
+                for bound, count in zip(latency.buckets + ("+Inf",), latency.counts):
+                    cumulative += count
+                    lines.append("mediasite_request_duration_seconds_bucket{"+labels+",le=\""+str(bound)+"\"} "+str(cumulative))
+
+                lines.append("mediasite_request_duration_seconds_sum{"+labels+"} "+repr(latency.sum))
+                lines.append("mediasite_request_duration_seconds_count{"+labels+"} "+str(latency.count))
+
+            lines += ["# HELP mediasite_requests_total Mediasite API requests by response status",
+                      "# TYPE mediasite_requests_total counter"]
+            for (operation, method, resource), series in series_items:
+                for status, count in sorted(series["statuses"].items()):
+                    labels = get_labels(operation=operation, method=method, resource=resource, status=status)
+                    lines.append("mediasite_requests_total{"+labels+"} "+str(count))
+
+            lines += ["# HELP mediasite_request_bytes_total Mediasite API request and response body bytes",
+                      "# TYPE mediasite_request_bytes_total counter"]
+            for (operation, method, resource), series in series_items:
+                for direction in ("sent", "received"):
+                    labels = get_labels(operation=operation, method=method, resource=resource, direction=direction)
+                    lines.append("mediasite_request_bytes_total{"+labels+"} "+str(series["bytes_"+direction]))
+
+            lines += ["# HELP mediasite_requests_in_flight Mediasite API requests awaiting a response",
+                      "# TYPE mediasite_requests_in_flight gauge"]
+            for resource, count in sorted(self.in_flight.items()):
+                lines.append("mediasite_requests_in_flight{"+get_labels(resource=resource)+"} "+str(count))
+
+        return "\n".join(lines) + "\n"
+
+def get_labels(**labels):
+    """
+    Formats Prometheus labels, escaping backslashes, quotes and newlines in values
+    """
+    escaped = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        escaped.append(name+"=\""+value+"\"")
+
+    return ",".join(escaped)
+
+def get_response_size(response):
+    """
+    Finds the body size of a response without reading a deferred (streamed) body
+    """
+    #requests leaves _content as False until a streamed body has been read
+    content = response._content if hasattr(response, "_content") else getattr(response, "content", False)
+    if content is not False:
+        return len(content or b"")
+
+    try:
+        return int(response.headers.get("Content-Length", 0))
+    except ValueError:
+        return 0
+
+def get_request_size(response):
+    """
+    Finds the body size of the request a response was received for
+    """
+    body = getattr(getattr(response, "request", None), "body", None)
+    return len(body) if body else 0
@@ -11,6 +11,7 @@ License: MIT - see license.txt
 import os
 import sys
 import logging
+import assets.mediasite.catalog_index as catalog_index
 
 class model():
     def __init__(self):
@@ -21,7 +22,8 @@ class model():
         self.schedules = {}
         self.recurrences = {}
         self.folders = {}
-        self.catalogs = []
+        self.catalog_index = catalog_index.catalog_index()
+        self.folder_index = None
 
     def translate_recorder_id(self, recorder_name):
         """
@@ -94,6 +96,12 @@ class model():
     def get_folders(self):
         return self.folders
 
+    def set_folder_index(self, folder_index):
+        self.folder_index = folder_index
+
+    def get_folder_index(self):
+        return self.folder_index
+
     def get_current_connection_valid(self):
         return self.current_connection_valid
 
@@ -107,7 +115,10 @@ class model():
         self.root_parent_folder_id = root_parent_folder_id
 
     def get_catalogs(self):
-        return self.catalogs
+        return self.catalog_index.get_all()
+
+    def set_catalogs(self, catalogs, since=None):
+        self.catalog_index.load(catalogs, since)
 
-    def set_catalogs(self, catalogs):
-        self.catalogs = catalogs
\ No newline at end of file
+    def get_catalog_index(self):
+        return self.catalog_index
\ No newline at end of file
@@ -36,42 +36,121 @@ class catalog():
             if "odata.error" in result:
                 logging.error(result["odata.error"]["code"]+": "+result["odata.error"]["message"]["value"])
 
+            if result.ok:
+                self.mediasite.model.get_catalog_index().remove(catalog_id)
+
             return result
 
-    def get_all_catalogs(self):
+    def get_catalog_index(self, workers=1):
+        """
+        Gathers the catalog index, loading every catalog with one paginated sweep on first use
+
+        params:
+            workers: number of pages to request concurrently when the index is loaded
+
+        returns:
+            catalog_index.catalog_index of all mediasite catalogs, or the request error
+        """
+
+        index = self.mediasite.model.get_catalog_index()
+
+        if not index.loaded:
+            catalogs = self.get_all_catalogs(workers, False)
+            if self.mediasite.experienced_request_errors(catalogs):
+                return catalogs
+
+        return index
+
+    def add_to_index(self, catalog):
         """
-        Gathers presentations found under mediasite folder given folder's id
+        Adds a created catalog to the catalog index once it has been loaded (a later load replaces it anyway)
+
+        params:
+            catalog: catalog entity returned by the mediasite web api
+        """
+
+        index = self.mediasite.model.get_catalog_index()
+
+        if index.loaded and type(catalog) is dict and "Id" in catalog:
+            index.add(catalog)
+
+    def get_all_catalogs(self, workers=1, ordered=True, select=None, keyset=None):
+        """
+        Gathers all catalogs found within mediasite
         
         params:
-            parent_id: id of mediasite folder
+            workers: number of pages to request concurrently (1 requests pages one after another)
+            ordered: when false, pages are gathered in the order they arrive (only used with workers > 1)
+            select: optional list of catalog properties to request, all properties if not provided (the catalog
+                index behind model.get_catalogs is only replaced by sweeps of whole catalogs)
+            keyset: page in Id order by seeking past the last Id received rather than with $skip (pages are then
+                requested one after another), defaults to the mediasite_keyset_paging setting
 
         returns:
-            details of presentations found within mediasite folder
+            list of all mediasite catalogs
         """
 
         logging.info("Gathering all catalogs.")
 
-        catalogs = []
-        size = 100
-        total = 1
-        skip = 0
+        if keyset is None:
+            keyset = self.mediasite.keyset_paging
 
-        while total > skip:
+        #catalogs created or deleted while the sweep runs (for ex. by another thread) are kept when it is applied
+        index = self.mediasite.model.get_catalog_index()
+        since = index.begin_sweep()
 
-            result = self.mediasite.api_client.request("get", "Catalogs", "$top="+str(size)+"&$skip="+str(skip),"")
-            result_json = result.json()
-            catalogs.extend(result_json["value"])
-            total = int(result_json["odata.count"])
-            skip += size
+        if keyset:
+            pages = self.mediasite.api_client.seek("Catalogs", "", 100, select=select)
+        elif workers > 1:
+            pages = self.mediasite.api_client.scan("Catalogs", "", 100, workers, ordered, select=select)
+        else:
+            pages = self.mediasite.api_client.paginate("Catalogs", "", 100, select=select)
+        catalogs = list(pages)
 
-        self.mediasite.model.set_catalogs(result_json["value"])
+        if self.mediasite.experienced_request_errors(pages.error):
+            index.end_sweep()
+            return pages.error
+        else:
+            self.set_catalogs(catalogs, since, select)
+            return catalogs
 
-        if self.mediasite.experienced_request_errors(result):
-            return result
+    def set_catalogs(self, catalogs, since, select=None):
+        """
+        Replaces the catalog index with the catalogs of a sweep, unless the sweep requested only some
+        properties, which would leave consumers of model.get_catalogs with partial catalogs
+        """
+
+        if select:
+            self.mediasite.model.get_catalog_index().end_sweep()
         else:
+            self.mediasite.model.set_catalogs(catalogs, since)
+
+    async def get_all_catalogs_async(self, select=None):
+        """
+        Asyncio counterpart of get_all_catalogs. All pages after the first are requested concurrently.
+
+        params:
+            select: optional list of catalog properties to request, all properties if not provided (see get_all_catalogs)
+
+        returns:
+            list of all mediasite catalogs
+        """
+
+        logging.info("Gathering all catalogs.")
+
+        index = self.mediasite.model.get_catalog_index()
+        since = index.begin_sweep()
+
+        catalogs = await self.mediasite.get_async_api_client().gather_pages("Catalogs", "", 100, select=select)
+
+        if self.mediasite.experienced_request_errors(catalogs):
+            index.end_sweep()
+            return catalogs
+        else:
+            self.set_catalogs(catalogs, since, select)
             return catalogs
 
-    def enable_catalog_downloads(self, catalog_id):
+    def enable_catalog_downloads(self, catalog_id, batch=None):
         """
         Enables mediasite catalog downloads using provided catalog ID
 
@@ -79,6 +158,7 @@ class catalog():
 
         params:
             catalog_id: mediasite catalog ID to enable downloads on
+            batch: optional api_client batch to queue the request on instead of sending it
 
         returns:
             resulting response from the mediasite web api request to enable downloads on the folder
@@ -89,6 +169,9 @@ class catalog():
         #prepare patch data to be sent to mediasite
         patch_data = {"AllowPresentationDownload":"True"}
 
+        if batch is not None:
+            return batch.add("patch", "Catalogs('"+catalog_id+"')/Settings", "", patch_data)
+
         #make the mediasite request using the catalog id and the patch data found above to enable downloads
         result = self.mediasite.api_client.request("patch", "Catalogs('"+catalog_id+"')/Settings", "", patch_data)
         
@@ -97,7 +180,7 @@ class catalog():
         else:
             return result
 
-    def disable_catalog_allow_links(self, catalog_id):
+    def disable_catalog_allow_links(self, catalog_id, batch=None):
         """
         Disables mediasite catalog links using provided catalog ID
 
@@ -105,6 +188,7 @@ class catalog():
 
         params:
             catalog_id: mediasite catalog ID to disable links on
+            batch: optional api_client batch to queue the request on instead of sending it
 
         returns:
             resulting response from the mediasite web api request
@@ -115,6 +199,9 @@ class catalog():
         #prepare patch data to be sent to mediasite
         patch_data = {"AllowCatalogLinks":"False"}
 
+        if batch is not None:
+            return batch.add("patch", "Catalogs('"+catalog_id+"')/Settings", "", patch_data)
+
         #make the mediasite request using the catalog id and the patch data found above to enable downloads
         result = self.mediasite.api_client.request("patch", "Catalogs('"+catalog_id+"')/Settings", "", patch_data)
         
@@ -123,13 +210,14 @@ class catalog():
         else:
             return result
 
-    def add_module_to_catalog(self, catalog_id, module_guid):
+    def add_module_to_catalog(self, catalog_id, module_guid, batch=None):
         """
         Add mediasite module to catalog by catalog id and module guid
 
         params:
             catalog_id: mediasite catalog id which will have the module added
             module_guid: mediasite module GUID (not to be confused with a module ID)
+            batch: optional api_client batch to queue the request on instead of sending it
 
         returns:
             resulting response from the mediasite web api request
@@ -140,6 +228,9 @@ class catalog():
         #prepare patch data to be sent to mediasite
         post_data = {"MediasiteId":catalog_id}
 
+        if batch is not None:
+            return batch.add("post", "Modules('"+module_guid+"')/AddAssociation", "", post_data)
+
         #make the mediasite request using the catalog id and the patch data found above to enable downloads
         result = self.mediasite.api_client.request("post", "Modules('"+module_guid+"')/AddAssociation", "", post_data)
 
@@ -148,7 +239,7 @@ class catalog():
         else:
             return result
 
-    def create_catalog(self, catalog_name, description="", parent_id=None):
+    def create_catalog(self, catalog_name, description="", parent_id=None, batch=None):
         """
         Creates mediasite catalog using provided catalog name, description, and parent folder id
 
@@ -156,9 +247,10 @@ class catalog():
             catalog_name: name which will appear for the catalog
             description: description which will appear for the catalog (beneath name)
             folder_id: mediasite folder ID associated with the catalog
+            batch: optional api_client batch to queue the request on instead of sending it
 
         returns:
-            resulting response from the mediasite web api request
+            resulting response from the mediasite web api request (or the queued batch operation)
         """
 
         logging.info("Creating catalog '"+catalog_name+"' under parent folder "+str(parent_id))
@@ -171,6 +263,9 @@ class catalog():
         if parent_id:
             post_data["LinkedFolderId"] = parent_id
 
+        if batch is not None:
+            return batch.add("post", "Catalogs", "", post_data)
+
         result = self.mediasite.api_client.request("post", "Catalogs", "", post_data).json()
         
         if self.mediasite.experienced_request_errors(result):
@@ -179,6 +274,8 @@ class catalog():
             if "odata.error" in result:
                 logging.error(result["odata.error"]["code"]+": "+result["odata.error"]["message"]["value"])
 
+            self.add_to_index(result)
+
             return result
 
     
\ No newline at end of file
@@ -8,20 +8,29 @@ License: MIT - see license.txt
 """
 
 import logging
+import asyncio
+import weakref
 from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+import assets.mediasite.folder_index as folder_index
+import assets.mediasite.folder_paths as folder_paths
+import assets.mediasite.deletion as deletion
 
 class folder():
     def __init__(self, mediasite, *args, **kwargs):
         self.mediasite = mediasite
+        #path caches of scheduling runs in progress, kept current as folders are created and deleted
+        self.path_caches = weakref.WeakSet()
         #self.gather_root_folder_id()
 
-    def gather_folders(self, parent_id=""):
+    def gather_folders(self, parent_id="", select=("Name", "Id", "ParentFolderId")):
         """
         Gathers mediasite child folder name, ID, and parent ID listing from mediasite system
         based on provided parent mediasite folder ID
 
         params:
             parent_id: mediasite parent folder ID for use as a reference point in this function
+            select: folder properties to request, only those used for the listing by default
 
         returns:
             list of dictionary items containing child mediasite folder names, ID's, and parent folder ID's
@@ -35,23 +44,107 @@ class folder():
         logging.info("Gathering Mediasite folders")
 
         #request existing (non-recycled) mediasite folder information based on parent folder ID provided to function
-        result = self.mediasite.api_client.request("get", "Folders", "$top=100&$filter=ParentFolderId eq '"+parent_id+"' and Recycled eq false","")
+        folders = self.mediasite.api_client.paginate("Folders", "$filter=ParentFolderId eq '"+parent_id+"' and Recycled eq false", select=select)
+
+        #for each item in the result create a dictionary with name, ID, and parent ID elements for reference
+        for folder in folders:
+            ms_folders.append({"name":folder["Name"],
+                                "id":folder["Id"],
+                                "parent_id":folder["ParentFolderId"]
+                                })
+
+        if self.mediasite.experienced_request_errors(folders.error):
+            return folders.error
+        else:
+            #add the listing of folder data to the model for later use
+            self.mediasite.model.set_folders(ms_folders, parent_id)
+
+            return ms_folders
+
+    async def gather_folders_async(self, parent_id="", select=("Name", "Id", "ParentFolderId")):
+        """
+        Asyncio counterpart of gather_folders
+
+        params:
+            parent_id: mediasite parent folder ID for use as a reference point in this function
+            select: folder properties to request, only those used for the listing by default
+
+        returns:
+            list of dictionary items containing child mediasite folder names, ID's, and parent folder ID's
+        """
+
+        if parent_id == "":
+            parent_id = self.mediasite.model.get_root_parent_folder_id()
+
+        logging.info("Gathering Mediasite folders")
+
+        result = await self.mediasite.get_async_api_client().gather_pages("Folders", "$filter=ParentFolderId eq '"+parent_id+"' and Recycled eq false", select=select)
 
         if self.mediasite.experienced_request_errors(result):
             return result
         else:
-            #for each item in the result create a dictionary with name, ID, and parent ID elements for reference
-            for folder in result.json()["value"]:
-                ms_folders.append({"name":folder["Name"],
-                                            "id":folder["Id"],
-                                            "parent_id":folder["ParentFolderId"]
-                                            })
+            ms_folders = [{"name":folder["Name"], "id":folder["Id"], "parent_id":folder["ParentFolderId"]}
+                            for folder in result]
 
-            #add the listing of folder data to the model for later use
             self.mediasite.model.set_folders(ms_folders, parent_id)
 
             return ms_folders
 
+    def load_index(self, page_size=500, workers=4):
+        """
+        Loads every non-recycled folder into a folder index which get_child_folders, find_folder_by_name_and_parent_id,
+        get_folder_by_name and delete_folder_by_path then answer from without further requests
+
+        params:
+            page_size: number of folders requested per page
+            workers: maximum number of pages requested at the same time
+
+        returns:
+            number of folders indexed, or the request error
+        """
+
+        index = self.mediasite.model.get_folder_index()
+        if index is None:
+            index = folder_index.folder_index(max_age=None)
+            self.mediasite.model.set_folder_index(index)
+
+        index.root_id = self.mediasite.model.get_root_parent_folder_id()
+
+        result = index.load(self.mediasite.api_client, page_size, workers)
+        self.set_root_from_index(index)
+
+        return result
+
+    def get_index(self):
+        """
+        Finds the folder index if one is enabled, loading it on first use and refreshing it once it is older than its maximum age
+
+        returns:
+            folder_index.folder_index, or None if no index is enabled or it could not be loaded
+        """
+
+        index = self.mediasite.model.get_folder_index()
+
+        if index is None or not index.ensure_current(self.mediasite.api_client):
+            return None
+
+        self.set_root_from_index(index)
+
+        return index
+
+    def set_root_from_index(self, index):
+        """
+        Finds the root folder id as the parent of the "Mediasite Users" folder within the index (see gather_root_folder_id)
+        """
+
+        if not index.root_id:
+            users_folders = index.find_by_name("Mediasite Users")
+            if users_folders:
+                index.root_id = users_folders[0]["ParentFolderId"]
+
+        if index.root_id and not self.mediasite.model.get_root_parent_folder_id():
+            self.mediasite.model.set_root_parent_folder_id(index.root_id)
+
     def gather_root_folder_id(self):
         """
         Gathers mediasite root folder ID for use with other functions.
@@ -95,6 +188,20 @@ class folder():
             logging.info("Found existing folder '"+folder_name+"' under parent "+parent_id)
             return folder_search_result["value"][0]
 
+        return self.create_new_folder(folder_name, parent_id)
+
+    def create_new_folder(self, folder_name, parent_id):
+        """
+        Creates mediasite folder without first checking whether one with the same name exists
+
+        params:
+            folder_name: name desired for the new mediasite folder
+            parent_id: mediasite parent folder ID for use as a reference point in this function
+
+        returns:
+            resulting response from the mediasite web api request for folder data
+        """
+
         logging.info("Creating folder '"+folder_name+"' under parent "+parent_id)
 
         #prepare post data for use in creating the folder
@@ -113,6 +220,13 @@ class folder():
             if "odata.error" in result:
                 logging.error(result["odata.error"]["code"]+": "+result["odata.error"]["message"]["value"])
 
+            elif "Id" in result:
+                if self.mediasite.model.get_folder_index():
+                    self.mediasite.model.get_folder_index().add(result)
+
+                for cache in list(self.path_caches):
+                    cache.add(parent_id, folder_name, result["Id"], created=True)
+
             return result
 
     def find_folder_by_name_and_parent_id(self, folder_name, parent_id=""):
@@ -129,9 +243,15 @@ class folder():
 
         logging.info("Searching for folder '"+folder_name+"' under parent "+parent_id)
 
+        index = self.get_index()
+
         if parent_id == "":
             parent_id = self.mediasite.model.get_root_parent_folder_id()
 
+        if index:
+            matches = index.find_children_by_name(parent_id, folder_name)
+            return {"odata.count":len(matches), "value":matches}
+
         #make the mediasite request using the post data found above to create the folder
         result = self.mediasite.api_client.request("get", "Folders", "$filter=Name eq '"+folder_name+"' and ParentFolderId eq '"+parent_id+"' and Recycled eq false", "").json()
 
@@ -170,129 +290,241 @@ class folder():
 
             return result
 
-    def get_presentations_and_schedules_by_parent_folder_name(self, folder_name):
+    def get_presentations_and_schedules_by_parent_folder_name(self, folder_name, workers=4, presentation_select=None, schedule_select=None):
         """
-        Gathers schedules and presentations found under one parent folder, searching each child folder underneath
-        
+        Gathers schedules and presentations found under one parent folder, searching each child folder underneath.
+        The subtree is walked one level at a time (see get_child_folders_by_level) and the presentations and
+        schedules of many folders are then requested together with "ParentFolderId eq ... or ..." and
+        "FolderId eq ... or ..." filters, so a large subtree takes a handful of requests rather than two per folder.
+
         params:
             folder_name: name of the mediasite folder
+            workers: maximum number of listings requested at the same time
+            presentation_select: optional list of presentation properties to request (must include ParentFolderId), all properties if not provided
+            schedule_select: optional list of schedule properties to request (must include FolderId), all properties if not provided
 
         returns:
-            details of schedules and presentations found within mediasite folder
+            tuple of the presentations and the schedules found within mediasite folder (empty if no folder has the name), or the request error
         """
 
-        folder = mediasite.folder.get_folder_by_name(folder_name)
+        folder = self.get_folder_by_name(folder_name)
+
+        if self.mediasite.experienced_request_errors(folder):
+            return folder
 
-        if int(folder.json()["odata.count"]) > 0:
-            parent_id = folder.json()["value"][0]["Id"]
+        if "odata.error" in folder or int(folder["odata.count"]) == 0:
+            return [], []
 
-            child_folders = mediasite.folder.get_child_folders(parent_id)
-            child_folders.append(folder.json()["value"][0])
+        parent_id = folder["value"][0]["Id"]
 
-            presentations = []
-            schedules = []
+        #answered from the folder index when there is one
+        child_folders = self.get_child_folders(parent_id, select=("Id",), breadth_first=True)
 
-            for folder in child_folders:
-                presentations_result = mediasite.folder.get_folder_presentations(folder["Id"])
-                [presentations.append(presentation) for presentation in presentations_result.json()["value"]]
-                schedules_result = mediasite.folder.get_folder_schedules(folder["Id"])
-                print(schedules_result.json())
-                [schedules.append(schedule) for schedule in schedules_result.json()["value"]]
+        if self.mediasite.experienced_request_errors(child_folders):
+            return child_folders
+
+        folder_ids = [parent_id] + [child_folder["Id"] for child_folder in child_folders]
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            presentations = executor.submit(self.mediasite.api_client.paginate_matching, "Presentations", "ParentFolderId", folder_ids,
+                                            "", 1000, workers, presentation_select)
+            schedules = executor.submit(self.mediasite.api_client.paginate_matching, "Schedules", "FolderId", folder_ids,
+                                        "", 1000, workers, schedule_select)
+
+            presentations = presentations.result()
+            schedules = schedules.result()
+
+        for result in (presentations, schedules):
+            if self.mediasite.experienced_request_errors(result):
+                return result
 
         return presentations, schedules
 
-    def get_folder_schedules(self, parent_id):
+    def get_folder_schedules(self, parent_id, select=None):
         """
         Gathers schedules found under mediasite folder given folder's id
         
         params:
             parent_id: id of mediasite folder
+            select: optional list of schedule properties to request, all properties if not provided
 
         returns:
-            details of schedules found within mediasite folder
+            list of schedules found within mediasite folder
 
         Note: this makes use of the "schedules" Mediasite API calls as no related "folders" call exists at this time.
         """
 
         logging.info("Finding Mediasite presentatations under parent: "+parent_id)
 
-        result = self.mediasite.api_client.request("get", "Schedules", "$top=100&$filter=FolderId eq '"+parent_id+"'","")
-        
-        if self.mediasite.experienced_request_errors(result):
-            return result
+        schedules = self.mediasite.api_client.paginate("Schedules", "$filter=FolderId eq '"+parent_id+"'", select=select)
+        result = list(schedules)
+
+        if self.mediasite.experienced_request_errors(schedules.error):
+            return schedules.error
         else:
             return result
 
-    def get_folder_presentations(self, parent_id):
+    def get_folder_presentations(self, parent_id, select=None):
         """
         Gathers presentations found under mediasite folder given folder's id
         
         params:
             parent_id: id of mediasite folder
+            select: optional list of presentation properties to request, all properties if not provided
 
         returns:
-            details of presentations found within mediasite folder
+            list of presentations found within mediasite folder
         """
 
         logging.info("Finding Mediasite presentatations under parent: "+parent_id)
 
-        result = self.mediasite.api_client.request("get", "Folders('"+parent_id+"')/Presentations", "$top=100","")
-        
-        if self.mediasite.experienced_request_errors(result):
-            return result
-        else:
+        presentations = self.mediasite.api_client.paginate("Folders('"+parent_id+"')/Presentations", select=select)
+        result = list(presentations)
 
+        if self.mediasite.experienced_request_errors(presentations.error):
+            return presentations.error
+        else:
             return result
 
-    def get_folder_catalogs(self, parent_id):
+    def get_folder_catalogs(self, parent_id, select=None):
         """
-        Gathers presentations found under mediasite folder given folder's id
+        Gathers catalogs linked to mediasite folder given folder's id
         
         params:
             parent_id: id of mediasite folder
+            select: optional list of catalog properties to request (must include LinkedFolderId), all properties if not provided
 
         returns:
-            details of presentations found within mediasite folder
+            list of catalogs linked to the mediasite folder
         """
 
         logging.info("Finding Mediasite catalogs under parent: "+parent_id)
 
-        result = self.mediasite.api_client.request("get", "Catalogs", "$top=600&$filter=LinkedFolderId eq '"+parent_id+"'","")
-        result_json = result.json()
+        #answer from the catalog index once it has been loaded
+        index = self.mediasite.model.get_catalog_index()
+        if index.loaded:
+            return index.get_by_linked_folder(parent_id)
+
+        catalogs = self.mediasite.api_client.paginate("Catalogs", "$filter=LinkedFolderId eq '"+parent_id+"'", select=select)
         result_list = []
-        for catalog in result_json["value"]:
+        for catalog in catalogs:
             if catalog["LinkedFolderId"] == parent_id:
                 result_list.append(catalog)
 
-        if self.mediasite.experienced_request_errors(result):
-            return result
+        if self.mediasite.experienced_request_errors(catalogs.error):
+            return catalogs.error
         else:
             return result_list
 
-    def get_child_folders(self, parent_id, child_result=[]):
+    def get_child_folders(self, parent_id, child_result=None, select=None, breadth_first=None):
         """
         Gathers mediasite child folders given parent id of a folder
         
         params:
             parent_id: id of mediasite folder
+            child_result: optional list the folders found are added to
+            select: optional list of folder properties to request (must include Id), all properties if not provided
+            breadth_first: walk the tree one level at a time (see get_child_folders_by_level), defaults to mediasite_breadth_first_folders
 
         returns:
             list of child folder id's associated with the given parent folder id
         """
 
+        if child_result is None:
+            child_result = []
+
+        if breadth_first is None:
+            breadth_first = self.mediasite.breadth_first_folders
+
         logging.info("Finding child Mediasite folders under parent: "+parent_id)
-  
-        result = self.mediasite.api_client.request("get", "Folders", "$top=100&$filter=ParentFolderId eq '"+parent_id+"' and Recycled eq false","")
-        
-        if self.mediasite.experienced_request_errors(result) or int(result.json()["odata.count"]) <= 0:
-            return result
+
+        index = self.get_index()
+        if index:
+            child_result.extend(index.get_descendants(parent_id))
+            return child_result
+
+        if breadth_first:
+            descendants = self.get_child_folders_by_level(parent_id, select)
+            if self.mediasite.experienced_request_errors(descendants):
+                return descendants
+
+            child_result.extend(descendants)
+            return child_result
+
+        folders = self.mediasite.api_client.paginate("Folders", "$filter=ParentFolderId eq '"+parent_id+"' and Recycled eq false", select=select)
+
+        #gather the full page listing before recursing so only one listing per level is held open
+        children = list(folders)
+
+        if self.mediasite.experienced_request_errors(folders.error):
+            return folders.error
         else:
-            for folder in result.json()["value"]:
+            for folder in children:
                 child_result.append(folder)
-                self.get_child_folders(folder["Id"], child_result)
+                self.get_child_folders(folder["Id"], child_result, select, False)
 
             return child_result
 
+    def get_child_folders_by_level(self, parent_id, select=None, workers=4, page_size=500):
+        """
+        Gathers mediasite child folders at every depth one level of the tree at a time. The children of
+        a whole level are requested with "ParentFolderId eq ... or ..." filters (split so each request url
+        stays short enough) sent concurrently, so the number of round trips grows with the depth of the
+        tree rather than the number of folders.
+
+        params:
+            parent_id: id of mediasite folder
+            select: optional list of folder properties to request (must include Id), all properties if not provided
+            workers: maximum number of listings requested at the same time
+            page_size: number of folders requested per page of each listing
+
+        returns:
+            list of child folders ordered by depth, or the request error
+        """
+
+        child_result = []
+        level = [parent_id]
+
+        while level:
+            children = self.mediasite.api_client.paginate_matching("Folders", "ParentFolderId", level, "Recycled eq false", page_size, workers, select)
+
+            if self.mediasite.experienced_request_errors(children):
+                return children
+
+            child_result.extend(children)
+            level = [folder["Id"] for folder in children]
+
+        return child_result
+
+    async def get_child_folders_async(self, parent_id):
+        """
+        Asyncio counterpart of get_child_folders. Sibling folders are walked concurrently.
+
+        params:
+            parent_id: id of mediasite folder
+
+        returns:
+            list of child folders (at every depth) associated with the given parent folder id
+        """
+
+        logging.info("Finding child Mediasite folders under parent: "+parent_id)
+
+        children = await self.mediasite.get_async_api_client().gather_pages("Folders", "$filter=ParentFolderId eq '"+parent_id+"' and Recycled eq false")
+
+        if self.mediasite.experienced_request_errors(children):
+            return children
+
+        descendants = await asyncio.gather(*[self.get_child_folders_async(folder["Id"]) for folder in children])
+
+        child_result = []
+        for folder, folder_descendants in zip(children, descendants):
+            if self.mediasite.experienced_request_errors(folder_descendants):
+                return folder_descendants
+            child_result.append(folder)
+            child_result.extend(folder_descendants)
+
+        return child_result
+
     def get_folder_by_name(self, folder_name):
         """
         Gathers folder information given folder name within mediasite
@@ -306,6 +538,11 @@ class folder():
 
         logging.info("Finding Mediasite folder information with name of: "+folder_name)
 
+        index = self.get_index()
+        if index:
+            matches = index.find_by_name(folder_name)
+            return {"odata.count":len(matches), "value":matches}
+
         result = self.mediasite.api_client.request("get", "Folders", "$filter=Name eq '"+folder_name+"' and Recycled eq false","").json()
         
         if self.mediasite.experienced_request_errors(result):
@@ -335,7 +572,36 @@ class folder():
         else:
             return result
 
-    def parse_and_create_folders(self, folders, parent_id=""):
+    def find_folder_id(self, folder_name, parent_id):
+        """
+        Finds the id of a mediasite folder based on provided name and parent folder ID
+
+        returns:
+            folder id, "" if there is no such folder or None if the search failed
+        """
+        result = self.find_folder_by_name_and_parent_id(folder_name, parent_id)
+
+        if type(result) is not dict or "odata.error" in result:
+            return None
+
+        if int(result["odata.count"]) > 0:
+            return result["value"][0]["Id"]
+
+        return ""
+
+    def create_path_cache(self):
+        """
+        Creates a path cache for use across the rows of one scheduling run
+
+        returns:
+            folder_paths.path_cache kept current as folders are created and deleted
+        """
+        cache = folder_paths.path_cache()
+        self.path_caches.add(cache)
+
+        return cache
+
+    def parse_and_create_folders(self, folders, parent_id="", path_cache=None):
         """
         Parse the provided path of folders in the GUI, delimeted by "/" and create each
         under the selected existing root folder within mediasite.
@@ -343,6 +609,7 @@ class folder():
         params:
             folders: string containing multiple folders split by "/"
             parent_id: mediasite parent folder ID for use as a reference point in this function
+            path_cache: optional path cache (see create_path_cache) shared by the rows of a run
 
         returns:
             final mediasite folder id (lowest level folder)
@@ -350,6 +617,13 @@ class folder():
         if parent_id == "":
             parent_id = self.mediasite.model.get_root_parent_folder_id()
 
+        if path_cache is not None:
+            def create(folder_name, parent_id):
+                result = self.create_new_folder(folder_name, parent_id)
+                return result.get("Id") if type(result) is dict else None
+
+            return path_cache.resolve(parent_id, folders, self.find_folder_id, create)
+
         folders_list = folders.split("/")
 
         #loop through our folders list creating each folder using the parent of the last
@@ -382,77 +656,62 @@ class folder():
             return result
 
         else:
+            #deleted folders (and everything below them) are moved to the recycle bin
+            if result.ok:
+                if self.mediasite.model.get_folder_index():
+                    self.mediasite.model.get_folder_index().remove(folder_id)
+
+                for cache in list(self.path_caches):
+                    cache.invalidate(folder_id)
+
             return result
 
-    def delete_folder_by_path(self, folder_path):
+    def delete_folder_by_path(self, folder_path, workers=8, progress_callback=None):
         """
         Deletes parent folder including potentially many child folder or sub-elements
         
         params:
             folder_path: mediasite management portal folder path, for ex "/Current/Spring 2018/Test"
+            workers: maximum number of delete requests in flight at the same time
+            progress_callback: optional callable(stats) called as each item is deleted (see deletion.progress.get_stats)
 
         returns:
-            response from mediasite system
+            counts of items deleted, errors and throughput (see deletion.progress.get_stats), or the request error
         """
 
         parent_id = ""
 
-        #for each folder found in provided path, find it by name and parent folder guid
-
-        for folder_name in folder_path.split("/")[1:]:
-            result = self.mediasite.folder.find_folder_by_name_and_parent_id(folder_name, parent_id)
-            if int(result["odata.count"]) > 0:
-                for item in result["value"]:
-                    if item["Name"] == folder_name:
-                        parent_id = item["Id"]
-            else:
-                #if we don't find one of the folders in the provided path, return to stop this function from continuing
-                logging.error("Unable to find folder in provided path: "+folder_name)
+        index = self.get_index()
+        if index:
+            parent_id = index.get_id_by_path(folder_path)
+            if parent_id is None:
+                logging.error("Unable to find folder in provided path: "+folder_path)
                 return
-        
-        #remove "recorded" presentations and schedules as these can prevent folders from being deleted
-        child_folders = self.mediasite.folder.get_child_folders(parent_id)
-        child_folders.append({"Id":parent_id})
-
-        #gather catalogs as these will be needed later
-        self.mediasite.catalog.get_all_catalogs()
-        catalogs = self.mediasite.model.get_catalogs()
-
-        for folder in child_folders:
-            folder_presentations = self.mediasite.folder.get_folder_presentations(folder["Id"])
-
-            #presentation loop to remove presentations with a status of "Recorded" or "Record"
-            folder_presentations_json = folder_presentations.json()
-            if int(folder_presentations_json["odata.count"]) > 0:
-                for presentation in folder_presentations_json["value"]:
-                    print(presentation["Status"])
-                    #if presentation["Status"] == "Recorded" or presentation["Status"] == "Record":
-                    logging.info("Deleting presentation "+presentation["Title"]+" to ensure capability to delete parent folder(s).")
-                    delete_result = self.mediasite.presentation.delete_presentation(presentation["Id"])
-            
-            #schedule loop to remove schedules
-            folder_schedules = self.mediasite.folder.get_folder_schedules(folder["Id"])
-            folder_schedules_json = folder_schedules.json()
-            if int(folder_schedules_json["odata.count"]) > 0:
-                for schedule in folder_schedules_json["value"]:
-                    logging.info("Deleting schedule "+ schedule["Name"]+" to ensure capability to delete parent folder(s).")
-                    delete_result = self.mediasite.schedule.delete_schedule(schedule["Id"])
-
-            for catalog in catalogs:
-                if catalog["LinkedFolderId"] == folder["Id"]:
-                    logging.info("Deleting catalog "+catalog["Id"]+" to ensure capability to delete parent folder(s).")
-                    self.mediasite.catalog.delete_catalog(catalog["Id"])
-
-            result = self.mediasite.folder.delete_folder(folder["Id"])
-            job_result = self.mediasite.wait_for_job_to_complete(result.json()["odata.id"])
-        
 
-        result = self.mediasite.folder.delete_folder(parent_id)
+        else:
+            #for each folder found in provided path, find it by name and parent folder guid
+            for folder_name in folder_path.split("/")[1:]:
+                result = self.mediasite.folder.find_folder_by_name_and_parent_id(folder_name, parent_id)
+                if int(result["odata.count"]) > 0:
+                    for item in result["value"]:
+                        if item["Name"] == folder_name:
+                            parent_id = item["Id"]
+                else:
+                    #if we don't find one of the folders in the provided path, return to stop this function from continuing
+                    logging.error("Unable to find folder in provided path: "+folder_name)
+                    return
+        
+        #remove presentations, schedules and catalogs concurrently, then the folders bottom-up
+        pipeline = deletion.delete_pipeline(self.mediasite, workers, progress_callback)
+        job_result = pipeline.run(parent_id)
 
-        job_result = self.mediasite.wait_for_job_to_complete(result.json()["odata.id"])
+        if self.mediasite.experienced_request_errors(job_result):
+            return job_result
 
         #note: this appears to be the only way with these particular jobs to determine a successful run (despite actual message contents)
-        if job_result:
+        if job_result and "odata.error" in job_result:
             if job_result["odata.error"]["message"]["value"] == "The job completion state is missing.":
                 logging.info("Successfully deleted folder(s) and related items. Note: folder and some items will remain in recycling bin until further action is taken.")
 
+        return pipeline.progress.get_stats()
+
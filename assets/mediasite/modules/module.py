@@ -13,16 +13,17 @@ class module():
     def __init__(self, controller, *args, **kwargs):
     	self.controller = controller
 
-    def create_module(self, module_name, module_id):
+    def create_module(self, module_name, module_id, batch=None):
         """
         Creates mediasite module using provided module name and module id
 
         params:
             module_name: name which will appear for the module
             module_id: moduleid associated with module in mediasite
+            batch: optional api_client batch to queue the request on instead of sending it
 
         returns:
-            resulting response from the mediasite web api request
+            resulting response from the mediasite web api request (or the queued batch operation)
         """
 
         logging.info("Creating module '"+module_name+"' with module id "+module_id)
@@ -31,6 +32,9 @@ class module():
                     "ModuleId":module_id
                     }
 
+        if batch is not None:
+            return batch.add("post", "Modules", "", post_data)
+
         result = self.controller.api_client.request("post", "Modules", "", post_data).json()
 
         if self.controller.experienced_request_errors(result):
@@ -8,39 +8,134 @@ License: MIT - see license.txt
 """
 
 import logging
+import assets.mediasite.entity_sync as entity_sync
 from urllib.parse import quote
 
 class presentation():
     def __init__(self, mediasite, *args, **kwargs):
         self.mediasite = mediasite
+        self.sync = None
 
-    def get_all_presentations(self):
+    def iterate_all_presentations(self, workers=1, ordered=True, select=None, stream=None, keyset=None):
+        """
+        Lazily iterates all presentations one page at a time, keeping memory bounded by page size.
+
+        params:
+            workers: number of pages to request concurrently (1 requests pages one after another)
+            ordered: when false, pages are yielded in the order they arrive (only used with workers > 1)
+            select: optional list of presentation properties to request, all properties if not provided
+            stream: decode pages while they are still arriving, defaults to the mediasite_stream_decoding setting
+            keyset: page in Id order by seeking past the last Id received rather than with $skip (pages are then
+                requested one after another), defaults to the mediasite_keyset_paging setting
+
+        returns:
+            pager which yields presentations and records any request error in its error attribute
+        """
+        logging.info("Iterating all presentations")
+
+        if stream is None:
+            stream = self.mediasite.stream_decoding
+
+        if keyset is None:
+            keyset = self.mediasite.keyset_paging
+
+        if keyset:
+            return self.mediasite.api_client.seek("Presentations", "Status eq 'Unavailable'", 1000, select=select, stream=stream)
+
+        if workers > 1:
+            return self.mediasite.api_client.scan("Presentations", "$filter=Status eq 'Unavailable'", 1000, workers, ordered, select=select, stream=stream)
+
+        return self.mediasite.api_client.paginate("Presentations", "$filter=Status eq 'Unavailable'", 1000, select=select, stream=stream)
+
+    def get_all_presentations(self, workers=1, ordered=True, select=None, stream=None, keyset=None):
         """
         Gathers a listing of all presentations.
 
+        params:
+            workers: number of pages to request concurrently (1 requests pages one after another)
+            ordered: when false, pages are gathered in the order they arrive (only used with workers > 1)
+            select: optional list of presentation properties to request, all properties if not provided
+            stream: decode pages while they are still arriving, defaults to the mediasite_stream_decoding setting
+            keyset: page by seeking past the last Id received rather than with $skip, defaults to the mediasite_keyset_paging setting
+
         returns:
-            resulting response from the mediasite web api request
+            list of presentations
         """
         logging.info("Getting a list of all presentations")
 
-        #request mediasite folder information on the "Mediasite Users" folder
+        presentations = self.iterate_all_presentations(workers, ordered, select, stream, keyset)
+        result_list = list(presentations)
+
+        if self.mediasite.experienced_request_errors(presentations.error):
+            return presentations.error
+        else:
+            return result_list
+
+    def get_presentation_sync(self):
+        """
+        Gathers the incremental presentation sync, restoring its store from the metadata cache on first use when one is configured
+
+        returns:
+            entity_sync.entity_sync of the presentations get_all_presentations lists
+        """
+        if self.sync is None:
+            self.sync = entity_sync.entity_sync("Presentations", "Status eq 'Unavailable'",
+                                                reconcile_interval=self.mediasite.config_data.get("mediasite_presentation_reconcile_interval", 86400))
+
+            if self.mediasite.metadata_cache is not None:
+                presentations, saved = self.mediasite.metadata_cache.load("Presentations")
+                if presentations is not None:
+                    self.sync.restore(presentations, self.mediasite.metadata_cache.get_value("presentations_reconciled", 0))
+
+        return self.sync
+
+    def sync_presentations(self, select=None, reconcile=False):
+        """
+        Brings the local presentation store up to date, requesting only presentations modified since the
+        last sync (after a first full crawl) and saving the store to the metadata cache when one is configured
+
+        params:
+            select: optional list of presentation properties to request (must include Id and LastModified)
+            reconcile: list the ids of all presentations first to find deleted ones (also done once mediasite_presentation_reconcile_interval has passed)
+
+        returns:
+            dictionary with the number of presentations fetched, skipped, removed and held in total (see entity_sync.sync)
+        """
+        sync = self.get_presentation_sync()
+
+        if reconcile:
+            removed = sync.reconcile(self.mediasite.api_client)
+            if self.mediasite.experienced_request_errors(removed):
+                return removed
+
+        result = sync.sync(self.mediasite.api_client, select=select)
+
+        if self.mediasite.experienced_request_errors(result):
+            return result
+
+        if reconcile:
+            result["removed"] += removed
+
+        if self.mediasite.metadata_cache is not None:
+            self.mediasite.metadata_cache.save("Presentations", sync.get_all())
+            #so the next process reconciles only once the interval has passed since this one did
+            self.mediasite.metadata_cache.set_value("presentations_reconciled", sync.reconciled)
+
+        return result
+
+    async def get_all_presentations_async(self, select=None):
+        """
+        Asyncio counterpart of get_all_presentations. All pages after the first are requested concurrently.
+
+        params:
+            select: optional list of presentation properties to request, all properties if not provided
+
+        returns:
+            list of presentations
+        """
+        logging.info("Getting a list of all presentations")
 
-        count = 0
-        current = 0
-        increment = 1000
-        maximum = 1000
-        result_list = []
-
-        while current < maximum:
-            result = self.mediasite.api_client.request("get", "Presentations", "$filter=Status eq 'Unavailable'&$skip="+str(increment*count)+"&$top="+str(increment)+"","")
-            result_json = result.json()
-            #print(result_json)
-            maximum = int(result_json["odata.count"])
-            current = increment*count
-            result_list += result_json["value"]
-            count += 1
-
-        return result_list
+        return await self.mediasite.get_async_api_client().gather_pages("Presentations", "$filter=Status eq 'Unavailable'", 1000, select=select)
 
     def get_presentations_by_name(self, name_search_query):
         """
@@ -8,15 +8,19 @@ License: MIT - see license.txt
 """
 
 import logging
+import asyncio
 
 class recorder():
     def __init__(self, mediasite, *args, **kwargs):
         self.mediasite = mediasite
 
-    def gather_recorders(self):
+    def gather_recorders(self, select=("Name", "Id")):
         """
         Gathers mediasite recorder name listing from mediasite system
 
+        params:
+            select: recorder properties to request, only those used for the listing by default
+
         returns:
             list of mediasite recorder names from mediasite system
         """
@@ -26,16 +30,40 @@ class recorder():
         logging.info("Gathering Mediasite recorders")
 
         #request mediasite recorder information from mediasite
-        result = self.mediasite.api_client.request("get", "Recorders", "$top=100", "")
-        
+        recorders = self.mediasite.api_client.paginate("Recorders", select=select)
+
+        #for each recorder in the result of the request append the name to the list
+        for recorder in recorders:
+            ms_recorders.append({"name":recorder["Name"],"id":recorder["Id"]})
+
+        if self.mediasite.experienced_request_errors(recorders.error):
+            return recorders.error
+        else:
+            #add the listing of recorder names to the model for later use
+            self.mediasite.model.set_recorders(ms_recorders)
+
+            return ms_recorders
+
+    async def gather_recorders_async(self, select=("Name", "Id")):
+        """
+        Asyncio counterpart of gather_recorders
+
+        params:
+            select: recorder properties to request, only those used for the listing by default
+
+        returns:
+            list of mediasite recorder names from mediasite system
+        """
+
+        logging.info("Gathering Mediasite recorders")
+
+        result = await self.mediasite.get_async_api_client().gather_pages("Recorders", "", select=select)
+
         if self.mediasite.experienced_request_errors(result):
             return result
-        else:       
-            #for each recorder in the result of the request append the name to the list
-            for recorder in result.json()["value"]:
-                ms_recorders.append({"name":recorder["Name"],"id":recorder["Id"]})
+        else:
+            ms_recorders = [{"name":recorder["Name"],"id":recorder["Id"]} for recorder in result]
 
-            #add the listing of recorder names to the model for later use
             self.mediasite.model.set_recorders(ms_recorders)
 
             return ms_recorders
@@ -61,26 +89,57 @@ class recorder():
             list of mediasite recorder status from mediasite system
         """
 
+        recorders = [recorder for recorder in self.mediasite.model.get_recorders() if recorder["name"] not in recorder_whitelist]
+
+        logging.info("Finding recorder status information for "+str(len(recorders))+" recorders")
+
+        #status for every recorder is requested concurrently
+        results = self.mediasite.api_client.request_many([("get", "Recorders('"+recorder["id"]+"')/Status", "", "")
+                                                        for recorder in recorders])
+
         result_list = []
+        for recorder, result in zip(recorders, results):
+            if self.mediasite.experienced_request_errors(result):
+                return result
+            result_json = result.json()
+            result_json["Name"] = recorder["name"]
+            result_list.append(result_json)
+
+        return result_list
+
+    async def gather_recorder_status_async(self, recorder_whitelist=[]):
+        """
+        Asyncio counterpart of gather_recorder_status. Status for every recorder is requested concurrently.
 
-        for recorder in self.mediasite.model.get_recorders():
-            if recorder["name"] in recorder_whitelist:
-                continue
+        returns:
+            list of mediasite recorder status from mediasite system
+        """
 
-            logging.info("Finding recorder status information for recorder: " + recorder["name"])
-            result = self.mediasite.api_client.request("get", "Recorders('"+recorder["id"]+"')/Status", "", "")
+        recorders = [recorder for recorder in self.mediasite.model.get_recorders() if recorder["name"] not in recorder_whitelist]
+
+        logging.info("Finding recorder status information for "+str(len(recorders))+" recorders")
+
+        async_api_client = self.mediasite.get_async_api_client()
+        results = await asyncio.gather(*[async_api_client.request("get", "Recorders('"+recorder["id"]+"')/Status", "", "")
+                                        for recorder in recorders])
+
+        result_list = []
+        for recorder, result in zip(recorders, results):
+            if self.mediasite.experienced_request_errors(result):
+                return result
             result_json = result.json()
             result_json["Name"] = recorder["name"]
             result_list.append(result_json)
 
         return result_list
 
-    def gather_recorder_scheduled_recordings(self, recorder_id):
+    def gather_recorder_scheduled_recordings(self, recorder_id, select=None):
         """
         Gathers scheduled recordings for recorder based on provided recorder guid
 
         params:
             recorder_id: guid of a mediasite recorder
+            select: optional list of scheduled recording properties to request, all properties if not provided
 
         returns:
             list of scheduled recordings associated with the recorder
@@ -88,16 +147,12 @@ class recorder():
 
         logging.info("Gathering schedules for recorder: "+recorder_id)
 
-        #make the mediasite request using the post data found above to create the folder
-        result = self.mediasite.api_client.request("get", "Recorders('"+recorder_id+"')/ScheduledRecordingTimes", "$top=100", "").json()
+        recordings = self.mediasite.api_client.paginate("Recorders('"+recorder_id+"')/ScheduledRecordingTimes", select=select)
+        result = list(recordings)
 
-        if self.mediasite.experienced_request_errors(result):
-            return result
+        if self.mediasite.experienced_request_errors(recordings.error):
+            return recordings.error
         else:
-            #if there is an error, log it
-            if "odata.error" in result:
-                logging.error(result["odata.error"]["code"]+": "+result["odata.error"]["message"]["value"])
-
             return result
 
         
@@ -108,37 +163,63 @@ class recorder():
         Gathers scheduled recordings for all recorders
 
         returns:
-            dictionary organized by recorder with scheduled recordings
+            dictionary organized by recorder with scheduled recordings, or an "Error: ..." string if the recordings
+            of any recorder or the name of any schedule could not be gathered
         """
 
-        self.mediasite.recorder.gather_recorders()
+        result = self.mediasite.recorder.gather_recorders()
+
+        if self.mediasite.experienced_request_errors(result):
+            return result
 
         recorders = self.mediasite.model.get_recorders()
 
         #initialize our return dictionary
         recorder_recordings = []
 
-        #loop for each recorder in recorders listing
+        #gather scheduled recordings by recorder
+        recorder_scheduled_recordings = []
         for recorder in recorders:
-
-            #gather scheduled recordings by recorder
             scheduled_recordings = self.mediasite.recorder.gather_recorder_scheduled_recordings(recorder["id"])
 
-            #initialize schedule id, name, and recorder_recordings list
-            schedule_id = ""
-            schedule_name = ""
-            
+            #leaving the recorder out would return a listing which looks complete
+            if self.mediasite.experienced_request_errors(scheduled_recordings):
+                return scheduled_recordings
+
+            recorder_scheduled_recordings.append((recorder, scheduled_recordings))
+
+        #gather the name of each schedule once, requesting them concurrently
+        schedule_ids = list(dict.fromkeys(recording["ScheduleId"] for recorder, scheduled_recordings in recorder_scheduled_recordings
+                                        for recording in scheduled_recordings))
+
+        logging.info("Getting "+str(len(schedule_ids))+" Mediasite schedules")
+
+        schedule_results = self.mediasite.api_client.request_many([("get", "Schedules('"+schedule_id+"')", "", "") for schedule_id in schedule_ids])
+
+        schedule_names = {}
+        for schedule_id, schedule_result in zip(schedule_ids, schedule_results):
+            if self.mediasite.experienced_request_errors(schedule_result):
+                return schedule_result
+
+            schedule = schedule_result.json()
+
+            #a missing schedule (404) comes back as an odata.error body rather than an "Error: ..." string
+            if "odata.error" in schedule:
+                error = "Error: unable to get schedule "+schedule_id+": "+schedule["odata.error"]["code"]+": "+schedule["odata.error"]["message"]["value"]
+                logging.error(error)
+                return error
+
+            schedule_names[schedule_id] = schedule["Name"]
+
+        #loop for each recorder and its scheduled recordings
+        for recorder, scheduled_recordings in recorder_scheduled_recordings:
+
             #loop for each recording in scheduled_recordings
-            for recording in scheduled_recordings["value"]:
-                
-                #determine if we already have the schedule_id and name, if not, gathering it.
-                if schedule_id != recording["ScheduleId"]:
-                    schedule_id = recording["ScheduleId"]
-                    schedule_result = self.mediasite.schedule.get_schedule(schedule_id)
-                    schedule_name = schedule_result["Name"]
+            for recording in scheduled_recordings:
+                schedule_id = recording["ScheduleId"]
 
                 #create dictionary containing the scheduled recording's information
-                recording_dict = {"title":schedule_name,
+                recording_dict = {"title":schedule_names[schedule_id],
                                     "location":recorder["name"],
                                     "cancelled":recording["IsExcluded"],
                                     "id":schedule_id,
@@ -480,16 +480,17 @@ class report():
 
             return result
 
-    def create_catalog_report(self, report_name, catalog_id):
+    def create_catalog_report(self, report_name, catalog_id, batch=None):
         """
         Create a Mediasite catalog report to analyze presentations in given catalog by id
 
         params:
             report_name: name of presentation report
             catalog_id: Mediasite guid of the catalog which will be associated with catalog report
+            batch: optional api_client batch to queue the request on instead of sending it
 
         returns:
-            result from mediasite api request to create catalog report
+            result from mediasite api request to create catalog report (or the queued batch operation)
         """       
 
         logging.info("Creating catalog report "+report_name+" for catalog "+catalog_id)
@@ -499,6 +500,9 @@ class report():
                     "IncludeItemsWithZeroViews":True
                     }
 
+        if batch is not None:
+            return batch.add("post", "CatalogReports", "", post_data)
+
         #make the mediasite request using the post data found above to create the folder
         result = self.mediasite.api_client.request("post", "CatalogReports", "", post_data).json()
 
@@ -8,6 +8,7 @@ License: MIT - see license.txt
 """
 
 import os
+import getpass
 import logging
 import time
 import datetime
@@ -20,12 +21,13 @@ class schedule():
     def __init__(self, mediasite, *args, **kwargs):
         self.mediasite = mediasite
 
-    def create_schedule(self, schedule_data):
+    def create_schedule(self, schedule_data, batch=None):
         """
         Creates mediasite schedule using provided schedule data
 
         params:
             schedule_data: dictionary containing various necessary data for creating mediasite scheduling
+            batch: optional api_client batch to queue the request on instead of sending it
 
         Expects schedule_data to contain the following keys:
         schedule_data = {
@@ -67,7 +69,7 @@ class schedule():
             }
 
         returns:
-            resulting response from the mediasite web api request
+            resulting response from the mediasite web api request (or the queued batch operation)
         """
 
         logging.info("Creating schedule '"+schedule_data["schedule_name"])
@@ -91,10 +93,13 @@ class schedule():
                     "AutoStop":"True",
                     "AdvanceCreationTime":7200,
                     "NotifyPresenter":"False",
-                    "Description":"Scheduled by "+ os.getlogin() + " on " + current_datetime_string + " using Mediasite Scheduler",
+                    "Description":"Scheduled by "+ self.get_login() + " on " + current_datetime_string + " using Mediasite Scheduler",
                     "DeleteInactive":schedule_data["schedule_auto_delete"]
                     }
 
+        if batch is not None:
+            return batch.add("post", "Schedules", "", post_data)
+
         result = self.mediasite.api_client.request("post", "Schedules", "", post_data).json()
         
         if self.mediasite.experienced_request_errors(result):
@@ -222,39 +227,100 @@ class schedule():
         else:
             return False
 
-    def create_recurrence(self, schedule_data, schedule_result):
+    def get_login(self):
+        """
+        Finds the name of the user scheduling, as recorded within schedule descriptions
+
+        returns:
+            login name of the user, or the name of the effective user when there is no controlling terminal (for ex. cron jobs)
+        """
+        try:
+            return os.getlogin()
+        except OSError:
+            return getpass.getuser()
+
+    def create_recurrence(self, schedule_data, schedule_result, batch=None):
         """
         Creates Mediasite schedule recurrence. Specifically, this is the datetimes which a recording schedule
         will produce presentations with.
 
+        Note: when the controller has batch requests enabled, multiple recurrences are sent together
+        within OData $batch requests rather than one request each.
+
         params:
             schedule_data: dictionary containing various necessary data for creating mediasite scheduling
             schedule_result: data provided from Mediasite after a schedule is produced
+            batch: optional api_client batch to queue the requests on instead of sending them
 
         returns:
-            resulting response from the mediasite web api request
+            for a one-time recurrence the request error if it failed, otherwise None (an empty string for weekly
+            recurrences), or the list of queued batch operations when batch is given
         """
         logging.info("Creating schedule recurrence(s) for '"+schedule_data["schedule_name"])
 
+        resource = "Schedules('"+schedule_result["Id"]+"')/Recurrences"
+        post_data_list = self.get_recurrence_post_data_list(schedule_data, schedule_result)
+
+        if batch is not None:
+            return [batch.add("post", resource, "", post_data) for post_data in post_data_list]
+
+        if self.mediasite.batch_requests and len(post_data_list) > 1:
+            recurrence_batch = self.mediasite.api_client.batch()
+            for post_data in post_data_list:
+                recurrence_batch.add("post", resource, "", post_data)
+            results = recurrence_batch.execute()
+        else:
+            results = [self.mediasite.api_client.request("post", resource, "", post_data) for post_data in post_data_list]
+
+        results = [self.record_recurrence_result(result) for result in results]
+
+        #keep the results callers have always received: the error of a failed one-time recurrence, nothing otherwise
+        if self.mediasite.model.translate_schedule_recurrence_pattern(schedule_data["schedule_recurrence"]) == "None":
+            return next((result for result in results if type(result) is str), None)
+
+        return ""
+
+    def record_recurrence_result(self, result):
+        """
+        Checks the response of a recurrence creation request and adds the recurrence to the model
+
+        params:
+            result: response (or batch response) from the mediasite web api request
+
+        returns:
+            resulting recurrence from the mediasite web api request
+        """
+        if self.mediasite.experienced_request_errors(result):
+            return result
+
+        result = result.json()
+
+        if "odata.error" in result:
+            logging.error(result["odata.error"]["code"]+": "+result["odata.error"]["message"]["value"])
+        else:
+            self.mediasite.model.add_recurrence(result)
+
+        return result
+
+    def get_recurrence_post_data_list(self, schedule_data, schedule_result):
+        """
+        Creates the post data needed for each recurrence of a Mediasite schedule
+
+        params:
+            schedule_data: dictionary containing various necessary data for creating mediasite scheduling
+            schedule_result: data provided from Mediasite after a schedule is produced
+
+        returns:
+            list of post data dictionaries, one for each recurrence request
+        """
+
         #convert duration minutes to milliseconds as required by Mediasite system
         recurrence_duration = int(schedule_data["schedule_duration"])*60*1000
 
         #translate various values gathered from the UI to Mediasite-friendly conventions
         recurrence_type = self.mediasite.model.translate_schedule_recurrence_pattern(schedule_data["schedule_recurrence"])
 
-        #creates a recurrence using post_data created below
-        def request_create_recurrence(post_data):
-            result = self.mediasite.api_client.request("post", "Schedules('"+schedule_result["Id"]+"')/Recurrences", "", post_data).json()
-
-            if self.mediasite.experienced_request_errors(result):
-                return result
-            else:
-                if "odata.error" in result:
-                    logging.error(result["odata.error"]["code"]+": "+result["odata.error"]["message"]["value"])
-                else:
-                    self.mediasite.model.add_recurrence(result)
-
-        result = ""
+        post_data_list = []
 
         #for one-time recurrence creation
         if recurrence_type == "None":
@@ -267,7 +333,7 @@ class schedule():
                 "DaysOfTheWeek":self.translate_schedule_days_of_week(schedule_data)
                 }
 
-            result = request_create_recurrence(post_data)
+            post_data_list.append(post_data)
 
         elif recurrence_type == "Weekly":
             #for weekly recurrence creation
@@ -314,11 +380,9 @@ class schedule():
                             "RecurrencePattern":"None",
                             }
                 
-                request_create_recurrence(post_data)
+                post_data_list.append(post_data)
 
-            return result
-
-        return result
+        return post_data_list
 
     def gather_recurrences(self, schedule_id):
         """
@@ -351,8 +415,17 @@ class schedule():
             output indicating which rows of scheduling information were successfully scheduled
         """
 
+        #pack the requests of all rows into shared $batch requests when enabled
+        if self.mediasite.batch_requests:
+            schedule_data_list = [self.gather_import_schedule_data(row) for row in batch_scheduling_data]
+            with self.mediasite.operation("schedule_rows_batched"):
+                return self.mediasite.process_scheduling_data_rows_batched(schedule_data_list)
+
         result_list = []
 
+        #folders shared between rows are looked up (or created) once per run
+        path_cache = self.mediasite.folder.create_path_cache()
+
         #parse each row of scheduling data
         for row in batch_scheduling_data:
 
@@ -360,7 +433,8 @@ class schedule():
             schedule_data = self.gather_import_schedule_data(row)
 
             #perform mediasite-specific work using schedule_data for row
-            row_result = self.mediasite.process_scheduling_data_row(schedule_data)
+            with self.mediasite.operation("schedule_row"):
+                row_result = self.mediasite.process_scheduling_data_row(schedule_data, path_cache)
 
             #append results to the overall list
             result_list.append(row_result)
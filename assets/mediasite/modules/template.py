@@ -14,10 +14,13 @@ class template():
     def __init__(self, mediasite, *args, **kwargs):
         self.mediasite = mediasite
 
-    def gather_templates(self):
+    def gather_templates(self, select=None):
         """
         Gathers mediasite template name listing from mediasite system
 
+        params:
+            select: optional list of template properties to request, all properties if not provided
+
         returns:
             list of mediasite template names from mediasite system
         """
@@ -27,15 +30,15 @@ class template():
         logging.info("Gathering Mediasite templates")
 
         #request mediasite template information from mediasite
-        result = self.mediasite.api_client.request("get", "Templates", "$top=200", "")
-        
-        if self.mediasite.experienced_request_errors(result):
-            return result
+        templates = self.mediasite.api_client.paginate("Templates", select=select)
+
+        #for each template in the result of the request append the name to the list
+        for template in templates:
+            mediasite_templates.append(template)
+
+        if self.mediasite.experienced_request_errors(templates.error):
+            return templates.error
         else:
-            #for each template in the result of the request append the name to the list
-            for template in result.json()["value"]:
-                mediasite_templates.append(template)
-            
             #add the listing of template names to the model for later use
             self.mediasite.model.set_templates(mediasite_templates)
             return mediasite_templates
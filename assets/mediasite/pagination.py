@@ -0,0 +1,425 @@
+"""
+Paging helpers for walking Mediasite API (OData) collections
+
+License: MIT - see license.txt
+"""
+
+import logging
+import urllib3
+import requests
+import assets.mediasite.json_stream as json_stream
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+#errors raised when the connection drops while a streamed page body is still arriving (urllib3's
+#come from reading response.raw directly, as the ijson backend does)
+STREAM_ERRORS = (requests.exceptions.RequestException, urllib3.exceptions.HTTPError)
+
+class pager():
+    def __init__(self, api_client, resource, odata_attributes="", page_size=100, stream=False):
+        """
+        Lazily iterates every entity of a Mediasite API collection one page at a time. Follows
+        odata.nextLink when the server provides one and otherwise advances $skip until odata.count
+        is reached, so only one page is held in memory at a time.
+
+        params:
+            api_client: mediasite api client used to make requests
+            resource: collection within the API to page through, for ex. "Folders"
+            odata_attributes: additional odata attributes such as a $filter (without $top or $skip)
+            page_size: number of entities to request per page
+            stream: when true each page is decoded while it is still arriving rather than after it is read whole
+
+        Note: after iterating, error holds an "Error: ..." string if a page could not be gathered,
+        count holds the odata.count reported by the server and pages the number of pages requested.
+        """
+        self.api_client = api_client
+        self.resource = resource
+        self.odata_attributes = odata_attributes
+        self.page_size = page_size
+        self.stream = stream
+        self.count = None
+        self.pages = 0
+        self.error = None
+
+    def get_page_attributes(self, skip, top=None):
+        """
+        Creates odata attributes for requesting one page of the collection
+
+        params:
+            skip: number of entities to skip before the page begins
+            top: number of entities to request, defaults to the page size
+
+        returns:
+            odata attribute string including $top and $skip
+        """
+        prefix = self.odata_attributes + "&" if self.odata_attributes else ""
+        return prefix + "$top=" + str(top or self.page_size) + "&$skip=" + str(skip)
+
+    def split_next_link(self, next_link):
+        """
+        Splits an odata.nextLink (relative or absolute) into a resource and odata attributes
+        relative to the client service root
+
+        params:
+            next_link: odata.nextLink value provided by the server
+
+        returns:
+            tuple of resource and odata attribute strings
+        """
+        link = urlparse(next_link)
+        path = link.path
+        root_path = urlparse(self.api_client.serviceroot).path
+
+        if link.scheme and path.lower().startswith(root_path.lower()):
+            path = path[len(root_path):]
+
+        return path, link.query
+
+    def set_error(self, error, errors=None):
+        if errors is None:
+            self.error = error
+        else:
+            errors.append(error)
+
+    def get_page(self, resource, odata_attributes, errors=None):
+        """
+        Requests one page of the collection
+
+        params:
+            resource: resource to request, the collection or the path of an odata.nextLink
+            odata_attributes: odata attributes of the page
+            errors: optional list errors are appended to rather than set in error, for pages requested by worker threads
+
+        returns:
+            tuple of the page properties other than value (odata.count, odata.nextLink, etc.) and an
+            iterable of its entities, or None if the page could not be gathered (see error). Streamed
+            pages fill in their properties as their entities are iterated.
+        """
+        if self.stream:
+            result = self.api_client.request("get", resource, odata_attributes, "", stream=True)
+        else:
+            result = self.api_client.request("get", resource, odata_attributes, "")
+
+        if type(result) is str:
+            self.set_error(result, errors)
+            return None
+
+        if self.stream:
+            page = json_stream.streamed_page(result)
+            return page.metadata, self.iter_streamed_page(page, resource, errors)
+
+        try:
+            result_json = json_stream.loads(result.content)
+        except ValueError as e:
+            self.set_error("Error: unable to decode "+resource+" page: "+str(e), errors)
+            return None
+
+        if "odata.error" in result_json:
+            self.set_error(self.get_odata_error(result_json), errors)
+            return None
+
+        value = result_json.pop("value", [])
+        return result_json, value
+
+    def iter_streamed_page(self, page, resource, errors=None):
+        """
+        Yields the entities of a streamed page, recording decoding, connection and odata errors in error (or errors)
+        """
+        try:
+            yield from page
+        except json_stream.DECODE_ERRORS as e:
+            self.set_error("Error: unable to decode "+resource+" page: "+str(e), errors)
+            return
+        except STREAM_ERRORS as e:
+            self.set_error("Error: connection lost while reading "+resource+" page: "+str(e), errors)
+            return
+
+        if "odata.error" in page:
+            self.set_error(self.get_odata_error(page.metadata), errors)
+
+    def get_odata_error(self, page):
+        return "Error: "+page["odata.error"]["code"]+": "+page["odata.error"]["message"]["value"]
+
+    def __iter__(self):
+        self.count = None
+        self.pages = 0
+        self.error = None
+
+        yield from self.iter_sequential(self.get_page(self.resource, self.get_page_attributes(0)))
+
+    def iter_sequential(self, page):
+        """
+        Yields the entities of the first page, already requested, and of every page after it one page at a time
+
+        params:
+            page: result of get_page for the first page of the collection
+        """
+        skip = 0
+
+        while True:
+            if page is None:
+                logging.error(self.error)
+                return
+
+            self.pages += 1
+            metadata, value = page
+            page = None
+            received = 0
+
+            for entity in value:
+                received += 1
+                yield entity
+
+            if self.error:
+                logging.error(self.error)
+                return
+
+            if "odata.count" in metadata:
+                self.count = int(metadata["odata.count"])
+
+            next_link = metadata.get("odata.nextLink")
+
+            if next_link:
+                resource, odata_attributes = self.split_next_link(next_link)
+            else:
+                #servers may cap page sizes below what was requested, so advance by what was received
+                skip += received
+
+                if received == 0:
+                    return
+                if self.count is not None and skip >= self.count:
+                    return
+                if self.count is None and received < self.page_size:
+                    return
+
+                resource = self.resource
+                odata_attributes = self.get_page_attributes(skip)
+
+            page = self.get_page(resource, odata_attributes)
+
+class parallel_pager(pager):
+    def __init__(self, api_client, resource, odata_attributes="", page_size=100, workers=4, ordered=True, stream=False):
+        """
+        Iterates every entity of a Mediasite API collection, reading odata.count from the first page
+        and then requesting the remaining $skip windows concurrently. At most two windows per worker
+        are requested ahead of the consumer so memory stays bounded.
+
+        params:
+            api_client: mediasite api client used to make requests (must be safe to share between threads)
+            resource: collection within the API to page through, for ex. "Presentations"
+            odata_attributes: additional odata attributes such as a $filter (without $top or $skip)
+            page_size: number of entities to request per page
+            workers: maximum number of pages requested at the same time
+            ordered: when true entities are yielded in collection order, otherwise pages are yielded as they arrive
+            stream: when true each window is decoded while it is still arriving rather than after it is read whole
+        """
+        super().__init__(api_client, resource, odata_attributes, page_size, stream)
+        self.workers = workers
+        self.ordered = ordered
+
+    def get_window(self, skip, top):
+        """
+        Requests one $skip window of the collection (called from worker threads, which leave error
+        to the consumer so each failure is reported by the window it belongs to)
+
+        returns:
+            tuple of the list of entities in the window and None, or None and the "Error: ..." string of the window
+        """
+        errors = []
+        page = self.get_page(self.resource, self.get_page_attributes(skip, top), errors)
+
+        value = list(page[1]) if page is not None else None
+        return (None, errors[0]) if errors else (value, None)
+
+    def __iter__(self):
+        self.count = None
+        self.pages = 0
+        self.error = None
+
+        first = self.get_page(self.resource, self.get_page_attributes(0))
+
+        if first is not None:
+            metadata, value = first
+            value = list(value)
+            first = None
+
+        if self.error:
+            logging.error(self.error)
+            return
+
+        #without a count the windows cannot be planned up front, so continue sequential paging from the first page
+        if "odata.count" not in metadata or "odata.nextLink" in metadata:
+            yield from self.iter_sequential((metadata, value))
+            return
+
+        self.pages = 1
+        self.count = int(metadata["odata.count"])
+
+        #servers may cap page sizes below what was requested, so size the windows by what was received
+        step = min(self.page_size, len(value)) if value else self.page_size
+
+        for entity in value:
+            yield entity
+
+        if not value:
+            return
+
+        skips = iter(range(step, self.count, step))
+        pending = deque()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+
+            def submit_next():
+                skip = next(skips, None)
+                if skip is not None:
+                    pending.append(executor.submit(self.get_window, skip, step))
+
+            for i in range(self.workers * 2):
+                submit_next()
+
+            try:
+                while pending:
+                    if self.ordered:
+                        done = [pending.popleft()]
+                    else:
+                        done, not_done = wait(pending, return_when=FIRST_COMPLETED)
+                        pending = deque(not_done)
+
+                    for future in done:
+                        value, error = future.result()
+
+                        if error:
+                            self.error = error
+                            logging.error(self.error)
+                            return
+
+                        submit_next()
+                        self.pages += 1
+
+                        for entity in value:
+                            yield entity
+
+            finally:
+                #stop outstanding windows if the consumer stopped early or a window failed
+                for future in pending:
+                    future.cancel()
+
+class keyset_pager(pager):
+    def __init__(self, api_client, resource, conditions="", odata_attributes="", page_size=100, key="Id", stream=False, key_types=None):
+        """
+        Iterates every entity of a Mediasite API collection in order of a unique key, requesting each
+        page with a "key gt 'last key seen'" filter rather than a growing $skip. The server can then
+        seek to each page instead of skipping over every entity before it, so deep pages of large
+        collections cost no more than the first. An entity modified during the walk does not shift any
+        other entity onto a page already read, even when it is ordered by its modified time.
+
+        params:
+            api_client: mediasite api client used to make requests
+            resource: collection within the API to page through, for ex. "Presentations"
+            conditions: optional $filter expression every entity must also satisfy, for ex. "Status eq 'Unavailable'"
+            odata_attributes: additional odata attributes such as a $select (without $filter, $orderby, $top or $skip, any $select must include the key)
+            page_size: number of entities to request per page
+            key: unique, sortable property entities are ordered and sought by, or a tuple of properties
+                which are unique together, for ex. ("LastModified", "Id")
+            stream: when true each page is decoded while it is still arriving rather than after it is read whole
+            key_types: optional dictionary of key property to its odata type when not a string or number, for ex. {"LastModified":"datetime"}
+        """
+        super().__init__(api_client, resource, odata_attributes, page_size, stream)
+        self.conditions = conditions
+        self.key = key
+        self.keys = key if isinstance(key, tuple) else (key,)
+        self.key_types = key_types or {}
+
+    def get_key_literal(self, key, value):
+        """
+        returns:
+            odata literal for a value of a key property
+        """
+        if self.key_types.get(key) == "datetime":
+            return "datetime'" + value.rstrip("Z") + "'"
+
+        return "'" + value.replace("'", "''") + "'" if isinstance(value, str) else str(value)
+
+    def get_last_key(self, entity):
+        return tuple(entity[key] for key in self.keys) if isinstance(self.key, tuple) else entity[self.key]
+
+    def get_seek_expression(self, last_key):
+        """
+        Creates the $filter expression selecting entities ordered after a key, for ex.
+        "(LastModified gt datetime'...' or (LastModified eq datetime'...' and Id gt '...'))" for a tuple of keys
+
+        params:
+            last_key: key of the last entity already received (a tuple of values for a tuple of keys)
+        """
+        values = last_key if isinstance(self.key, tuple) else (last_key,)
+        literals = [self.get_key_literal(key, value) for key, value in zip(self.keys, values)]
+        alternatives = []
+
+        for i, key in enumerate(self.keys):
+            equal = [self.keys[j] + " eq " + literals[j] for j in range(i)]
+            expression = " and ".join(equal + [key + " gt " + literals[i]])
+            alternatives.append("(" + expression + ")" if equal else expression)
+
+        return "(" + " or ".join(alternatives) + ")" if len(alternatives) > 1 else alternatives[0]
+
+    def get_keyset_attributes(self, last_key=None):
+        """
+        Creates odata attributes for requesting the page after an entity
+
+        params:
+            last_key: key of the last entity already received, None for the first page
+
+        returns:
+            odata attribute string including the keyset $filter, $orderby and $top
+        """
+        expressions = ["(" + self.conditions + ")"] if self.conditions else []
+        attributes = [self.odata_attributes] if self.odata_attributes else []
+
+        if last_key is not None:
+            expressions.append(self.get_seek_expression(last_key))
+
+        if expressions:
+            attributes.append("$filter=" + " and ".join(expressions))
+
+        return "&".join(attributes + ["$orderby=" + ",".join(self.keys), "$top=" + str(self.page_size)])
+
+    def __iter__(self):
+        self.count = None
+        self.pages = 0
+        self.error = None
+
+        last_key = None
+
+        while True:
+            page = self.get_page(self.resource, self.get_keyset_attributes(last_key))
+
+            if page is None:
+                logging.error(self.error)
+                return
+
+            self.pages += 1
+            metadata, value = page
+            page = None
+            received = 0
+
+            for entity in value:
+                received += 1
+                last_key = self.get_last_key(entity)
+                yield entity
+
+            if self.error:
+                logging.error(self.error)
+                return
+
+            #odata.count is the number of entities after the last key, which the first page gives for the whole collection
+            remaining = int(metadata["odata.count"]) if "odata.count" in metadata else None
+            if self.count is None:
+                self.count = remaining
+
+            if received == 0:
+                return
+            if remaining is not None and received >= remaining:
+                return
+            if remaining is None and received < self.page_size:
+                return
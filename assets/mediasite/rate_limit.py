@@ -0,0 +1,181 @@
+"""
+Client-side token bucket rate limiting for Mediasite API requests
+
+License: MIT - see license.txt
+"""
+
+import time
+import json
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+class token_bucket():
+    def __init__(self, rate, capacity=None):
+        """
+        Thread-safe token bucket. Tokens refill continuously at rate per second up to capacity,
+        and each request takes one token, waiting for a refill when the bucket is empty.
+
+        params:
+            rate: tokens (requests) added per second
+            capacity: maximum tokens held at once (burst size), defaults to one second of tokens
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity else max(rate, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self, tokens=1):
+        """
+        Attempts to take tokens from the bucket without waiting
+
+        returns:
+            0 if the tokens were taken, otherwise seconds until enough tokens will be available
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0
+
+            return (tokens - self.tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        """
+        Takes tokens from the bucket, waiting until they are available
+
+        returns:
+            seconds spent waiting
+        """
+        waited = 0
+
+        while True:
+            delay = self.take(tokens)
+            if delay <= 0:
+                return waited
+
+            time.sleep(delay)
+            waited += delay
+
+class shared_token_bucket(token_bucket):
+    def __init__(self, rate, capacity=None, state_path=""):
+        """
+        Token bucket whose budget is shared by every thread and process using the same state file.
+        The file holds the current tokens and last refill time and is locked while it is updated.
+
+        params:
+            rate: tokens (requests) added per second
+            capacity: maximum tokens held at once (burst size), defaults to one second of tokens
+            state_path: path of the file holding the shared bucket state
+        """
+        super().__init__(rate, capacity)
+        self.state_path = state_path
+
+    def lock_file(self, handle):
+        if fcntl:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+
+    def unlock_file(self, handle):
+        if fcntl:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def take(self, tokens=1):
+        with self.lock, open(self.state_path, "a+") as handle:
+            self.lock_file(handle)
+
+            try:
+                handle.seek(0)
+                content = handle.read()
+
+                #wall clock time is used as monotonic clocks are not comparable between processes
+                now = time.time()
+                state = json.loads(content) if content else {"tokens":self.capacity, "updated":now}
+                available = min(self.capacity, state["tokens"] + max(now - state["updated"], 0) * self.rate)
+
+                if available >= tokens:
+                    available -= tokens
+                    delay = 0
+                else:
+                    delay = (tokens - available) / self.rate
+
+                handle.seek(0)
+                handle.truncate()
+                handle.write(json.dumps({"tokens":available, "updated":now}))
+                handle.flush()
+
+            finally:
+                self.unlock_file(handle)
+
+        return delay
+
+class rate_limiter():
+    def __init__(self, read_rate=None, write_rate=None, read_burst=None, write_burst=None, state_path=None):
+        """
+        Applies separate token buckets to reads (GET, HEAD, OPTIONS) and writes (everything else)
+
+        params:
+            read_rate: read requests per second, unlimited if not provided
+            write_rate: write requests per second, unlimited if not provided
+            read_burst: maximum read requests sent at once after an idle period
+            write_burst: maximum write requests sent at once after an idle period
+            state_path: optional file path prefix used to share budgets between processes
+                        (".read" and ".write" are appended for each bucket)
+        """
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.stats = {}
+
+        for method_class, rate, burst in (("read", read_rate, read_burst), ("write", write_rate, write_burst)):
+            if not rate:
+                continue
+
+            if state_path:
+                self.buckets[method_class] = shared_token_bucket(rate, burst, state_path + "." + method_class)
+            else:
+                self.buckets[method_class] = token_bucket(rate, burst)
+
+            self.stats[method_class] = {"requests":0, "waits":0, "wait_seconds":0.0}
+
+    def get_method_class(self, method):
+        return "read" if method.lower() in ("get", "head", "options") else "write"
+
+    def acquire(self, method):
+        """
+        Waits until a request of the given http method is allowed by its bucket
+
+        returns:
+            seconds spent waiting
+        """
+        method_class = self.get_method_class(method)
+
+        if method_class not in self.buckets:
+            return 0
+
+        waited = self.buckets[method_class].acquire()
+
+        with self.lock:
+            stats = self.stats[method_class]
+            stats["requests"] += 1
+            if waited > 0:
+                stats["waits"] += 1
+                stats["wait_seconds"] += waited
+
+        return waited
+
+    def get_stats(self):
+        with self.lock:
+            return {method_class:dict(stats) for method_class, stats in self.stats.items()}
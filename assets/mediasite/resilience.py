@@ -0,0 +1,191 @@
+"""
+Retry and circuit breaker policies for Mediasite API requests
+
+License: MIT - see license.txt
+"""
+
+import time
+import random
+import logging
+import datetime
+import threading
+from email.utils import parsedate_to_datetime
+import requests
+
+class circuit_open_error(requests.exceptions.RequestException):
+    """
+    Raised instead of sending a request while the circuit breaker is open
+    """
+
+class retry_policy():
+    def __init__(self, max_retries=3, backoff_base=0.5, backoff_max=30, retry_statuses=(429, 502, 503, 504),
+                    retry_methods=("get", "head", "options", "put", "delete"), respect_retry_after=True, max_retry_after=120):
+        """
+        Decides whether (and after how long) a failed request should be sent again. Delays use
+        exponential backoff with full jitter unless the server provides a Retry-After header.
+
+        params:
+            max_retries: maximum number of times one request is retried
+            backoff_base: delay in seconds for the first retry before jitter is applied
+            backoff_max: maximum delay in seconds for any retry
+            retry_statuses: http status codes which are retried
+            retry_methods: http methods which are retried, idempotent methods only by default
+            respect_retry_after: whether to wait as long as a Retry-After header asks
+            max_retry_after: maximum delay in seconds honoured from a Retry-After header
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = retry_statuses
+        self.retry_methods = retry_methods
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+        self.lock = threading.Lock()
+        self.stats = {"retries":0, "retries_exhausted":0, "retry_after_honoured":0, "retry_sleep_seconds":0.0}
+
+    def should_retry(self, method, attempt, response=None):
+        """
+        Determines whether a request should be retried
+
+        params:
+            method: http method of the request
+            attempt: number of retries already made for the request
+            response: response received, or None if the request raised an exception
+
+        returns:
+            true if the request should be sent again
+        """
+        if method.lower() not in self.retry_methods:
+            return False
+
+        if response is not None and response.status_code not in self.retry_statuses:
+            return False
+
+        if attempt >= self.max_retries:
+            with self.lock:
+                self.stats["retries_exhausted"] += 1
+            return False
+
+        return True
+
+    def get_retry_after(self, response):
+        """
+        Reads the Retry-After header of a response (seconds or an http date)
+
+        returns:
+            delay in seconds, or None if no usable header was provided
+        """
+        if response is None or not self.respect_retry_after:
+            return None
+
+        retry_after = response.headers.get("Retry-After")
+        if not retry_after:
+            return None
+
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                delay = (parsedate_to_datetime(retry_after) - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                return None
+
+        return min(max(delay, 0), self.max_retry_after)
+
+    def get_delay(self, attempt, response=None):
+        """
+        Determines how long to wait before the next retry
+
+        params:
+            attempt: number of retries already made for the request
+            response: response received, or None if the request raised an exception
+
+        returns:
+            delay in seconds
+        """
+        delay = self.get_retry_after(response)
+
+        with self.lock:
+            self.stats["retries"] += 1
+            if delay is not None:
+                self.stats["retry_after_honoured"] += 1
+
+        if delay is None:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+        with self.lock:
+            self.stats["retry_sleep_seconds"] += delay
+
+        return delay
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats)
+
+class circuit_breaker():
+    def __init__(self, failure_threshold=5, recovery_timeout=30):
+        """
+        Fails requests fast while the server appears to be down. After failure_threshold consecutive
+        failures the breaker opens and rejects requests; after recovery_timeout seconds one trial
+        request is let through (half open) and its outcome closes or re-opens the breaker.
+
+        params:
+            failure_threshold: consecutive failures (connection errors or 5xx responses) which open the breaker
+            recovery_timeout: seconds to wait while open before letting a trial request through
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0
+        self.lock = threading.Lock()
+        self.stats = {"opened":0, "rejected":0, "failures":0, "successes":0}
+
+    def allow_request(self):
+        """
+        Determines whether a request may be sent
+
+        returns:
+            true if the request may be sent, false if it should fail fast
+        """
+        with self.lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at >= self.recovery_timeout:
+                    self.state = "half open"
+                    return True
+
+                self.stats["rejected"] += 1
+                return False
+
+            if self.state == "half open":
+                #only the single trial request is allowed through until it completes
+                self.stats["rejected"] += 1
+                return False
+
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.stats["successes"] += 1
+            self.failures = 0
+            self.state = "closed"
+
+    def record_failure(self):
+        with self.lock:
+            self.stats["failures"] += 1
+            self.failures += 1
+
+            if self.state == "half open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logging.error("Mediasite circuit breaker opened after "+str(self.failures)+" consecutive failures")
+                    self.stats["opened"] += 1
+
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["state"] = self.state
+            stats["consecutive_failures"] = self.failures
+            return stats
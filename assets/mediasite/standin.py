@@ -0,0 +1,1144 @@
+"""
+Local stand-in for the Mediasite API. Serves the OData endpoints used by the mediasite modules
+from synthetic in-memory data so the client can be exercised and benchmarked without a live
+Mediasite installation. Latency and errors can be injected. The cost of $skip on servers which
+scan to an offset is modelled as a setting: entities skipped are counted and reported, not slept on.
+
+Connections opened with the HTTP/2 preface (prior knowledge, no TLS) are served over HTTP/2
+when the h2 library is installed.
+
+Run standalone with:
+
+    python -m assets.mediasite.standin --port 8080 --latency-ms 20
+
+License: MIT - see license.txt
+"""
+
+import re
+import json
+import base64
+import time
+import random
+import hashlib
+import logging
+import argparse
+import datetime
+import threading
+from urllib.parse import unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import assets.mediasite.batch as batch
+
+try:
+    import h2.config
+    import h2.events
+    import h2.connection
+    import h2.exceptions
+except ImportError:
+    h2 = None
+
+API_PATH = "/mediasite/api/v1/"
+
+#authorization scheme of requests authenticated with an auth ticket
+TICKET_SCHEME = "SfIdentTicket"
+
+#default number of synthetic entities created per collection
+DEFAULT_SIZES = {
+    "Folders":200,
+    "Presentations":5000,
+    "Schedules":200,
+    "Recurrences":2,
+    "Catalogs":100,
+    "Modules":50,
+    "Recorders":20,
+    "ScheduledRecordingTimes":3,
+    "Templates":10,
+    "PresentationReports":3,
+    "ContentStorageReports":2
+    }
+
+PRESENTATION_STATUSES = ("Viewable", "Unavailable", "Record", "Recorded", "Opened")
+RECORDER_STATES = ("Idle", "Busy", "Recording", "RecordEnd", "Paused")
+
+#resources are a collection, an optional entity key and an optional navigation property or action
+RESOURCE_PATTERN = re.compile(r"^(?P<collection>[\w$]+)(?:\((?P<key>'(?:[^']|'')*'|[^)]*)\))?(?:/(?P<navigation>\w+))?$")
+
+FILTER_TOKEN_PATTERN = re.compile(r"""\s*(?:
+    (?P<typed>(?:datetime|datetimeoffset|guid)'(?:[^']|'')*')|
+    (?P<string>'(?:[^']|'')*')|
+    (?P<number>-?\d+(?:\.\d+)?)|
+    (?P<paren>[(),])|
+    (?P<name>[A-Za-z_][\w./]*)
+    )""", re.VERBOSE)
+
+COMPARISONS = {
+    "eq":lambda a, b: a == b,
+    "ne":lambda a, b: a != b,
+    "gt":lambda a, b: a is not None and b is not None and a > b,
+    "ge":lambda a, b: a is not None and b is not None and a >= b,
+    "lt":lambda a, b: a is not None and b is not None and a < b,
+    "le":lambda a, b: a is not None and b is not None and a <= b
+    }
+
+FUNCTIONS = {
+    "substringof":lambda a, b: a is not None and b is not None and str(a).lower() in str(b).lower(),
+    "startswith":lambda a, b: a is not None and b is not None and str(a).startswith(str(b)),
+    "endswith":lambda a, b: a is not None and b is not None and str(a).endswith(str(b)),
+    "tolower":lambda a: str(a).lower() if a is not None else None,
+    "toupper":lambda a: str(a).upper() if a is not None else None
+    }
+
+class odata_error(Exception):
+    def __init__(self, status, code, message):
+        """
+        Error answered as an OData error body
+
+        params:
+            status: http status code
+            code: OData error code, for ex. "NotFound"
+            message: human readable error message
+        """
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+class filter_parser():
+    def __init__(self, text):
+        """
+        Recursive descent parser for the subset of OData $filter expressions used with Mediasite:
+        eq, ne, gt, ge, lt, le, and, or, not, parentheses, string, number, boolean, null and
+        datetime literals and the substringof, startswith, endswith, tolower and toupper functions.
+
+        params:
+            text: $filter expression
+        """
+        self.tokens = self.tokenize(text)
+        self.position = 0
+
+    def tokenize(self, text):
+        tokens = []
+        position = 0
+        text = text.rstrip()
+
+        while position < len(text):
+            match = FILTER_TOKEN_PATTERN.match(text, position)
+            if not match or match.end() == position:
+                raise odata_error(400, "BadRequest", "Unable to parse $filter at: "+text[position:])
+
+            kind = match.lastgroup
+            value = match.group(kind)
+
+            if kind == "string":
+                tokens.append(("literal", value[1:-1].replace("''", "'")))
+            elif kind == "typed":
+                tokens.append(("literal", value[value.index("'")+1:-1].replace("''", "'")))
+            elif kind == "number":
+                tokens.append(("literal", float(value) if "." in value else int(value)))
+            elif kind == "name" and value in ("true", "false", "null"):
+                tokens.append(("literal", {"true":True, "false":False, "null":None}[value]))
+            else:
+                tokens.append((kind, value))
+
+            position = match.end()
+
+        return tokens
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self, kind=None, value=None):
+        token = self.peek()
+        if token[0] is None or (kind and token[0] != kind) or (value and token[1] != value):
+            raise odata_error(400, "BadRequest", "Unexpected token in $filter: "+str(token[1]))
+
+        self.position += 1
+        return token
+
+    def parse(self):
+        """
+        returns:
+            function taking an entity and returning whether it matches the filter
+        """
+        predicate = self.parse_or()
+
+        if self.position != len(self.tokens):
+            raise odata_error(400, "BadRequest", "Unexpected token in $filter: "+str(self.peek()[1]))
+
+        return predicate
+
+    def parse_or(self):
+        left = self.parse_and()
+
+        while self.peek() == ("name", "or"):
+            self.take()
+            left = (lambda a, b: lambda entity: a(entity) or b(entity))(left, self.parse_and())
+
+        return left
+
+    def parse_and(self):
+        left = self.parse_not()
+
+        while self.peek() == ("name", "and"):
+            self.take()
+            left = (lambda a, b: lambda entity: a(entity) and b(entity))(left, self.parse_not())
+
+        return left
+
+    def parse_not(self):
+        if self.peek() == ("name", "not"):
+            self.take()
+            inner = self.parse_not()
+            return lambda entity: not inner(entity)
+
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        left = self.parse_operand()
+
+        kind, value = self.peek()
+        if kind == "name" and value in COMPARISONS:
+            self.take()
+            right = self.parse_operand()
+            compare = COMPARISONS[value]
+            return lambda entity: compare(normalize_value(left(entity)), normalize_value(right(entity)))
+
+        return lambda entity: bool(left(entity))
+
+    def parse_operand(self):
+        kind, value = self.peek()
+
+        if kind == "literal":
+            self.take()
+            return lambda entity: value
+
+        if kind == "paren" and value == "(":
+            self.take()
+            inner = self.parse_or()
+            self.take("paren", ")")
+            return inner
+
+        if kind == "name" and value in FUNCTIONS:
+            self.take()
+            self.take("paren", "(")
+            arguments = [self.parse_operand()]
+            while self.peek() == ("paren", ","):
+                self.take()
+                arguments.append(self.parse_operand())
+            self.take("paren", ")")
+
+            function = FUNCTIONS[value]
+            return lambda entity: function(*[argument(entity) for argument in arguments])
+
+        if kind == "name":
+            self.take()
+            return lambda entity: entity.get(value)
+
+        raise odata_error(400, "BadRequest", "Unexpected token in $filter: "+str(value))
+
+def normalize_value(value):
+    """
+    Makes datetime strings with and without a trailing Z comparable
+    """
+    if type(value) is str and value.endswith("Z") and len(value) >= 19 and value[4] == "-":
+        return value[:-1]
+
+    return value
+
+def parse_query(query_string):
+    """
+    Splits a query string into a dictionary. Values are not split on "+" so filters keep their literals.
+    """
+    query = {}
+
+    for pair in query_string.split("&"):
+        if pair:
+            key, _, value = pair.partition("=")
+            query[unquote(key)] = unquote(value)
+
+    return query
+
+def get_now():
+    return datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def get_key(key):
+    """
+    Strips quotes from an entity key, for ex. "'abc'" -> "abc"
+    """
+    if key and key.startswith("'") and key.endswith("'"):
+        return key[1:-1].replace("''", "'")
+
+    return key
+
+class standin_data():
+    def __init__(self, seed=0, sizes=None):
+        """
+        Synthetic, thread-safe Mediasite data set
+
+        params:
+            seed: random seed so the same data is generated on every run
+            sizes: dictionary of collection name to number of entities (see DEFAULT_SIZES)
+        """
+        self.random = random.Random(seed)
+        self.sizes = dict(DEFAULT_SIZES, **(sizes or {}))
+        self.lock = threading.RLock()
+        self.collections = {}
+        self.catalog_settings = {}
+        self.jobs = {}
+        self.downloads = {}
+        self.root_folder_id = self.new_id()
+        self.generate()
+
+    def new_id(self):
+        return "%032x" % self.random.getrandbits(128)
+
+    def get_timestamp(self, offset_days=0):
+        moment = datetime.datetime(2018, 1, 1) + datetime.timedelta(days=offset_days)
+        return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def add(self, collection, entity):
+        with self.lock:
+            entity.setdefault("Id", self.new_id())
+            self.collections.setdefault(collection, {})[entity["Id"]] = entity
+            return entity
+
+    def generate(self):
+        """
+        Creates the synthetic folder tree and the entities linked to it
+        """
+        sizes = self.sizes
+        folder_ids = []
+
+        self.add("Folders", {"Name":"Mediasite Users", "ParentFolderId":self.root_folder_id, "Recycled":False,
+                            "Owner":"MediasiteAdmin", "LastModified":self.get_timestamp()})
+
+        #each folder is placed under the root or a randomly chosen earlier folder, giving a bushy tree
+        for i in range(sizes["Folders"]):
+            parent_id = self.random.choice(folder_ids) if folder_ids and self.random.random() < 0.7 else self.root_folder_id
+            folder = self.add("Folders", {"Name":"Folder "+str(i), "ParentFolderId":parent_id, "Recycled":False,
+                                        "Owner":"MediasiteAdmin", "Description":"",
+                                        "LastModified":self.get_timestamp(self.random.randint(0, 1500))})
+            folder_ids.append(folder["Id"])
+
+        folder_ids = folder_ids or [self.root_folder_id]
+
+        for i in range(sizes["Templates"]):
+            self.add("Templates", {"Name":"Template "+str(i), "Description":""})
+
+        recorder_ids = []
+        for i in range(sizes["Recorders"]):
+            recorder = self.add("Recorders", {"Name":"Recorder "+str(i), "Description":"", "SerialNumber":str(100000 + i),
+                                            "Version":"7.2", "WebServiceUrl":"http://recorder-"+str(i)+".local/"})
+            recorder_ids.append(recorder["Id"])
+
+        for i in range(sizes["Presentations"]):
+            modified = self.random.randint(0, 1500)
+            self.add("Presentations", {"Title":"Presentation "+str(i),
+                                        "Status":self.random.choice(PRESENTATION_STATUSES),
+                                        "ParentFolderId":self.random.choice(folder_ids),
+                                        "Description":"Synthetic presentation "+str(i)+". " + "Lorem ipsum dolor sit amet. " * 6,
+                                        "RecordDate":self.get_timestamp(modified),
+                                        "Duration":self.random.randint(60, 10800) * 1000,
+                                        "Owner":"MediasiteAdmin",
+                                        "CreationDate":self.get_timestamp(modified),
+                                        "LastModified":self.get_timestamp(modified),
+                                        "RootId":self.root_folder_id})
+
+        for i in range(sizes["Schedules"]):
+            schedule = self.add("Schedules", {"Name":"Schedule "+str(i), "FolderId":self.random.choice(folder_ids),
+                                            "RecorderId":self.random.choice(recorder_ids) if recorder_ids else "",
+                                            "TitleType":"ScheduleNameAndAirDate", "DeleteInactive":False,
+                                            "LastModified":self.get_timestamp(self.random.randint(0, 1500))})
+
+            for j in range(sizes["Recurrences"]):
+                start = self.get_timestamp(self.random.randint(1500, 1700))
+                self.add("Recurrences", {"ScheduleId":schedule["Id"], "RecordDuration":3600000,
+                                        "StartRecordDateTime":start, "EndRecordDateTime":start,
+                                        "RecurrencePattern":"None", "RecurrenceFrequency":0})
+
+            #upcoming occurrences of the schedule as its recorder reports them
+            for j in range(sizes["ScheduledRecordingTimes"] if schedule["RecorderId"] else 0):
+                start = self.get_timestamp(self.random.randint(1500, 1700))
+                self.add("ScheduledRecordingTimes", {"RecorderId":schedule["RecorderId"], "ScheduleId":schedule["Id"],
+                                                    "StartTime":start, "EndTime":start, "DurationInMinutes":60,
+                                                    "IsExcluded":False, "ScheduleName":schedule["Name"]})
+
+        for i in range(sizes["Catalogs"]):
+            self.add("Catalogs", {"Name":"Catalog "+str(i), "Description":"", "LinkedFolderId":self.random.choice(folder_ids),
+                                "LimitSearchToCatalog":True, "LastModified":self.get_timestamp(self.random.randint(0, 1500))})
+
+        for i in range(sizes["Modules"]):
+            self.add("Modules", {"Name":"Module "+str(i), "ModuleId":"MOD-"+str(1000 + i), "Associations":[]})
+
+        for i in range(sizes["PresentationReports"]):
+            self.add("PresentationReports", {"Name":"Presentation Report "+str(i), "FolderIdList":[]})
+
+        for i in range(sizes["ContentStorageReports"]):
+            self.add("ContentStorageReports", {"Name":"Storage Report "+str(i)})
+
+        self.collections.setdefault("CatalogReports", {})
+
+    def get(self, collection, key):
+        with self.lock:
+            entity = self.collections.get(collection, {}).get(key)
+
+        if entity is None:
+            raise odata_error(404, "NotFound", "No "+collection+" entity with key '"+str(key)+"' was found")
+
+        return entity
+
+    def query(self, collection, predicate=None):
+        """
+        returns:
+            list of entities in a collection (optionally only those matching predicate) in insertion order
+        """
+        with self.lock:
+            entities = list(self.collections.get(collection, {}).values())
+
+        if predicate:
+            entities = [entity for entity in entities if predicate(entity)]
+
+        return entities
+
+    def remove(self, collection, key):
+        with self.lock:
+            self.get(collection, key)
+            del self.collections[collection][key]
+
+    def get_descendant_folder_ids(self, folder_id):
+        """
+        returns:
+            list of the folder id and the ids of every folder beneath it
+        """
+        with self.lock:
+            children = {}
+            for folder in self.collections.get("Folders", {}).values():
+                children.setdefault(folder["ParentFolderId"], []).append(folder["Id"])
+
+        result = []
+        pending = [folder_id]
+        while pending:
+            current = pending.pop()
+            result.append(current)
+            pending.extend(children.get(current, []))
+
+        return result
+
+    def create_job(self, duration, download=None):
+        """
+        Creates a job which reports "Working" until duration seconds have passed
+
+        returns:
+            job id
+        """
+        job_id = self.new_id()
+
+        with self.lock:
+            self.jobs[job_id] = {"Id":job_id, "Completes":time.monotonic() + duration}
+            if download is not None:
+                self.downloads[job_id] = download
+
+        return job_id
+
+class standin():
+    def __init__(self, seed=0, sizes=None, latency=0, latency_jitter=0, error_rate=0, error_status=503, retry_after=None,
+                    skip_cost=0, max_page_size=1000, next_links=False, job_duration=0, auth_cost=0, ticket_lifetime=None):
+        """
+        Request handling of the stand-in, independent of the http server
+
+        params:
+            seed: random seed for the synthetic data and injected errors
+            sizes: dictionary of collection name to number of synthetic entities (see DEFAULT_SIZES)
+            latency: seconds added to every request
+            latency_jitter: maximum random seconds added on top of latency
+            error_rate: fraction (0-1) of requests answered with error_status instead of being handled
+            error_status: http status of injected errors
+            retry_after: optional Retry-After header value (seconds) sent with injected errors
+            skip_cost: seconds per 1000 entities skipped with $skip on servers which scan to the offset, reported
+                by get_skip_stats rather than added to requests
+            max_page_size: maximum number of entities returned by one collection request
+            next_links: when true, pages capped by max_page_size carry an odata.nextLink
+            job_duration: seconds jobs (deletes, report executions and exports) take to complete
+            auth_cost: seconds added to requests authenticated with Basic credentials, modelling directory backed logins
+            ticket_lifetime: optional seconds auth tickets stay valid, overriding the MinutesToLive requested
+        """
+        self.data = standin_data(seed, sizes)
+        self.random = random.Random(seed)
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.skip_cost = skip_cost
+        self.max_page_size = max_page_size
+        self.next_links = next_links
+        self.job_duration = job_duration
+        self.auth_cost = auth_cost
+        self.ticket_lifetime = ticket_lifetime
+        self.tickets = {}
+        self.service_root = "http://localhost" + API_PATH
+        self.lock = threading.Lock()
+        self.request_log = []
+        self.skipped = 0
+
+    def get_skip_stats(self):
+        """
+        returns:
+            dictionary with the entities skipped with $skip so far, the skip_cost setting and the seconds
+            those skips would have cost a server which scans to each offset
+        """
+        with self.lock:
+            return {"entities_skipped":self.skipped, "skip_cost":self.skip_cost, "modelled_seconds":round(self.skipped * self.skip_cost / 1000, 3)}
+
+    def get_request_log(self):
+        """
+        returns:
+            list of (method, resource, query string) tuples for requests handled so far
+        """
+        with self.lock:
+            return list(self.request_log)
+
+    def reset_request_log(self):
+        with self.lock:
+            self.request_log = []
+
+    def inject(self):
+        """
+        Applies configured latency and decides whether an error should be injected
+
+        returns:
+            true if the request should be answered with the configured error status
+        """
+        with self.lock:
+            delay = self.latency + (self.random.uniform(0, self.latency_jitter) if self.latency_jitter else 0)
+            failed = self.error_rate > 0 and self.random.random() < self.error_rate
+
+        if delay > 0:
+            time.sleep(delay)
+
+        return failed
+
+    def handle(self, method, resource, query_string, headers, body):
+        """
+        Handles one request
+
+        params:
+            method: http method, for ex. "GET"
+            resource: path relative to the API root, for ex. "Folders('abc')/Presentations"
+            query_string: raw query string
+            headers: dictionary of request headers (lowercase names)
+            body: request body as bytes
+
+        returns:
+            tuple of status code, header dictionary and body bytes
+        """
+        with self.lock:
+            self.request_log.append((method, resource, query_string))
+
+        if resource == "$batch" and method == "POST":
+            return self.handle_batch(headers, body)
+
+        if self.inject():
+            error_headers = {"Retry-After":str(self.retry_after)} if self.retry_after is not None else {}
+            return self.get_error_response(odata_error(self.error_status, "Injected", "Injected error"), error_headers)
+
+        try:
+            self.authenticate(headers)
+
+            payload = json.loads(body) if body else {}
+            status, result = self.route(method, resource, parse_query(query_string), payload)
+
+        except odata_error as e:
+            return self.get_error_response(e)
+
+        except ValueError as e:
+            return self.get_error_response(odata_error(400, "BadRequest", str(e)))
+
+        if result is None:
+            return status, {}, b""
+
+        if type(result) is bytes:
+            return status, {"Content-Type":"application/octet-stream"}, result
+
+        content = json.dumps(result).encode("utf-8")
+        response_headers = {"Content-Type":"application/json; charset=utf-8"}
+
+        if method == "GET" and status == 200:
+            etag = '"' + hashlib.md5(content).hexdigest() + '"'
+            response_headers["ETag"] = etag
+
+            if headers.get("if-none-match") == etag:
+                return 304, response_headers, b""
+
+        return status, response_headers, content
+
+    def authenticate(self, headers):
+        """
+        Checks the Authorization header of a request. Basic credentials are accepted (after auth_cost),
+        tickets must have been issued by AuthorizationTickets and not have expired, and requests with
+        neither are rejected.
+        """
+        scheme, _, credentials = headers.get("authorization", "").partition(" ")
+
+        if scheme == "Basic":
+            if not credentials:
+                raise odata_error(401, "Unauthorized", "Missing credentials")
+
+            if self.auth_cost > 0:
+                time.sleep(self.auth_cost)
+
+        elif scheme == TICKET_SCHEME:
+            try:
+                username, _, ticket_id = base64.b64decode(credentials).decode("utf-8").partition(":")
+            except ValueError:
+                raise odata_error(401, "Unauthorized", "Malformed ticket")
+
+            with self.lock:
+                ticket = self.tickets.get(ticket_id)
+
+            if ticket is None or ticket["Username"] != username or time.monotonic() >= ticket["Expires"]:
+                raise odata_error(401, "Unauthorized", "Ticket is invalid or has expired")
+
+        else:
+            raise odata_error(401, "Unauthorized", "Authorization is required")
+
+    def create_ticket(self, payload):
+        """
+        Issues an auth ticket for the user named in the payload
+        """
+        minutes = payload.get("MinutesToLive", 60)
+        lifetime = self.ticket_lifetime if self.ticket_lifetime is not None else minutes * 60
+        ticket_id = "%032x" % random.getrandbits(128)
+
+        ticket = {"TicketId":ticket_id, "Username":payload.get("Username", ""), "MinutesToLive":minutes,
+                "CreationTime":get_now(), "Expires":time.monotonic() + lifetime}
+
+        with self.lock:
+            self.tickets[ticket_id] = ticket
+
+        result = {name:value for name, value in ticket.items() if name != "Expires"}
+        return 200, dict(result, **{"odata.id":self.service_root+"AuthorizationTickets('"+ticket_id+"')"})
+
+    def get_error_response(self, error, headers=None):
+        content = json.dumps({"odata.error":{"code":error.code, "message":{"lang":"en-US", "value":error.message}}}).encode("utf-8")
+        return error.status, dict({"Content-Type":"application/json; charset=utf-8"}, **(headers or {})), content
+
+    def get_entity(self, collection, entity):
+        """
+        returns:
+            copy of an entity with its odata.id
+        """
+        result = dict(entity)
+        result["odata.id"] = self.service_root + collection + "('" + entity["Id"] + "')"
+        return result
+
+    def route(self, method, resource, query, payload):
+        """
+        Dispatches a request to the handler for its resource
+
+        returns:
+            tuple of status code and result (dictionary, bytes or None)
+        """
+        match = RESOURCE_PATTERN.match(resource)
+        if not match:
+            raise odata_error(404, "NotFound", "Resource not found: "+resource)
+
+        collection = match.group("collection")
+        key = get_key(match.group("key"))
+        navigation = match.group("navigation")
+        data = self.data
+
+        if collection == "Home":
+            return 200, {"odata.metadata":self.service_root+"$metadata#Home", "ApiVersion":"7.2", "SiteName":"Mediasite stand-in"}
+
+        if collection == "Search":
+            term = query.get("search", "").strip("'").lower()
+            return self.get_collection("Presentations", query, lambda entity: term in entity["Title"].lower())
+
+        if collection == "AuthorizationTickets" and method == "POST":
+            return self.create_ticket(payload)
+
+        if collection == "Jobs" and key:
+            job = data.jobs.get(key)
+            if job is None:
+                raise odata_error(404, "NotFound", "No job with key '"+key+"' was found")
+
+            status = "Successful" if time.monotonic() >= job["Completes"] else "Working"
+            return 200, {"odata.id":self.service_root+"Jobs('"+key+"')", "Id":key, "Status":status, "StatusMessage":""}
+
+        if collection == "Downloads" and key:
+            if key not in data.downloads:
+                raise odata_error(404, "NotFound", "No download with key '"+key+"' was found")
+            return 200, data.downloads[key]
+
+        if collection not in data.collections:
+            raise odata_error(404, "NotFound", "Resource not found: "+resource)
+
+        if navigation:
+            return self.route_navigation(method, collection, key, navigation, query, payload)
+
+        if key is None:
+            if method == "GET":
+                return self.get_collection(collection, query)
+            if method == "POST":
+                return 201, self.get_entity(collection, self.create(collection, payload))
+            raise odata_error(405, "MethodNotAllowed", method+" is not supported on "+collection)
+
+        if method == "GET":
+            return 200, self.select(self.get_entity(collection, data.get(collection, key)), query)
+
+        if method in ("PATCH", "PUT", "MERGE"):
+            with data.lock:
+                entity = data.get(collection, key)
+                if method == "PUT":
+                    entity = {"Id":key}
+                    data.collections[collection][key] = entity
+                entity.update({name:value for name, value in payload.items() if name != "Id"})
+                entity["LastModified"] = get_now()
+            return 204, None
+
+        if method == "DELETE":
+            data.remove(collection, key)
+            return 204, None
+
+        raise odata_error(405, "MethodNotAllowed", method+" is not supported on "+resource)
+
+    def route_navigation(self, method, collection, key, navigation, query, payload):
+        """
+        Handles navigation properties and actions of an entity, for ex. Folders('abc')/Presentations
+        """
+        data = self.data
+        entity = data.get(collection, key)
+
+        if collection == "Folders" and navigation == "Presentations" and method == "GET":
+            return self.get_collection("Presentations", query, lambda presentation: presentation["ParentFolderId"] == key)
+
+        if collection == "Folders" and navigation == "DeleteFolder" and method == "POST":
+            with data.lock:
+                for folder_id in data.get_descendant_folder_ids(key):
+                    data.collections["Folders"][folder_id]["Recycled"] = True
+                    data.collections["Folders"][folder_id]["LastModified"] = get_now()
+
+            job_id = data.create_job(self.job_duration)
+            return 200, {"odata.id":self.service_root+"Jobs('"+job_id+"')", "Id":job_id, "Status":"Queued"}
+
+        if collection == "Schedules" and navigation == "Recurrences":
+            if method == "GET":
+                return self.get_collection("Recurrences", query, lambda recurrence: recurrence["ScheduleId"] == key)
+            if method == "POST":
+                return 201, self.get_entity("Recurrences", self.create("Recurrences", dict(payload, ScheduleId=key)))
+
+        if collection == "Catalogs" and navigation == "Settings":
+            with data.lock:
+                settings = data.catalog_settings.setdefault(key, {"AllowPresentationDownload":False, "LinkedFolderId":entity.get("LinkedFolderId")})
+                if method in ("PATCH", "PUT"):
+                    settings.update(payload)
+                    return 204, None
+            if method == "GET":
+                return 200, dict(settings)
+
+        if collection == "Modules" and navigation == "AddAssociation" and method == "POST":
+            with data.lock:
+                entity["Associations"].append(payload)
+            return 204, None
+
+        if collection == "Recorders" and navigation == "Status" and method == "GET":
+            return 200, {"RecorderState":self.random.choice(RECORDER_STATES), "RecorderStateTime":"2018-01-01T00:00:00Z"}
+
+        if collection == "Recorders" and navigation == "ScheduledRecordingTimes" and method == "GET":
+            return self.get_collection("ScheduledRecordingTimes", query, lambda recording: recording["RecorderId"] == key)
+
+        if collection in ("PresentationReports", "ContentStorageReports") and navigation == "Execute" and method == "POST":
+            job_id = data.create_job(self.job_duration)
+            return 200, {"JobLink":self.service_root+"Jobs('"+job_id+"')", "ResultId":data.new_id()}
+
+        if collection == "PresentationReports" and navigation == "Export" and method == "POST":
+            job_id = data.create_job(self.job_duration, self.get_report_export(entity))
+            return 200, {"JobLink":self.service_root+"Jobs('"+job_id+"')", "DownloadLink":self.service_root+"Downloads('"+job_id+"')"}
+
+        if collection == "Presentations" and navigation in ("RemovePublishToGo", "RemovePodcast", "RemoveVideoPodcast") and method == "POST":
+            return 204, None
+
+        raise odata_error(404, "NotFound", "Resource not found: "+collection+"('"+key+"')/"+navigation)
+
+    def get_report_export(self, report):
+        """
+        returns:
+            xml report export containing the summary values read by report.parse_presentation_summary_data_from_xml
+        """
+        presentations = self.data.query("Presentations")
+        return ("<?xml version=\"1.0\" encoding=\"utf-8\"?><PresentationReport><Name>"+report["Name"]+"</Name>"
+                "<PresentationsAvailable>"+str(len(presentations))+"</PresentationsAvailable>"
+                "<TotalTimeWatched>1.05:44:37</TotalTimeWatched><PresentationsWatched>"+str(len(presentations) // 2)+"</PresentationsWatched>"
+                "<TotalViews>"+str(len(presentations) * 3)+"</TotalViews><TotalUsers>250</TotalUsers>"
+                "<PeakConnections>40</PeakConnections></PresentationReport>").encode("utf-8")
+
+    def create(self, collection, payload):
+        entity = {name:value for name, value in payload.items() if name != "Id"}
+        entity["LastModified"] = get_now()
+
+        if collection == "Folders":
+            entity.setdefault("ParentFolderId", self.data.root_folder_id)
+            entity.setdefault("Recycled", False)
+        elif collection == "Modules":
+            entity.setdefault("Associations", [])
+
+        return self.data.add(collection, entity)
+
+    def select(self, entity, query):
+        if "$select" not in query:
+            return entity
+
+        names = [name.strip() for name in query["$select"].split(",")]
+        return {name:value for name, value in entity.items() if name in names or name.startswith("odata.")}
+
+    def get_collection(self, collection, query, predicate=None):
+        """
+        Applies $filter, $orderby, $skip, $top and $select to a collection
+
+        returns:
+            tuple of status code and OData collection response
+        """
+        entities = self.data.query(collection, predicate)
+
+        if query.get("$filter"):
+            matches = filter_parser(query["$filter"]).parse()
+            entities = [entity for entity in entities if matches(entity)]
+
+        if query.get("$orderby"):
+            #apply the least significant ordering first, relying on sort stability
+            for clause in reversed(query["$orderby"].split(",")):
+                name, _, direction = clause.strip().partition(" ")
+                entities.sort(key=lambda entity: (entity.get(name) is not None, normalize_value(entity.get(name))),
+                                reverse=direction.strip().lower() == "desc")
+
+        count = len(entities)
+        skip = int(query.get("$skip", 0))
+        top = int(query.get("$top", self.max_page_size))
+        page_size = min(top, self.max_page_size)
+
+        if skip:
+            with self.lock:
+                self.skipped += skip
+
+        page = entities[skip:skip + page_size]
+        result = {"odata.metadata":self.service_root+"$metadata#"+collection,
+                    "odata.count":str(count),
+                    "value":[self.select(self.get_entity(collection, entity), query) for entity in page]
+                    }
+
+        #a capped page links to the rest of the requested window
+        if self.next_links and top > page_size and skip + page_size < count:
+            next_query = dict(query, **{"$skip":str(skip + page_size), "$top":str(top - page_size)})
+            result["odata.nextLink"] = self.service_root + collection + "?" + "&".join(name+"="+value for name, value in next_query.items())
+
+        return 200, result
+
+    def handle_batch(self, headers, body):
+        """
+        Handles a multipart/mixed $batch request, answering each part (and changeset) in order
+        """
+        if self.inject():
+            return self.get_error_response(odata_error(self.error_status, "Injected", "Injected error"))
+
+        try:
+            self.authenticate(headers)
+        except odata_error as e:
+            return self.get_error_response(e)
+
+        boundary = "batchresponse_" + self.data.new_id()
+        parts = []
+
+        try:
+            request_parts = batch.split_multipart(body, batch.get_boundary(headers.get("content-type", "")))
+        except ValueError as e:
+            return self.get_error_response(odata_error(400, "BadRequest", "Malformed batch request: " + str(e)))
+
+        for part_headers, part in request_parts:
+            part_type = part_headers.get("content-type", "")
+
+            if part_type.startswith("multipart/mixed"):
+                changeset_boundary = "changesetresponse_" + self.data.new_id()
+                changeset_parts = [self.handle_batch_operation(changeset_part)
+                                    for changeset_headers, changeset_part in batch.split_multipart(part, batch.get_boundary(part_type))]
+                parts.append(b"Content-Type: multipart/mixed; boundary=" + changeset_boundary.encode("utf-8") + b"\r\n\r\n" +
+                            b"".join(b"--" + changeset_boundary.encode("utf-8") + b"\r\n" + changeset_part + b"\r\n" for changeset_part in changeset_parts) +
+                            b"--" + changeset_boundary.encode("utf-8") + b"--")
+            else:
+                parts.append(self.handle_batch_operation(part))
+
+        content = b"".join(b"--" + boundary.encode("utf-8") + b"\r\n" + part + b"\r\n" for part in parts) + b"--" + boundary.encode("utf-8") + b"--\r\n"
+        return 202, {"Content-Type":"multipart/mixed; boundary=" + boundary}, content
+
+    def handle_batch_operation(self, part):
+        """
+        Handles the application/http request within one $batch part
+
+        returns:
+            application/http response part as bytes
+        """
+        request_line, _, rest = part.partition(b"\n")
+        method, url = request_line.decode("utf-8").split()[:2]
+        operation_headers, operation_body = batch.split_headers(rest)
+
+        path, _, query_string = url.partition("?")
+        resource = unquote(path[path.find(API_PATH) + len(API_PATH):] if API_PATH in path else path.lstrip("/"))
+
+        with self.lock:
+            self.request_log.append((method, resource, query_string))
+
+        try:
+            payload = json.loads(operation_body) if operation_body.strip() else {}
+            status, result = self.route(method, resource, parse_query(query_string), payload)
+            content = json.dumps(result).encode("utf-8") if result is not None else b""
+        except odata_error as e:
+            status, error_headers, content = self.get_error_response(e)
+
+        return (b"Content-Type: application/http\r\nContent-Transfer-Encoding: binary\r\n\r\n" +
+                ("HTTP/1.1 " + str(status) + " \r\nContent-Type: application/json\r\n\r\n").encode("utf-8") + content)
+
+class request_handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    #headers and body are written separately, without this delayed acknowledgements add ~40ms per response
+    disable_nagle_algorithm = True
+
+    def handle(self):
+        #clients with prior knowledge of HTTP/2 open with the "PRI * HTTP/2.0" connection preface
+        if h2 is not None and self.rfile.peek(3)[:3] == b"PRI":
+            http2_connection(self).serve()
+        else:
+            super().handle()
+
+    def handle_request(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        headers = {name.lower():value for name, value in self.headers.items()}
+
+        status, response_headers, content = self.dispatch(self.command, self.path, headers, body)
+        self.send_result(status, response_headers, content)
+
+    def dispatch(self, method, url, headers, body):
+        path, _, query_string = url.partition("?")
+
+        if not path.startswith(API_PATH):
+            return 404, {}, b""
+
+        return self.server.standin.handle(method, unquote(path[len(API_PATH):]), query_string, headers, body)
+
+    def send_result(self, status, headers, content):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+
+        if self.command != "HEAD":
+            self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_MERGE = handle_request
+
+    def log_message(self, format, *args):
+        logging.debug("Mediasite stand-in: " + format % args)
+
+class http2_connection():
+    def __init__(self, handler):
+        """
+        Serves one HTTP/2 connection, answering each stream on its own thread so that
+        injected latency overlaps the way it does for concurrent HTTP/1.1 connections
+
+        params:
+            handler: request_handler which accepted the connection
+        """
+        self.handler = handler
+        self.connection = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False, header_encoding="utf-8"))
+        self.condition = threading.Condition()
+        self.streams = {}
+        self.closed = False
+
+    def send_pending(self):
+        data = self.connection.data_to_send()
+        if data:
+            self.handler.connection.sendall(data)
+
+    def serve(self):
+        with self.condition:
+            self.connection.initiate_connection()
+            self.send_pending()
+
+        try:
+            while True:
+                data = self.handler.rfile.read1(65536)
+                if not data:
+                    break
+
+                with self.condition:
+                    events = self.connection.receive_data(data)
+                    self.handle_events(events)
+                    self.send_pending()
+                    self.condition.notify_all()
+
+        except (OSError, h2.exceptions.ProtocolError):
+            pass
+
+        finally:
+            with self.condition:
+                self.closed = True
+                self.condition.notify_all()
+
+    def handle_events(self, events):
+        for event in events:
+            if isinstance(event, h2.events.RequestReceived):
+                self.streams[event.stream_id] = {"headers":dict(event.headers), "body":b""}
+
+            elif isinstance(event, h2.events.DataReceived):
+                self.streams[event.stream_id]["body"] += event.data
+                self.connection.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+
+            elif isinstance(event, h2.events.StreamEnded):
+                stream = self.streams.pop(event.stream_id)
+                threading.Thread(target=self.respond, args=(event.stream_id, stream), daemon=True).start()
+
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                self.closed = True
+
+    def respond(self, stream_id, stream):
+        request_headers = stream["headers"]
+        method = request_headers.pop(":method")
+        url = request_headers.pop(":path")
+
+        try:
+            status, headers, content = self.handler.dispatch(method, url, request_headers, stream["body"])
+        except Exception as e:
+            logging.exception("Mediasite stand-in: "+str(e))
+            status, headers, content = 500, {}, b""
+
+        response_headers = [(":status", str(status)), ("content-length", str(len(content)))]
+        response_headers += [(name.lower(), str(value)) for name, value in headers.items()]
+
+        try:
+            with self.condition:
+                self.connection.send_headers(stream_id, response_headers, end_stream=not content or method == "HEAD")
+                self.send_pending()
+
+            if method == "HEAD":
+                return
+
+            #send the body as the client's flow control windows allow
+            while content:
+                with self.condition:
+                    window = self.connection.local_flow_control_window(stream_id)
+                    while window <= 0 and not self.closed:
+                        self.condition.wait()
+                        window = self.connection.local_flow_control_window(stream_id)
+
+                    if self.closed:
+                        return
+
+                    size = min(window, self.connection.max_outbound_frame_size, len(content))
+                    self.connection.send_data(stream_id, content[:size], end_stream=size == len(content))
+                    self.send_pending()
+                    content = content[size:]
+
+        except (OSError, h2.exceptions.ProtocolError, h2.exceptions.StreamClosedError):
+            pass
+
+class standin_server():
+    def __init__(self, host="127.0.0.1", port=0, **kwargs):
+        """
+        Runs the stand-in on a background http server thread
+
+        params:
+            host: interface to listen on
+            port: port to listen on, 0 picks a free port
+            kwargs: options passed to standin (latency, error_rate, skip_cost, sizes, seed, etc.)
+        """
+        self.standin = standin(**kwargs)
+        self.server = ThreadingHTTPServer((host, port), request_handler)
+        self.server.daemon_threads = True
+        self.server.standin = self.standin
+        self.thread = None
+
+        self.service_root = "http://" + host + ":" + str(self.server.server_address[1]) + API_PATH
+        self.standin.service_root = self.service_root
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        """
+        returns:
+            service root url of the running stand-in
+        """
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.service_root
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get_config(self, config_data=None):
+        """
+        Creates controller configuration pointing at the stand-in
+
+        params:
+            config_data: optional configuration whose other options are kept
+
+        returns:
+            configuration dictionary for controller.controller
+        """
+        return dict(config_data or {},
+                    mediasite_base_url=self.service_root,
+                    mediasite_api_secret="standin-api-key",
+                    mediasite_api_user="standin",
+                    mediasite_api_pass="standin"
+                    )
+
+if __name__ == "__main__":
+    """
+    args:
+        --host: interface to listen on
+        --port: port to listen on
+        --seed: random seed for the synthetic data
+        --latency-ms: milliseconds added to every request
+        --jitter-ms: maximum random milliseconds added on top of the latency
+        --error-rate: fraction of requests answered with an injected error
+        --skip-cost-ms: modelled milliseconds per 1000 entities skipped with $skip, reported on exit
+        --presentations: number of synthetic presentations
+        --folders: number of synthetic folders
+    """
+
+    parser = argparse.ArgumentParser(description="Local Mediasite API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--skip-cost-ms", type=float, default=0)
+    parser.add_argument("--presentations", type=int, default=DEFAULT_SIZES["Presentations"])
+    parser.add_argument("--folders", type=int, default=DEFAULT_SIZES["Folders"])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    server = standin_server(args.host, args.port,
+                            seed=args.seed,
+                            sizes={"Presentations":args.presentations, "Folders":args.folders},
+                            latency=args.latency_ms / 1000,
+                            latency_jitter=args.jitter_ms / 1000,
+                            error_rate=args.error_rate,
+                            retry_after=1 if args.error_rate else None,
+                            skip_cost=args.skip_cost_ms / 1000
+                            )
+
+    logging.info("Mediasite stand-in listening at " + server.service_root)
+
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Skip statistics: " + str(server.standin.get_skip_stats()))
@@ -0,0 +1,322 @@
+"""
+Transports for the Mediasite api client. A transport replaces api_client.client.transport
+and sends every http request the client makes. The recording and replaying transports let
+the calls made by an operation be counted, saved to a cassette file and replayed offline,
+and the HTTP/2 transport multiplexes concurrent requests over one connection.
+
+Uses the httpx library (installed with its http2 extra) for the HTTP/2 transport.
+
+License: MIT - see license.txt
+"""
+
+import io
+import json
+import base64
+import threading
+import requests
+import assets.mediasite.metrics as metrics
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+#stands in for the service root within recorded bodies (for ex. job links) so cassettes can be replayed elsewhere
+SERVICEROOT_PLACEHOLDER = b"{serviceroot}"
+
+class replayed_response():
+    def __init__(self, url, status_code, headers, content):
+        """
+        Response served from a cassette. Provides the parts of requests.Response used
+        throughout the mediasite modules so results can be handled the same way.
+
+        params:
+            url: url the request was made to
+            status_code: http status code of the response
+            headers: dictionary of response headers
+            content: response body as bytes
+        """
+        self.url = url
+        self.status_code = status_code
+        self.headers = requests.structures.CaseInsensitiveDict(headers)
+        self.content = content
+        self.raw = io.BytesIO(content)
+        self.ok = status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.text)
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start+chunk_size]
+
+    def __iter__(self):
+        return self.iter_content(128)
+
+    def close(self):
+        pass
+
+class recording_transport():
+    def __init__(self, send, serviceroot):
+        """
+        Passes requests on to another transport, recording each call and its response
+
+        params:
+            send: transport to pass requests on to, usually api_client.client.send_http
+            serviceroot: root URL of the API, removed from recorded urls so cassettes can be replayed elsewhere
+        """
+        self.send = send
+        self.serviceroot = serviceroot
+        self.lock = threading.Lock()
+        self.interactions = []
+
+    def get_relative_url(self, url):
+        return url[len(self.serviceroot):] if url.startswith(self.serviceroot) else url
+
+    def __call__(self, method, url, json=None, data=None, headers=None, stream=False):
+        rsp = self.send(method, url, json, data, headers, stream)
+
+        #streamed bodies are read here so they can be saved, raw is replaced so they can still be read as a stream
+        content = rsp.content
+        if stream:
+            rsp.raw = io.BytesIO(content)
+
+        self.record(method, url, rsp.status_code, dict(rsp.headers), content)
+        return rsp
+
+    def record(self, method, url, status_code, headers, content):
+        with self.lock:
+            self.interactions.append({"method":method.upper(),
+                                    "url":self.get_relative_url(url),
+                                    "status":status_code,
+                                    "headers":{name:value for name, value in headers.items() if name.lower() in ("content-type", "etag", "retry-after")},
+                                    "content":base64.b64encode(content.replace(self.serviceroot.encode("utf-8"), SERVICEROOT_PLACEHOLDER)).decode("ascii")
+                                    })
+
+    def reset(self):
+        with self.lock:
+            self.interactions = []
+
+    def get_calls(self, start=0):
+        """
+        params:
+            start: number of earlier calls to leave out
+
+        returns:
+            list of (http method, normalized resource) tuples in the order requests were sent
+        """
+        with self.lock:
+            return [(interaction["method"], metrics.normalize_resource(interaction["url"])) for interaction in self.interactions[start:]]
+
+    def get_call_counts(self, start=0):
+        """
+        params:
+            start: number of earlier calls to leave out
+
+        returns:
+            dictionary of "METHOD resource" (entity keys folded into ('...')) to number of requests
+        """
+        counts = {}
+        for method, resource in self.get_calls(start):
+            call = method + " " + resource
+            counts[call] = counts.get(call, 0) + 1
+
+        return counts
+
+    def save(self, path):
+        """
+        Writes the recorded interactions to a cassette file
+        """
+        with self.lock, open(path, "w") as cassette_file:
+            json.dump(self.interactions, cassette_file, indent=1)
+
+class replay_transport(recording_transport):
+    def __init__(self, interactions, serviceroot):
+        """
+        Answers requests from recorded interactions without sending anything. Each request is
+        matched to the first unused interaction with the same method and url, so repeated
+        requests are answered in the order they were recorded.
+
+        params:
+            interactions: interactions saved by recording_transport
+            serviceroot: root URL of the API the client is configured with
+        """
+        super().__init__(None, serviceroot)
+        self.cassette = list(interactions)
+        self.used = [False] * len(self.cassette)
+
+    @classmethod
+    def load(cls, path, serviceroot):
+        with open(path) as cassette_file:
+            return cls(json.load(cassette_file), serviceroot)
+
+    def __call__(self, method, url, json=None, data=None, headers=None, stream=False):
+        relative_url = self.get_relative_url(url)
+
+        with self.lock:
+            for index, interaction in enumerate(self.cassette):
+                if not self.used[index] and interaction["method"] == method.upper() and interaction["url"] == relative_url:
+                    self.used[index] = True
+                    break
+            else:
+                interaction = None
+
+        if interaction is None:
+            raise requests.exceptions.ConnectionError("No recorded response for "+method.upper()+" "+relative_url)
+
+        content = base64.b64decode(interaction["content"]).replace(SERVICEROOT_PLACEHOLDER, self.serviceroot.encode("utf-8"))
+        self.record(method, url, interaction["status"], interaction["headers"], content)
+
+        return replayed_response(url, interaction["status"], interaction["headers"], content)
+
+class chunk_reader(io.RawIOBase):
+    def __init__(self, chunks):
+        """
+        File-like reader over an iterator of byte chunks, standing in for requests' raw stream
+
+        params:
+            chunks: iterator of body chunks (bytes)
+        """
+        self.chunks = chunks
+        self.remainder = b""
+        self.decode_content = True
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self.remainder:
+            self.remainder = next(self.chunks, b"")
+
+        size = min(len(buffer), len(self.remainder))
+        buffer[:size] = self.remainder[:size]
+        self.remainder = self.remainder[size:]
+        return size
+
+class http2_response():
+    def __init__(self, response):
+        """
+        Wraps an httpx response in the parts of requests.Response used throughout the mediasite
+        modules so results can be handled the same way
+
+        params:
+            response: httpx response, possibly with its body not yet read
+        """
+        self.response = response
+        self.url = str(response.url)
+        self.status_code = response.status_code
+        self.headers = requests.structures.CaseInsensitiveDict(response.headers.items())
+        self.ok = response.status_code < 400
+        self.http_version = response.http_version
+        self.request = requests.models.PreparedRequest()
+        self.request.body = response.request.content
+        self._content = response.content if response.is_stream_consumed else False
+        self._raw = None
+
+    @property
+    def content(self):
+        if self._content is False:
+            self._content = self.read_body(self.response.read)
+
+        return self._content
+
+    @property
+    def raw(self):
+        if self._raw is None:
+            self._raw = io.BufferedReader(chunk_reader(self.iter_content(65536)))
+
+        return self._raw
+
+    @property
+    def text(self):
+        return self.content.decode(self.response.encoding or "utf-8")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def read_body(self, read):
+        try:
+            return read()
+        except httpx.HTTPError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+
+    def iter_content(self, chunk_size=1):
+        if self._content is not False:
+            for start in range(0, len(self._content), chunk_size):
+                yield self._content[start:start+chunk_size]
+            return
+
+        chunks = self.response.iter_bytes(chunk_size)
+        while True:
+            chunk = self.read_body(lambda: next(chunks, None))
+            if chunk is None:
+                return
+            yield chunk
+
+    def __iter__(self):
+        return self.iter_content(128)
+
+    def close(self):
+        self.response.close()
+
+class http2_transport():
+    def __init__(self, headers, max_connections=10, keep_alive=True, prior_knowledge=False):
+        """
+        Sends requests over HTTP/2 with httpx, so concurrent requests are multiplexed as streams of
+        one connection instead of each needing a connection of their own. Over https the protocol
+        is negotiated with the server (falling back to HTTP/1.1).
+
+        params:
+            headers: header values sent with every request
+            max_connections: maximum number of open connections
+            keep_alive: whether connections should be kept open between requests
+            prior_knowledge: speak HTTP/2 without negotiation, needed for plain http servers which support it
+        """
+        if httpx is None:
+            raise ImportError("The httpx library (pip install httpx[http2]) is required for the HTTP/2 transport")
+
+        self.client = httpx.Client(http1=not prior_knowledge, http2=True, verify=False, headers=headers, timeout=None,
+                                    limits=httpx.Limits(max_connections=max_connections,
+                                                        max_keepalive_connections=max_connections if keep_alive else 0))
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.stats = {"requests":0, "max_concurrent_streams":0, "http_versions":{}}
+
+    def __call__(self, method, url, json=None, data=None, headers=None, stream=False):
+        request = self.client.build_request(method.upper(), url, json=json, content=data, headers=headers)
+
+        with self.lock:
+            self.in_flight += 1
+            self.stats["requests"] += 1
+            self.stats["max_concurrent_streams"] = max(self.stats["max_concurrent_streams"], self.in_flight)
+
+        try:
+            response = self.client.send(request, stream=stream)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e))
+        except httpx.HTTPError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+        with self.lock:
+            versions = self.stats["http_versions"]
+            versions[response.http_version] = versions.get(response.http_version, 0) + 1
+
+        return http2_response(response)
+
+    def get_stats(self):
+        """
+        returns:
+            dictionary with the number of requests, most requests in flight at once and requests per negotiated http version
+        """
+        with self.lock:
+            return dict(self.stats, http_versions=dict(self.stats["http_versions"]))
+
+    def close(self):
+        self.client.close()
@@ -0,0 +1,474 @@
+"""
+Benchmarks for the Mediasite client. Run against the Mediasite installation described by a
+config file, for example:
+
+    python benchmark.py --file config/config.json --benchmarks projection --output results.json
+
+or offline against the local Mediasite API stand-in (see assets/mediasite/standin.py):
+
+    python benchmark.py --standin --latency-ms 20
+    python benchmark.py --standin --latency-ms 20 --benchmarks transport
+    python benchmark.py --standin --benchmarks paging --presentations 150000 --skip-cost-ms 2 --page-size 1000
+    python benchmark.py --standin --latency-ms 20 --benchmarks async --max-page-size 50
+    python benchmark.py --standin --benchmarks decode --presentations 50000 --page-size 1000
+
+License: MIT - see license.txt
+"""
+
+import sys
+import time
+import json
+import asyncio
+import logging
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import assets.mediasite.controller as controller
+import assets.mediasite.standin as standin
+
+#collections and the properties our listing methods actually use from them
+PROJECTIONS = [
+    ("Folders", "$filter=Recycled eq false", ("Name", "Id", "ParentFolderId")),
+    ("Recorders", "", ("Name", "Id")),
+    ("Templates", "", ("Name", "Id")),
+    ("Catalogs", "", ("Id", "LinkedFolderId")),
+    ("Presentations", "", ("Id", "Title", "Status"))
+    ]
+
+def measure_page(api_client, resource, odata_attributes, page_size, select=None):
+    """
+    Requests one page of a collection and measures its size and timings
+
+    returns:
+        dictionary with entity count, bytes transferred, bytes per entity, request and decode milliseconds
+    """
+    prefix = odata_attributes + "&" if odata_attributes else ""
+
+    start = time.perf_counter()
+    result = api_client.request("get", resource, prefix+"$top="+str(page_size), "", select=select)
+    request_seconds = time.perf_counter() - start
+
+    if type(result) is str:
+        return {"error":result}
+
+    start = time.perf_counter()
+    entities = result.json().get("value", [])
+    decode_seconds = time.perf_counter() - start
+
+    return {"entities":len(entities),
+            "bytes":len(result.content),
+            "bytes_per_entity":round(len(result.content) / len(entities), 1) if entities else 0,
+            "request_ms":round(request_seconds * 1000, 2),
+            "decode_ms":round(decode_seconds * 1000, 3)
+            }
+
+def benchmark_projection(mediasite, page_size=100, standin_handler=None):
+    """
+    Measures bytes per entity and decode time for full entities versus $select projections
+    """
+    results = []
+
+    for resource, odata_attributes, select in PROJECTIONS:
+        full = measure_page(mediasite.api_client, resource, odata_attributes, page_size)
+        projected = measure_page(mediasite.api_client, resource, odata_attributes, page_size, select)
+
+        row = {"resource":resource, "select":",".join(select)}
+        for key in ("entities", "bytes_per_entity", "decode_ms"):
+            row["full_"+key] = full.get(key, full.get("error"))
+            row["projected_"+key] = projected.get(key, projected.get("error"))
+
+        if full.get("bytes_per_entity") and projected.get("bytes_per_entity"):
+            row["reduction"] = str(round(100 - 100 * projected["bytes_per_entity"] / full["bytes_per_entity"], 1)) + "%"
+
+        results.append(row)
+
+    return results
+
+#number of requests in flight at once for the transport benchmark
+CONCURRENCY_LEVELS = (1, 8, 32)
+
+def get_transport_configs(config_data):
+    """
+    Creates configurations for the pooled HTTP/1.1 session and the HTTP/2 transport. Plain http
+    service roots (such as the stand-in) need HTTP/2 prior knowledge as there is no TLS negotiation.
+    """
+    prior_knowledge = config_data.get("mediasite_http2_prior_knowledge", config_data["mediasite_base_url"].startswith("http://"))
+
+    return [("HTTP/1.1", dict(config_data, mediasite_pooled_transport=True, mediasite_http2=False)),
+            ("HTTP/2", dict(config_data, mediasite_http2=True, mediasite_http2_prior_knowledge=prior_knowledge))]
+
+def benchmark_transport(mediasite, page_size=100, standin_handler=None):
+    """
+    Measures latency and throughput of concurrent single entity requests over the pooled HTTP/1.1
+    session and the multiplexed HTTP/2 transport, along with connections or streams used
+    """
+    result = mediasite.api_client.request("get", "Presentations", "$top="+str(page_size), "", select=("Id",))
+    if type(result) is str:
+        return [{"error":result}]
+
+    resources = ["Presentations('"+presentation["Id"]+"')" for presentation in result.json().get("value", [])]
+    results = []
+
+    for name, config_data in get_transport_configs(mediasite.config_data):
+        try:
+            api_client = controller.controller(config_data).api_client
+        except ImportError as e:
+            results.append({"transport":name, "error":str(e)})
+            continue
+
+        #open the first connection before timing
+        api_client.request("get", resources[0], "", "")
+
+        for concurrency in CONCURRENCY_LEVELS:
+            def timed_request(resource):
+                start = time.perf_counter()
+                rsp = api_client.request("get", resource, "", "")
+                return time.perf_counter() - start, type(rsp) is str or not rsp.ok
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                timings = list(executor.map(timed_request, resources))
+            elapsed = time.perf_counter() - start
+
+            latencies = sorted(seconds for seconds, failed in timings)
+            stats = api_client.get_connection_stats()
+
+            results.append({"transport":name,
+                            "concurrency":concurrency,
+                            "requests":len(timings),
+                            "errors":sum(failed for seconds, failed in timings),
+                            "p50_ms":round(latencies[len(latencies) // 2] * 1000, 2),
+                            "p95_ms":round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 2),
+                            "requests_per_second":round(len(timings) / elapsed, 1),
+                            "connections_opened":stats.get("connections_opened", ""),
+                            "max_concurrent_streams":stats.get("max_concurrent_streams", ""),
+                            "http_versions":",".join(stats.get("http_versions", {})) or name
+                            })
+
+        api_client.close()
+
+    return results
+
+#collections paged through by the paging and async benchmarks, with a $filter expression and the properties requested
+PAGED_COLLECTIONS = [
+    ("Catalogs", "", ("Id", "Name")),
+    ("Presentations", "", ("Id", "Title"))
+    ]
+
+def get_filter_attributes(conditions):
+    return "$filter=" + conditions if conditions else ""
+
+def measure_paging(pages):
+    """
+    Iterates a pager, timing each page from the end of the previous one
+
+    returns:
+        tuple of entity ids received and dictionary with entity and page counts and timings
+    """
+    ids = []
+    page_ms = []
+    start = previous = time.perf_counter()
+
+    for entity in pages:
+        if pages.pages > len(page_ms):
+            now = time.perf_counter()
+            page_ms.append(round((now - previous) * 1000, 2))
+            previous = now
+
+        ids.append(entity["Id"])
+
+    elapsed = time.perf_counter() - start
+
+    return ids, {"entities":len(ids),
+                "pages":pages.pages,
+                "seconds":round(elapsed, 3),
+                "first_page_ms":page_ms[0] if page_ms else "",
+                "last_page_ms":page_ms[-1] if page_ms else "",
+                "entities_per_second":round(len(ids) / elapsed, 1) if elapsed else "",
+                "error":pages.error or ""
+                }
+
+def benchmark_paging(mediasite, page_size=100, standin_handler=None):
+    """
+    Measures paging through whole collections with growing $skip offsets versus keyset paging
+    (ordered by Id, each page filtered to Ids after the last one received)
+
+    Against the stand-in, the cost of scanning to each $skip offset is not part of the measured
+    seconds. It is reported separately, as the entities skipped times the stand-in's skip_cost setting.
+    """
+    results = []
+
+    def measure(pages):
+        before = standin_handler.get_skip_stats()["entities_skipped"] if standin_handler else 0
+        ids, row = measure_paging(pages)
+
+        if standin_handler:
+            row["skip_cost_ms"] = standin_handler.skip_cost * 1000
+            row["entities_skipped"] = standin_handler.get_skip_stats()["entities_skipped"] - before
+            row["modelled_skip_seconds"] = round(row["entities_skipped"] * standin_handler.skip_cost / 1000, 3)
+
+        return ids, row
+
+    for resource, conditions, select in PAGED_COLLECTIONS:
+        skip_ids, skip_row = measure(mediasite.api_client.paginate(resource, get_filter_attributes(conditions), page_size, select=select))
+        keyset_ids, keyset_row = measure(mediasite.api_client.seek(resource, conditions, page_size, select=select))
+
+        for mode, row in (("$skip", skip_row), ("keyset", keyset_row)):
+            results.append(dict({"resource":resource, "paging":mode}, **row))
+
+        results[-1]["speedup"] = round(skip_row["seconds"] / keyset_row["seconds"], 2) if keyset_row["seconds"] else ""
+        results[-1]["same_entities"] = sorted(skip_ids) == sorted(keyset_ids)
+
+        if standin_handler and standin_handler.skip_cost:
+            modelled = [row["seconds"] + row["modelled_skip_seconds"] for row in (skip_row, keyset_row)]
+            results[-1]["speedup_with_modelled_skips"] = round(modelled[0] / modelled[1], 2) if modelled[1] else ""
+
+    return results
+
+def benchmark_async(mediasite, page_size=100, standin_handler=None):
+    """
+    Measures gathering whole collections with the threaded concurrent scan versus the asyncio client,
+    which requests every page after the first at once
+    """
+    results = []
+
+    try:
+        async_api_client = mediasite.get_async_api_client()
+    except ImportError as e:
+        return [{"error":str(e)}]
+
+    async def gather(resource, conditions, select):
+        start = time.perf_counter()
+        entities = await async_api_client.gather_pages(resource, get_filter_attributes(conditions), page_size, select=select)
+        return entities, time.perf_counter() - start
+
+    async def gather_all():
+        try:
+            return [await gather(resource, conditions, select) for resource, conditions, select in PAGED_COLLECTIONS]
+        finally:
+            await async_api_client.close()
+
+    gathered = asyncio.run(gather_all())
+
+    for (resource, conditions, select), (entities, async_seconds) in zip(PAGED_COLLECTIONS, gathered):
+        start = time.perf_counter()
+        pages = mediasite.api_client.scan(resource, get_filter_attributes(conditions), page_size, workers=8, select=select)
+        scan_ids = [entity["Id"] for entity in pages]
+        scan_seconds = time.perf_counter() - start
+
+        async_error = entities if type(entities) is str else ""
+        async_ids = [] if async_error else [entity["Id"] for entity in entities]
+
+        for client, ids, seconds, error in (("threads", scan_ids, scan_seconds, pages.error or ""), ("asyncio", async_ids, async_seconds, async_error)):
+            results.append({"resource":resource,
+                            "client":client,
+                            "entities":len(ids),
+                            "seconds":round(seconds, 3),
+                            "entities_per_second":round(len(ids) / seconds, 1) if seconds else "",
+                            "error":error
+                            })
+
+        results[-1]["same_entities"] = scan_ids == async_ids
+
+    return results
+
+#peak resident set size and cpu time are per process, so each decoding mode is measured in a process of its own
+DECODE_MODES = ("buffered", "streamed")
+
+def reset_peak_rss():
+    """
+    Resets the kernel's peak resident set size mark of this process where supported (Linux), so imports
+    and setup before the measurement do not set the peak
+
+    returns:
+        True if the peak was reset
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+def get_rusage():
+    """
+    Reads this process's current and peak resident set size and cpu time so far
+
+    returns:
+        tuple of resident set size in MB, peak resident set size in MB and cpu seconds (user plus system)
+    """
+    import resource
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+
+    #ru_maxrss is in bytes on macOS and in kilobytes elsewhere, and is never reset
+    rss = peak_rss = usage.ru_maxrss / (1024 * 1024) if sys.platform == "darwin" else usage.ru_maxrss / 1024
+
+    try:
+        with open("/proc/self/status") as status:
+            fields = dict(line.split(":", 1) for line in status if ":" in line)
+        rss = int(fields["VmRSS"].split()[0]) / 1024
+        peak_rss = int(fields["VmHWM"].split()[0]) / 1024
+    except (OSError, KeyError, ValueError):
+        pass
+
+    return rss, peak_rss, usage.ru_utime + usage.ru_stime
+
+def decode_worker(mode, config_data, page_size):
+    """
+    Pages through every full presentation entity, decoding each page whole or while it is still
+    arriving, without keeping the entities. Run in a child process by benchmark_decode.
+
+    returns:
+        dictionary with entity and page counts, peak resident set size growth, cpu and wall seconds
+        (without peak_reset the peak may have been set before the measurement, hiding the growth)
+    """
+    mediasite = controller.controller(config_data)
+
+    peak_reset = reset_peak_rss()
+    baseline_rss, baseline_peak_rss, start_cpu = get_rusage()
+    start = time.perf_counter()
+
+    pages = mediasite.api_client.paginate("Presentations", "", page_size, stream=mode == "streamed")
+    entities = sum(1 for entity in pages)
+
+    elapsed = time.perf_counter() - start
+    rss, peak_rss, end_cpu = get_rusage()
+
+    return {"entities":entities,
+            "pages":pages.pages,
+            "baseline_rss_mb":round(baseline_rss, 1),
+            "peak_rss_mb":round(peak_rss, 1),
+            "rss_growth_mb":round(peak_rss - baseline_rss, 1),
+            "peak_reset":peak_reset,
+            "cpu_seconds":round(end_cpu - start_cpu, 3),
+            "seconds":round(elapsed, 3),
+            "cpu_us_per_entity":round((end_cpu - start_cpu) * 1000000 / entities, 1) if entities else "",
+            "error":pages.error or ""
+            }
+
+def benchmark_decode(mediasite, page_size=100, standin_handler=None):
+    """
+    Measures peak memory (resident set size) and cpu time of paging through the full presentation
+    entities with pages decoded whole after they are read versus decoded while they are still arriving.
+    Each mode runs in a fresh child process so the peak of one does not hide the other.
+    """
+    try:
+        import resource
+    except ImportError as e:
+        return [{"error":"The resource module (not available on Windows) is required for the decode benchmark: "+str(e)}]
+
+    results = []
+
+    for mode in DECODE_MODES:
+        worker = subprocess.run([sys.executable, __file__, "--decode-worker", mode],
+                                input=json.dumps({"config":mediasite.config_data, "page_size":page_size}),
+                                capture_output=True, text=True)
+
+        if worker.returncode != 0:
+            results.append({"decoding":mode, "error":"Error: decode worker exited with "+str(worker.returncode)+": "+worker.stderr.strip()[-500:]})
+            continue
+
+        results.append(dict({"decoding":mode}, **json.loads(worker.stdout)))
+
+    if len(results) == len(DECODE_MODES) and all("rss_growth_mb" in row for row in results):
+        buffered, streamed = results
+        results[-1]["rss_growth_ratio"] = round(streamed["rss_growth_mb"] / buffered["rss_growth_mb"], 2) if buffered["rss_growth_mb"] else ""
+        results[-1]["cpu_ratio"] = round(streamed["cpu_seconds"] / buffered["cpu_seconds"], 2) if buffered["cpu_seconds"] else ""
+
+    return results
+
+BENCHMARKS = {
+    "projection":benchmark_projection,
+    "transport":benchmark_transport,
+    "paging":benchmark_paging,
+    "async":benchmark_async,
+    "decode":benchmark_decode
+    }
+
+def print_table(name, rows):
+    """
+    Prints benchmark result rows as an aligned text table
+    """
+    print("\n== " + name + " ==")
+    if not rows:
+        return
+
+    columns = []
+    for row in rows:
+        columns += [column for column in row if column not in columns]
+
+    widths = [max(len(column), *[len(str(row.get(column, ""))) for row in rows]) for column in columns]
+
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row.get(column, "")).ljust(width) for column, width in zip(columns, widths)))
+
+if __name__ == "__main__":
+    """
+    args:
+        --file: json configuration file
+        --standin: run against a local Mediasite API stand-in instead of the installation in --file
+        --latency-ms: milliseconds of latency the stand-in adds to every request
+        --skip-cost-ms: modelled stand-in milliseconds per 1000 entities skipped with $skip (reported, not slept on)
+        --presentations: number of presentations the stand-in generates
+        --catalogs: number of catalogs the stand-in generates
+        --max-page-size: most entities the stand-in returns per page, whatever $top requests
+        --benchmarks: comma separated benchmark names
+        --page-size: number of entities per request
+        --output: optional json file to write results to
+        --decode-worker: internal, runs one decode benchmark mode with its configuration read from stdin
+    """
+
+    parser = argparse.ArgumentParser(description="Mediasite client benchmarks")
+    parser.add_argument("--file", help="json configuration file")
+    parser.add_argument("--standin", action="store_true", help="run against a local Mediasite API stand-in")
+    parser.add_argument("--latency-ms", type=float, default=0, help="latency added to every stand-in request")
+    parser.add_argument("--skip-cost-ms", type=float, default=0, help="modelled stand-in milliseconds per 1000 entities skipped")
+    parser.add_argument("--presentations", type=int, default=standin.DEFAULT_SIZES["Presentations"], help="stand-in presentations")
+    parser.add_argument("--catalogs", type=int, default=standin.DEFAULT_SIZES["Catalogs"], help="stand-in catalogs")
+    parser.add_argument("--max-page-size", type=int, default=1000, help="stand-in cap on entities per page")
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS), help="comma separated benchmarks: "+", ".join(BENCHMARKS))
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--output", help="json file to write results to")
+    parser.add_argument("--decode-worker", choices=DECODE_MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.decode_worker:
+        worker_options = json.load(sys.stdin)
+        print(json.dumps(decode_worker(args.decode_worker, worker_options["config"], worker_options["page_size"])))
+        sys.exit(0)
+
+    if not args.file and not args.standin:
+        parser.error("--file or --standin is required")
+
+    config_data = {}
+    if args.file:
+        with open(args.file) as config_file:
+            config_data = json.load(config_file)
+
+    standin_server = None
+    if args.standin:
+        standin_server = standin.standin_server(latency=args.latency_ms / 1000, skip_cost=args.skip_cost_ms / 1000,
+                                                max_page_size=args.max_page_size, sizes={"Presentations":args.presentations, "Catalogs":args.catalogs})
+        standin_server.start()
+        config_data = standin_server.get_config(config_data)
+
+    mediasite = controller.controller(config_data)
+
+    results = {}
+    for name in args.benchmarks.split(","):
+        if name not in BENCHMARKS:
+            parser.error("unknown benchmark: "+name)
+
+        results[name] = BENCHMARKS[name](mediasite, args.page_size, standin_server.standin if standin_server else None)
+        print_table(name, results[name])
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=4)
+
+    if standin_server:
+        standin_server.stop()
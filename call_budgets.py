@@ -0,0 +1,249 @@
+"""
+API call-count regression harness. Runs high-level operations against the local Mediasite API
+stand-in (or against cassettes recorded from it) and checks the number and kind of http calls
+each one makes against the budgets in config/call_budgets.json, for example:
+
+    python call_budgets.py
+    python call_budgets.py --operations delete_folder_by_path --record cassettes/
+    python call_budgets.py --replay cassettes/
+    python call_budgets.py --update
+
+Exits with status 1 when any operation makes more calls of any kind than its budget allows.
+
+License: MIT - see license.txt
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+import datetime
+import tempfile
+import assets.mediasite.controller as controller
+import assets.mediasite.standin as standin
+import assets.mediasite.transport as transport
+
+BUDGET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", "call_budgets.json")
+
+#fixed seed and sizes keep the stand-in data, and so the call counts, identical between runs
+STANDIN_OPTIONS = {
+    "seed":1,
+    "sizes":{"Folders":60, "Presentations":400, "Schedules":40, "Catalogs":30, "Recorders":8}
+    }
+
+def get_schedule_data(mediasite):
+    """
+    Creates one row of scheduling data in the form controller.process_scheduling_data_row expects
+    """
+    start = datetime.datetime(2030, 1, 7, 9, 0, 10)
+    end = datetime.datetime(2030, 1, 7, 10, 0, 10)
+
+    return {
+        "mediasite_folders":"Call Budgets/Spring/Course 101",
+        "mediasite_folder_root_id":"",
+        "catalog_include":True,
+        "catalog_name":"Course 101",
+        "catalog_description":"",
+        "catalog_enable_download":True,
+        "catalog_allow_links":False,
+        "module_include":True,
+        "module_name":"Course 101",
+        "module_id":"CALL-BUDGET-101",
+        "schedule_parent_folder_id":"",
+        "schedule_template":mediasite.model.get_templates()[0]["Name"],
+        "schedule_name":"Course 101",
+        "schedule_naming_scheme":"Record Date",
+        "schedule_recorder":mediasite.model.get_recorders()[0]["name"],
+        "schedule_recurrence":"One Time Only",
+        "schedule_auto_delete":"False",
+        "schedule_start_datetime_utc_string":start.strftime("%Y-%m-%dT%H:%M:%S"),
+        "schedule_end_datetime_utc_string":end.strftime("%Y-%m-%dT%H:%M:%S"),
+        "schedule_start_datetime_utc":start,
+        "schedule_end_datetime_utc":end,
+        "schedule_start_datetime_local_string":start.strftime("%Y-%m-%dT%H:%M:%S"),
+        "schedule_end_datetime_local_string":end.strftime("%Y-%m-%dT%H:%M:%S"),
+        "schedule_start_datetime_local":start,
+        "schedule_end_datetime_local":end,
+        "schedule_duration":"60",
+        "schedule_recurrence_freq":"1",
+        "schedule_days_of_week":{"Sunday":False, "Monday":True, "Tuesday":False, "Wednesday":False,
+                                "Thursday":False, "Friday":False, "Saturday":False}
+        }
+
+def setup_reference_data(mediasite, name):
+    mediasite.folder.gather_root_folder_id()
+    mediasite.template.gather_templates()
+    mediasite.recorder.gather_recorders()
+
+    if name.endswith("_indexed"):
+        mediasite.folder.load_index()
+
+def run_process_scheduling_data_row(mediasite, schedule_data):
+    mediasite.process_scheduling_data_row(schedule_data)
+
+def run_process_scheduling_data_rows(mediasite, schedule_data):
+    #rows of one run sharing the "Call Budgets/Spring" folders
+    path_cache = mediasite.folder.create_path_cache()
+
+    for course in ("101", "102", "103"):
+        row = dict(schedule_data, mediasite_folders="Call Budgets/Spring/Course "+course, catalog_name="Course "+course,
+                    module_name="Course "+course, module_id="CALL-BUDGET-"+course, schedule_name="Course "+course)
+        mediasite.process_scheduling_data_row(row, path_cache)
+
+def run_delete_folder_by_path(mediasite, schedule_data):
+    mediasite.folder.delete_folder_by_path("/Folder 0")
+
+def run_delete_folder_by_path_indexed(mediasite, schedule_data):
+    mediasite.folder.delete_folder_by_path("/Folder 0")
+
+def run_get_child_folders(mediasite, schedule_data):
+    mediasite.folder.get_child_folders(mediasite.model.get_root_parent_folder_id(), select=("Id",), breadth_first=False)
+
+def run_get_child_folders_breadth_first(mediasite, schedule_data):
+    mediasite.folder.get_child_folders(mediasite.model.get_root_parent_folder_id(), select=("Id",), breadth_first=True)
+
+def run_get_presentations_and_schedules_by_parent_folder_name(mediasite, schedule_data):
+    mediasite.folder.get_presentations_and_schedules_by_parent_folder_name("Folder 0")
+
+def run_get_all_scheduled_recordings(mediasite, schedule_data):
+    mediasite.recorder.get_all_scheduled_recordings()
+
+def run_gather_presentation_report_export(mediasite, schedule_data):
+    with tempfile.TemporaryDirectory() as export_destination:
+        mediasite.report.gather_presentation_report_export("xml", "weekly", "budget", export_destination, "Presentation Report 0")
+
+#operations in the order they are run, each run on freshly loaded reference data (and a loaded folder index for *_indexed)
+OPERATIONS = {
+    "process_scheduling_data_row":run_process_scheduling_data_row,
+    "process_scheduling_data_rows":run_process_scheduling_data_rows,
+    "delete_folder_by_path":run_delete_folder_by_path,
+    "delete_folder_by_path_indexed":run_delete_folder_by_path_indexed,
+    "get_child_folders":run_get_child_folders,
+    "get_child_folders_breadth_first":run_get_child_folders_breadth_first,
+    "get_presentations_and_schedules_by_parent_folder_name":run_get_presentations_and_schedules_by_parent_folder_name,
+    "get_all_scheduled_recordings":run_get_all_scheduled_recordings,
+    "gather_presentation_report_export":run_gather_presentation_report_export
+    }
+
+def measure_operation(name, config_data, cassette_dir=None, replay=False):
+    """
+    Runs one operation, counting the calls it makes after reference data has been loaded
+
+    params:
+        name: operation name within OPERATIONS
+        config_data: controller configuration
+        cassette_dir: optional directory cassettes are written to (or read from when replaying)
+        replay: when true, responses are served from the cassette instead of the stand-in
+
+    returns:
+        dictionary of "METHOD resource" to number of requests
+    """
+    mediasite = controller.controller(config_data)
+    serviceroot = mediasite.api_client.serviceroot
+    cassette_path = os.path.join(cassette_dir, name + ".json") if cassette_dir else None
+
+    if replay:
+        mediasite.api_client.transport = transport.replay_transport.load(cassette_path, serviceroot)
+    else:
+        mediasite.api_client.transport = transport.recording_transport(mediasite.api_client.transport, serviceroot)
+
+    setup_reference_data(mediasite, name)
+    schedule_data = get_schedule_data(mediasite)
+
+    #only calls made by the operation itself count against its budget
+    setup_calls = len(mediasite.api_client.transport.get_calls())
+
+    OPERATIONS[name](mediasite, schedule_data)
+
+    if cassette_path and not replay:
+        mediasite.api_client.transport.save(cassette_path)
+
+    return mediasite.api_client.transport.get_call_counts(setup_calls)
+
+def check_budget(counts, budget):
+    """
+    Compares observed call counts with a budget
+
+    returns:
+        list of violation messages (empty when the operation is within budget)
+    """
+    violations = []
+
+    for call, count in sorted(counts.items()):
+        allowed = budget.get("calls", {}).get(call)
+        if allowed is None:
+            violations.append("new call "+call+" made "+str(count)+" times")
+        elif count > allowed:
+            violations.append(call+" made "+str(count)+" times, budget is "+str(allowed))
+
+    total = sum(counts.values())
+    if "total" in budget and total > budget["total"]:
+        violations.append(str(total)+" calls in total, budget is "+str(budget["total"]))
+
+    return violations
+
+if __name__ == "__main__":
+    """
+    args:
+        --operations: comma separated operation names
+        --budgets: json budget table
+        --record: directory to write cassettes of each operation to
+        --replay: directory to replay cassettes from instead of running the stand-in
+        --update: rewrite the budget table with the observed call counts
+    """
+
+    parser = argparse.ArgumentParser(description="Mediasite API call-count regression harness")
+    parser.add_argument("--operations", default=",".join(OPERATIONS), help="comma separated operations: "+", ".join(OPERATIONS))
+    parser.add_argument("--budgets", default=BUDGET_FILE, help="json budget table")
+    parser.add_argument("--record", help="directory to write cassettes to")
+    parser.add_argument("--replay", help="directory to replay cassettes from")
+    parser.add_argument("--update", action="store_true", help="rewrite the budget table with observed counts")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    with open(args.budgets) as budget_file:
+        budgets = json.load(budget_file)
+
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+
+    failed = False
+
+    for name in args.operations.split(","):
+        if name not in OPERATIONS:
+            parser.error("unknown operation: "+name)
+
+        if args.replay:
+            counts = measure_operation(name, {"mediasite_base_url":"http://replay" + standin.API_PATH, "mediasite_api_secret":"",
+                                            "mediasite_api_user":"", "mediasite_api_pass":""}, args.replay, replay=True)
+        else:
+            #every operation gets a fresh stand-in so earlier operations cannot change its data
+            with standin.standin_server(**STANDIN_OPTIONS) as server:
+                counts = measure_operation(name, server.get_config(), args.record)
+
+        total = sum(counts.values())
+
+        if args.update:
+            budgets[name] = {"total":total, "calls":dict(sorted(counts.items()))}
+            print(name+": "+str(total)+" calls (budget updated)")
+            continue
+
+        violations = check_budget(counts, budgets.get(name, {}))
+        print(name+": "+str(total)+" calls, budget "+str(budgets.get(name, {}).get("total", "none"))+(" FAILED" if violations else " ok"))
+
+        for violation in violations:
+            print("    "+violation)
+
+        failed = failed or bool(violations)
+
+    if args.update:
+        #keep the table in the order operations are run
+        budgets = dict(sorted(budgets.items(), key=lambda item: list(OPERATIONS).index(item[0]) if item[0] in OPERATIONS else len(OPERATIONS)))
+
+        with open(args.budgets, "w") as budget_file:
+            json.dump(budgets, budget_file, indent=4)
+            budget_file.write("\n")
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,64 @@
+"""
+Tests of the asyncio api client against the local Mediasite API stand-in, run with:
+
+    python -m pytest test_async_api_client.py
+
+License: MIT - see license.txt
+"""
+
+import asyncio
+import unittest
+import assets.mediasite.controller as controller
+import assets.mediasite.standin as standin
+
+class async_api_client_tests(unittest.TestCase):
+    def setUp(self):
+        #a page cap below the requested page size, as some servers apply
+        self.server = standin.standin_server(seed=1, max_page_size=40, sizes={"Presentations":250, "Catalogs":30})
+        self.server.start()
+        self.mediasite = controller.controller(self.server.get_config())
+
+    def tearDown(self):
+        self.server.stop()
+
+    def gather(self, *args, **kwargs):
+        async_api_client = self.mediasite.get_async_api_client()
+
+        async def gather():
+            try:
+                return await async_api_client.gather_pages(*args, **kwargs)
+            finally:
+                await async_api_client.close()
+
+        return asyncio.run(gather())
+
+    def test_capped_pages_are_not_dropped(self):
+        expected = [presentation["Id"] for presentation in self.server.standin.data.query("Presentations")]
+
+        presentations = self.gather("Presentations", "", 100, select=("Id",))
+
+        self.assertEqual([presentation["Id"] for presentation in presentations], expected)
+
+    def test_odata_error_first_page(self):
+        result = self.gather("Presentations", "$filter=Title eq", 100)
+
+        self.assertIsInstance(result, str)
+        self.assertTrue(result.startswith("Error: "))
+
+    def test_empty_collection(self):
+        self.assertEqual(self.gather("Presentations", "$filter=Title eq 'no such title'", 100), [])
+
+    def test_get_all_presentations_async(self):
+        expected = [presentation["Id"] for presentation in self.server.standin.data.query("Presentations")
+                    if presentation["Status"] == "Unavailable"]
+
+        async def gather():
+            try:
+                return await self.mediasite.presentation.get_all_presentations_async(select=("Id",))
+            finally:
+                await self.mediasite.get_async_api_client().close()
+
+        self.assertEqual([presentation["Id"] for presentation in asyncio.run(gather())], expected)
+
+if __name__ == "__main__":
+    unittest.main()
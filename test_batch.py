@@ -0,0 +1,160 @@
+"""
+Tests of OData $batch requests and multipart response parsing, run with:
+
+    python -m pytest test_batch.py
+
+License: MIT - see license.txt
+"""
+
+import unittest
+import assets.mediasite.controller as controller
+import assets.mediasite.standin as standin
+import assets.mediasite.batch as batch
+from call_budgets import STANDIN_OPTIONS
+
+BATCH_RESPONSE = (b"--batchresponse_1\r\n"
+                b"Content-Type: application/http\r\n"
+                b"Content-Transfer-Encoding: binary\r\n\r\n"
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: application/json\r\n\r\n"
+                b'{"value":[{"Id":"t1"}]}\r\n'
+                b"--batchresponse_1\r\n"
+                b"Content-Type: multipart/mixed; boundary=changesetresponse_1\r\n\r\n"
+                b"--changesetresponse_1\r\n"
+                b"Content-Type: application/http\r\n"
+                b"Content-Transfer-Encoding: binary\r\n\r\n"
+                b"HTTP/1.1 201 Created\r\n"
+                b"Content-Type: application/json\r\n\r\n"
+                b'{"Id":"c1"}\r\n'
+                b"--changesetresponse_1--\r\n"
+                b"--batchresponse_1\r\n"
+                b"Content-Type: multipart/mixed; boundary=changesetresponse_2\r\n\r\n"
+                b"--changesetresponse_2\r\n"
+                b"Content-Type: application/http\r\n"
+                b"Content-Transfer-Encoding: binary\r\n\r\n"
+                b"HTTP/1.1 400 Bad Request\r\n"
+                b"Content-Type: application/json\r\n\r\n"
+                b'{"odata.error":{"code":"BadRequest","message":{"lang":"en-US","value":"Name is required"}}}\r\n'
+                b"--changesetresponse_2--\r\n"
+                b"--batchresponse_1--\r\n")
+
+BATCH_CONTENT_TYPE = 'multipart/mixed; boundary="batchresponse_1"'
+
+class sent_response():
+    def __init__(self, content, status_code=202):
+        self.status_code = status_code
+        self.headers = {"Content-Type":BATCH_CONTENT_TYPE}
+        self.content = content
+        self.text = content.decode("utf-8")
+
+class fake_api_client():
+    def __init__(self, content):
+        self.serviceroot = "http://localhost/mediasite/api/v1/"
+        self.content = content
+        self.invalidated = []
+
+    def send(self, method, url, json=None, data=None, headers=None, stream=False):
+        return sent_response(self.content)
+
+    def invalidate_cache(self, resource):
+        self.invalidated.append(resource)
+
+class parse_batch_response_tests(unittest.TestCase):
+    def test_failed_part(self):
+        responses = batch.parse_batch_response(BATCH_RESPONSE, BATCH_CONTENT_TYPE)
+
+        self.assertEqual([response.status_code for response in responses], [200, 201, 400])
+        self.assertEqual([response.ok for response in responses], [True, True, False])
+        self.assertEqual(responses[0].json()["value"], [{"Id":"t1"}])
+        self.assertEqual(responses[1].json()["Id"], "c1")
+        self.assertEqual(responses[2].json()["odata.error"]["message"]["value"], "Name is required")
+
+    def test_lf_line_endings(self):
+        responses = batch.parse_batch_response(BATCH_RESPONSE.replace(b"\r\n", b"\n"), BATCH_CONTENT_TYPE)
+
+        self.assertEqual([response.status_code for response in responses], [200, 201, 400])
+        self.assertEqual(responses[1].headers["content-type"], "application/json")
+
+    def test_truncated_body(self):
+        with self.assertRaisesRegex(ValueError, "closing delimiter"):
+            batch.parse_batch_response(BATCH_RESPONSE[:-40], BATCH_CONTENT_TYPE)
+
+    def test_part_without_boundary(self):
+        content = BATCH_RESPONSE.replace(b"multipart/mixed; boundary=changesetresponse_2", b"multipart/mixed")
+
+        with self.assertRaisesRegex(ValueError, "without a boundary"):
+            batch.parse_batch_response(content, BATCH_CONTENT_TYPE)
+
+    def test_get_boundary(self):
+        self.assertEqual(batch.get_boundary(BATCH_CONTENT_TYPE), "batchresponse_1")
+        self.assertEqual(batch.get_boundary("multipart/mixed;Boundary=b1"), "b1")
+        self.assertEqual(batch.get_boundary("application/json"), "")
+
+class send_tests(unittest.TestCase):
+    def test_failed_part_maps_to_its_operation(self):
+        api_client = fake_api_client(BATCH_RESPONSE)
+        operations = batch.batch(api_client)
+        operations.add("get", "Templates")
+        operations.add("post", "Catalogs", "", {"Name":"Course 101"})
+        operations.add("post", "Catalogs", "", {})
+
+        responses = operations.execute()
+
+        self.assertEqual([response.status_code for response in responses], [200, 201, 400])
+        self.assertEqual(api_client.invalidated, ["Catalogs", "Catalogs"])
+
+    def test_response_count_mismatch(self):
+        operations = batch.batch(fake_api_client(BATCH_RESPONSE))
+        for i in range(4):
+            operations.add("get", "Templates")
+
+        with self.assertLogs(level="ERROR"):
+            responses = operations.execute()
+
+        self.assertEqual(responses, ["Error: batch returned 3 responses for 4 operations"] * 4)
+
+class malformed_response_tests(unittest.TestCase):
+    def execute(self, content):
+        operations = batch.batch(fake_api_client(content))
+        operations.add("get", "Templates")
+        operations.add("post", "Catalogs", "", {"Name":"Course 101"})
+
+        with self.assertLogs(level="ERROR"):
+            return operations.execute()
+
+    def test_truncated_body(self):
+        responses = self.execute(BATCH_RESPONSE[:len(BATCH_RESPONSE) // 2])
+
+        self.assertEqual(len(set(responses)), 1)
+        self.assertTrue(responses[0].startswith("Error: unable to parse batch response: multipart body ends before"))
+
+    def test_invalid_status_line(self):
+        responses = self.execute(BATCH_RESPONSE.replace(b"HTTP/1.1 201 Created", b"HTTP/1.1"))
+
+        self.assertTrue(responses[0].startswith("Error: unable to parse batch response: invalid status line"))
+
+class standin_batch_tests(unittest.TestCase):
+    def setUp(self):
+        self.server = standin.standin_server(**STANDIN_OPTIONS)
+        self.server.start()
+        self.mediasite = controller.controller(self.server.get_config())
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_failed_write_does_not_fail_others(self):
+        operations = self.mediasite.api_client.batch()
+        read = operations.add("get", "Templates")
+        missing = operations.add("patch", "Catalogs('no-such-catalog')", "", {"Name":"Renamed"})
+        created = operations.add("post", "Catalogs", "", {"Name":"Batched Catalog", "LinkedFolderId":""})
+
+        operations.execute()
+
+        self.assertTrue(read.response.ok)
+        self.assertFalse(missing.response.ok)
+        self.assertIn("odata.error", missing.response.json())
+        self.assertEqual(created.response.status_code, 201)
+        self.assertIn("Batched Catalog", [catalog["Name"] for catalog in self.server.standin.data.query("Catalogs")])
+
+if __name__ == "__main__":
+    unittest.main()
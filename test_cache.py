@@ -0,0 +1,91 @@
+"""
+Tests of the GET response cache, run with:
+
+    python -m pytest test_cache.py
+
+License: MIT - see license.txt
+"""
+
+import unittest
+import assets.mediasite.controller as controller
+import assets.mediasite.standin as standin
+from assets.mediasite.cache import response_cache
+from call_budgets import STANDIN_OPTIONS
+
+class cached_response():
+    def __init__(self, etag):
+        self.headers = {"ETag":etag}
+
+class response_cache_tests(unittest.TestCase):
+    def setUp(self):
+        self.cache = response_cache({"Templates":60}, max_entries=2)
+
+    def expire(self, url):
+        entry, fresh = self.cache.lookup(url)
+        entry.expires = 0
+        return entry
+
+    def test_refresh_extends_entry(self):
+        self.cache.store("Templates('1')", "Templates('1')", cached_response('"1"'))
+        entry = self.expire("Templates('1')")
+
+        self.assertIs(self.cache.refresh("Templates('1')", "Templates('1')", entry), entry.response)
+        self.assertEqual(self.cache.lookup("Templates('1')"), (entry, True))
+
+    def test_refresh_after_eviction(self):
+        self.cache.store("Templates('1')", "Templates('1')", cached_response('"1"'))
+        entry = self.expire("Templates('1')")
+
+        self.cache.store("Templates('2')", "Templates('2')", cached_response('"2"'))
+        self.cache.store("Templates('3')", "Templates('3')", cached_response('"3"'))
+
+        self.assertIs(self.cache.refresh("Templates('1')", "Templates('1')", entry), entry.response)
+        self.assertEqual(self.cache.lookup("Templates('1')"), (None, False))
+        self.assertEqual(len(self.cache.entries), 2)
+
+    def test_stale_entry_offers_validators(self):
+        self.cache.store("Templates", "Templates", cached_response('"1"'))
+        entry = self.expire("Templates")
+
+        self.assertEqual(self.cache.lookup("Templates"), (entry, False))
+        self.assertEqual(self.cache.get_conditional_headers(entry), {"If-None-Match":'"1"'})
+
+    def test_invalidate_drops_collection(self):
+        self.cache.store("Templates", "Templates", cached_response('"1"'))
+        self.cache.invalidate("Templates('1')")
+
+        self.assertEqual(self.cache.lookup("Templates"), (None, False))
+        self.assertEqual(self.cache.get_stats()["invalidations"], 1)
+
+class cached_get_tests(unittest.TestCase):
+    def setUp(self):
+        self.server = standin.standin_server(**STANDIN_OPTIONS)
+        self.server.start()
+        self.mediasite = controller.controller(self.server.get_config({"mediasite_cache_ttls":{"Templates":60}}))
+        self.api_client = self.mediasite.api_client
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_not_modified_after_invalidation(self):
+        first = self.api_client.request("get", "Templates", "", "")
+        url = next(iter(self.api_client.response_cache.entries))
+        self.api_client.response_cache.entries[url].expires = 0
+
+        #another thread writes to the collection while the conditional request is in flight
+        send = self.api_client.transport
+        def invalidate_then_send(method, url, json=None, data=None, headers=None, stream=False):
+            self.api_client.invalidate_cache("Templates")
+            return send(method, url, json, data, headers, stream)
+        self.api_client.transport = invalidate_then_send
+
+        second = self.api_client.request("get", "Templates", "", "")
+
+        #the 304 answers this request, but the invalidated entry is not cached again
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(self.api_client.get_cache_stats()["revalidated"], 1)
+        self.assertEqual(self.api_client.response_cache.lookup(url), (None, False))
+
+if __name__ == "__main__":
+    unittest.main()
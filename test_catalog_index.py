@@ -0,0 +1,99 @@
+"""
+Tests of the in-memory catalog index, run with:
+
+    python -m pytest test_catalog_index.py
+
+License: MIT - see license.txt
+"""
+
+import unittest
+import assets.mediasite.controller as controller
+import assets.mediasite.standin as standin
+from assets.mediasite.catalog_index import catalog_index
+from call_budgets import STANDIN_OPTIONS
+
+def get_catalog(catalog_id, name, folder_id):
+    return {"Id":catalog_id, "Name":name, "LinkedFolderId":folder_id}
+
+class catalog_index_tests(unittest.TestCase):
+    def setUp(self):
+        self.index = catalog_index()
+        self.index.load([get_catalog("1", "Course 101", "f1"), get_catalog("2", "Course 102", "f2")])
+
+    def test_lookups(self):
+        self.assertEqual(self.index.get_catalog("1")["Name"], "Course 101")
+        self.assertEqual([catalog["Id"] for catalog in self.index.get_by_linked_folder("f2")], ["2"])
+        self.assertEqual([catalog["Id"] for catalog in self.index.find_by_name("COURSE 101")], ["1"])
+
+    def test_changed_catalog_moves(self):
+        self.index.add(get_catalog("1", "Renamed", "f2"))
+
+        self.assertEqual(self.index.find_by_name("Course 101"), [])
+        self.assertEqual(self.index.get_by_linked_folder("f1"), [])
+        self.assertEqual(sorted(catalog["Id"] for catalog in self.index.get_by_linked_folder("f2")), ["1", "2"])
+
+    def test_changes_during_sweep_are_kept(self):
+        since = self.index.begin_sweep()
+
+        #the sweep saw catalogs 1 and 2, then catalog 3 was created and catalog 1 deleted before it finished
+        self.index.add(get_catalog("3", "Course 103", "f3"))
+        self.index.remove("1")
+        self.index.load([get_catalog("1", "Course 101", "f1"), get_catalog("2", "Course 102", "f2")], since)
+
+        self.assertEqual(sorted(catalog["Id"] for catalog in self.index.get_all()), ["2", "3"])
+        self.assertEqual(self.index.get_by_linked_folder("f1"), [])
+        self.assertEqual(self.index.journal, [])
+
+    def test_changes_before_sweep_are_not_replayed(self):
+        self.index.add(get_catalog("3", "Course 103", "f3"))
+        since = self.index.begin_sweep()
+        self.index.load([get_catalog("2", "Course 102", "f2")], since)
+
+        self.assertEqual([catalog["Id"] for catalog in self.index.get_all()], ["2"])
+
+class revalidation_tests(unittest.TestCase):
+    def setUp(self):
+        self.server = standin.standin_server(**STANDIN_OPTIONS)
+        self.server.start()
+        self.mediasite = controller.controller(self.server.get_config())
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_index_holds_whole_catalogs(self):
+        index = self.mediasite.catalog.get_catalog_index()
+        catalog = self.mediasite.model.get_catalogs()[0]
+
+        self.assertIs(index, self.mediasite.model.get_catalog_index())
+        self.assertIn("LimitSearchToCatalog", catalog)
+
+        #a projected sweep is returned to its caller without replacing the index
+        projected = self.mediasite.catalog.get_all_catalogs(select=("Id", "Name"))
+
+        self.assertNotIn("LimitSearchToCatalog", projected[0])
+        self.assertIn("LimitSearchToCatalog", self.mediasite.model.get_catalog_index().get_catalog(catalog["Id"]))
+        self.assertEqual(index.journal, [])
+
+    def test_catalogs_created_during_revalidation(self):
+        self.mediasite.catalog.get_all_catalogs()
+        deleted = self.mediasite.model.get_catalogs()[0]["Id"]
+        created = []
+
+        #the main thread creates and deletes catalogs while the revalidation sweep is reading pages
+        send = self.mediasite.api_client.transport
+        def send_during_sweep(method, url, json=None, data=None, headers=None, stream=False):
+            rsp = send(method, url, json, data, headers, stream)
+            if method == "get" and "/Catalogs?" in url and not created:
+                created.append(self.mediasite.catalog.create_catalog("Created During Sweep", "", self.mediasite.model.get_root_parent_folder_id() or "")["Id"])
+                self.mediasite.catalog.delete_catalog(deleted)
+            return rsp
+        self.mediasite.api_client.transport = send_during_sweep
+
+        self.assertEqual(self.mediasite.revalidate_metadata(["Catalogs"]), [])
+
+        ids = [catalog["Id"] for catalog in self.mediasite.model.get_catalogs()]
+        self.assertIn(created[0], ids)
+        self.assertNotIn(deleted, ids)
+
+if __name__ == "__main__":
+    unittest.main()
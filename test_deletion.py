@@ -0,0 +1,93 @@
+"""
+Tests of the folder deletion pipeline against the local Mediasite API stand-in, run with:
+
+    python -m pytest test_deletion.py
+
+License: MIT - see license.txt
+"""
+
+import unittest
+import assets.mediasite.controller as controller
+import assets.mediasite.standin as standin
+from call_budgets import STANDIN_OPTIONS
+
+class delete_folder_by_path_tests(unittest.TestCase):
+    def setUp(self):
+        self.server = standin.standin_server(**STANDIN_OPTIONS)
+        self.server.start()
+        self.mediasite = controller.controller(self.server.get_config())
+        self.data = self.server.standin.data
+
+        #Teardown/Fall/CHEM/1113 and Teardown/Spring, each course folder holding a presentation
+        self.folders = {"Teardown":self.add_folder("Teardown", self.mediasite.model.get_root_parent_folder_id())}
+        self.folders["Fall"] = self.add_folder("Fall", self.folders["Teardown"])
+        self.folders["CHEM"] = self.add_folder("CHEM", self.folders["Fall"])
+        self.folders["1113"] = self.add_folder("1113", self.folders["CHEM"])
+        self.folders["Spring"] = self.add_folder("Spring", self.folders["Teardown"])
+
+        self.presentations = {name:self.data.add("Presentations", {"Title":"Lecture in "+name, "ParentFolderId":self.folders[name], "Status":"Viewable",
+                                                                    "RecordDate":"2018-01-01T00:00:00Z", "LastModified":"2018-01-01T00:00:00Z"})["Id"]
+                                for name in ("1113", "Spring")}
+
+        #folders are recorded in the order their deletes are requested, and requests for failing ids are sent for a missing one
+        self.deleted_folders = []
+        self.failing = set()
+        send = self.mediasite.api_client.transport
+        def record_deletes(method, url, json=None, data=None, headers=None, stream=False):
+            if "/DeleteFolder" in url:
+                self.deleted_folders.append(url.split("'")[1])
+            if method != "get":
+                for failing_id in self.failing:
+                    url = url.replace("('"+failing_id+"')", "('missing')")
+            return send(method, url, json, data, headers, stream)
+        self.mediasite.api_client.transport = record_deletes
+
+    def tearDown(self):
+        self.server.stop()
+
+    def add_folder(self, name, parent_id):
+        return self.data.add("Folders", {"Name":name, "ParentFolderId":parent_id, "Recycled":False, "Owner":"MediasiteAdmin",
+                                        "Description":"", "LastModified":"2018-01-01T00:00:00Z"})["Id"]
+
+    def get_deleted_names(self):
+        names = {folder_id:name for name, folder_id in self.folders.items()}
+        return [names[folder_id] for folder_id in self.deleted_folders]
+
+    def test_children_deleted_before_parents(self):
+        stats = self.mediasite.folder.delete_folder_by_path("/Teardown")
+
+        deleted = self.get_deleted_names()
+        self.assertEqual(sorted(deleted), sorted(self.folders))
+        for child, parent in (("1113", "CHEM"), ("CHEM", "Fall"), ("Fall", "Teardown"), ("Spring", "Teardown")):
+            self.assertLess(deleted.index(child), deleted.index(parent))
+
+        self.assertEqual((stats["total"], stats["completed"], stats["errors"]), (7, 7, 0))
+        self.assertNotIn(self.presentations["1113"], self.data.collections["Presentations"])
+
+    def test_failed_content_keeps_ancestors(self):
+        self.failing.add(self.presentations["1113"])
+
+        with self.assertLogs(level="ERROR"):
+            stats = self.mediasite.folder.delete_folder_by_path("/Teardown")
+
+        #the folder holding the presentation and every folder above it are kept, the sibling branch is deleted
+        self.assertEqual(self.get_deleted_names(), ["Spring"])
+        self.assertIn(self.presentations["1113"], self.data.collections["Presentations"])
+        self.assertFalse(self.data.collections["Folders"][self.folders["Teardown"]]["Recycled"])
+        self.assertEqual((stats["total"], stats["completed"], stats["errors"]), (7, 7, 5))
+
+    def test_failed_folder_delete_keeps_ancestors(self):
+        self.failing.add(self.folders["CHEM"])
+
+        with self.assertLogs(level="ERROR"):
+            stats = self.mediasite.folder.delete_folder_by_path("/Teardown")
+
+        deleted = self.get_deleted_names()
+        self.assertEqual(sorted(deleted), ["1113", "CHEM", "Spring"])
+        self.assertNotIn("Fall", deleted)
+        self.assertNotIn("Teardown", deleted)
+        self.assertFalse(self.data.collections["Folders"][self.folders["Fall"]]["Recycled"])
+        self.assertEqual(stats["errors"], 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+Tests of incremental presentation sync against the local Mediasite API stand-in, run with:
+
+    python -m pytest test_entity_sync.py
+
+License: MIT - see license.txt
+"""
+
+import os
+import tempfile
+import unittest
+import assets.mediasite.controller as controller
+import assets.mediasite.standin as standin
+from assets.mediasite.entity_sync import entity_sync
+from call_budgets import STANDIN_OPTIONS
+
+class crawl_tests(unittest.TestCase):
+    def test_conditions(self):
+        sync = entity_sync("Presentations", "Status eq 'Unavailable'")
+
+        self.assertEqual(entity_sync("Presentations").get_conditions(), "")
+        self.assertEqual(sync.get_conditions("2020-01-02T03:04:05Z"), "Status eq 'Unavailable' and LastModified ge datetime'2020-01-02T03:04:05'")
+
+class presentation_sync_tests(unittest.TestCase):
+    def setUp(self):
+        self.server = standin.standin_server(**STANDIN_OPTIONS)
+        self.server.start()
+        self.mediasite = controller.controller(self.server.get_config())
+        self.data = self.server.standin.data
+
+    def tearDown(self):
+        self.server.stop()
+
+    def get_expected_ids(self):
+        return sorted(presentation["Id"] for presentation in self.data.query("Presentations") if presentation["Status"] == "Unavailable")
+
+    def get_stored_ids(self):
+        return sorted(presentation["Id"] for presentation in self.mediasite.presentation.get_presentation_sync().get_all())
+
+    def test_only_modified_presentations_are_fetched(self):
+        first = self.mediasite.presentation.sync_presentations()
+        self.assertTrue(first["full"])
+        self.assertEqual(self.get_stored_ids(), self.get_expected_ids())
+
+        modified = self.get_expected_ids()[0]
+        self.mediasite.api_client.request("patch", "Presentations('"+modified+"')", "", {"Title":"Renamed"})
+
+        second = self.mediasite.presentation.sync_presentations()
+
+        #the presentation at the previous mark is requested again along with the modified one
+        self.assertFalse(second["full"])
+        self.assertEqual(second["fetched"], 2)
+        self.assertEqual(second["skipped"], first["total"] - 2)
+        self.assertIn("Renamed", [presentation["Title"] for presentation in self.mediasite.presentation.get_presentation_sync().get_all()])
+
+    def test_presentation_modified_during_crawl(self):
+        sync = entity_sync("Presentations", "Status eq 'Unavailable'")
+        modified = []
+
+        #a presentation already received is modified while the crawl is between pages, moving it to the end of the order
+        send = self.mediasite.api_client.transport
+        def modify_after_first_page(method, url, json=None, data=None, headers=None, stream=False):
+            rsp = send(method, url, json, data, headers, stream)
+            if not modified:
+                first = rsp.json()["value"][0]["Id"]
+                modified.append(self.mediasite.api_client.request("patch", "Presentations('"+first+"')", "", {"Title":"Modified During Crawl"}))
+            return rsp
+        self.mediasite.api_client.transport = modify_after_first_page
+
+        result = sync.sync(self.mediasite.api_client, page_size=10)
+
+        self.assertEqual(sorted(presentation["Id"] for presentation in sync.get_all()), self.get_expected_ids())
+        self.assertEqual(result["total"], len(self.get_expected_ids()))
+        self.assertIn("Modified During Crawl", [presentation["Title"] for presentation in sync.get_all()])
+
+    def test_reconcile(self):
+        self.mediasite.presentation.sync_presentations()
+        expected = self.get_expected_ids()
+
+        #a deleted presentation, and one which came to match the conditions without its modified time changing
+        with self.data.lock:
+            del self.data.collections["Presentations"][expected[0]]
+            unmodified = next(presentation for presentation in self.data.query("Presentations") if presentation["Status"] != "Unavailable")
+            unmodified["Status"] = "Unavailable"
+
+        result = self.mediasite.presentation.sync_presentations(reconcile=True)
+
+        self.assertEqual(result["removed"], 1)
+        self.assertEqual(self.get_stored_ids(), self.get_expected_ids())
+        self.assertIn(unmodified["Id"], self.get_stored_ids())
+
+class restored_sync_tests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.server = standin.standin_server(**STANDIN_OPTIONS)
+        self.server.start()
+        self.config_data = self.server.get_config({"mediasite_metadata_cache":os.path.join(self.directory.name, "metadata.sqlite"),
+                                                    "mediasite_presentation_reconcile_interval":3600})
+
+    def tearDown(self):
+        self.server.stop()
+        self.directory.cleanup()
+
+    def sync_in_new_process(self, config_data):
+        mediasite = controller.controller(config_data)
+        result = mediasite.presentation.sync_presentations()
+        return result, mediasite.presentation.get_presentation_sync().get_stats()
+
+    def test_no_reconcile_before_interval(self):
+        first, stats = self.sync_in_new_process(self.config_data)
+        self.assertTrue(first["full"])
+
+        result, stats = self.sync_in_new_process(self.config_data)
+
+        self.assertFalse(result["full"])
+        self.assertEqual(stats["reconciles"], 0)
+
+    def test_reconcile_after_interval(self):
+        self.sync_in_new_process(self.config_data)
+
+        result, stats = self.sync_in_new_process(dict(self.config_data, mediasite_presentation_reconcile_interval=0))
+
+        self.assertEqual(stats["reconciles"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Tests of the in-memory folder index, run with:
+
+    python -m pytest test_folder_index.py
+
+License: MIT - see license.txt
+"""
+
+import unittest
+from assets.mediasite.folder_index import folder_index
+
+class pages(list):
+    """
+    Folders returned by a paginate or scan call, without a request error
+    """
+    error = None
+
+class fake_api_client():
+    def __init__(self, changes):
+        self.changes = changes
+
+    def paginate(self, resource, odata_attributes="", page_size=100, select=None):
+        return pages(self.changes)
+
+def get_folder(folder_id, name, parent_id, last_modified="2026-01-01T00:00:00Z"):
+    return {"Id":folder_id, "Name":name, "ParentFolderId":parent_id, "LastModified":last_modified, "Recycled":False}
+
+class folder_index_tests(unittest.TestCase):
+    def setUp(self):
+        self.index = folder_index("root")
+        self.index.restore([get_folder("a", "A", "root"), get_folder("c", "C", "a")], 0)
+
+    def test_add_then_find_by_path(self):
+        self.assertEqual(self.index.get_id_by_path("/A"), "a")
+
+        self.index.add(get_folder("b", "B", "a"))
+
+        self.assertEqual(self.index.get_id_by_path("/A/B"), "b")
+        self.assertEqual(self.index.get_id_by_path("/a/b/"), "b")
+        self.assertEqual(self.index.get_id_by_path("/A/C"), "c")
+
+    def test_rename_moves_subtree(self):
+        self.assertEqual(self.index.get_id_by_path("/A/C"), "c")
+
+        self.index.add(get_folder("a", "Renamed", "root"))
+
+        self.assertIsNone(self.index.get_id_by_path("/A/C"))
+        self.assertEqual(self.index.get_id_by_path("/Renamed/C"), "c")
+
+    def test_refresh_adds_child_before_parent(self):
+        self.assertEqual(self.index.get_id_by_path("/A"), "a")
+
+        changes = [get_folder("e", "E", "d", "2026-02-01T00:00:00Z"), get_folder("d", "D", "a", "2026-02-01T00:00:00Z")]
+        self.assertEqual(self.index.refresh(fake_api_client(changes)), 2)
+
+        self.assertEqual(self.index.get_id_by_path("/A/D"), "d")
+        self.assertEqual(self.index.get_id_by_path("/A/D/E"), "e")
+        self.assertEqual(self.index.high_water_mark, "2026-02-01T00:00:00Z")
+
+    def test_remove_drops_subtree(self):
+        self.index.add(get_folder("b", "B", "a"))
+        self.index.remove("a")
+
+        self.assertIsNone(self.index.get_id_by_path("/A/B"))
+        self.assertIsNone(self.index.get_folder("c"))
+        self.assertEqual(self.index.get_children("root"), [])
+
+if __name__ == "__main__":
+    unittest.main()
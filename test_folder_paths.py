@@ -0,0 +1,117 @@
+"""
+Tests of the folder path cache, run with:
+
+    python -m pytest test_folder_paths.py
+
+License: MIT - see license.txt
+"""
+
+import unittest
+import assets.mediasite.controller as controller
+import assets.mediasite.standin as standin
+import assets.mediasite.folder_paths as folder_paths
+from call_budgets import STANDIN_OPTIONS
+
+class folder_tree():
+    def __init__(self):
+        """
+        Folders by (parent id, lowercase name), counting the lookups and creations made through find and create
+        """
+        self.folders = {}
+        self.finds = []
+        self.creates = []
+
+    def find(self, name, parent_id):
+        self.finds.append(name)
+        return self.folders.get((parent_id, name.lower()), "")
+
+    def create(self, name, parent_id):
+        self.creates.append(name)
+        folder_id = "f" + str(len(self.creates))
+        self.folders[(parent_id, name.lower())] = folder_id
+        return folder_id
+
+    def delete(self, folder_id):
+        self.folders = {key:value for key, value in self.folders.items() if value != folder_id and key[0] != folder_id}
+
+class path_cache_tests(unittest.TestCase):
+    def setUp(self):
+        self.tree = folder_tree()
+        self.cache = folder_paths.path_cache()
+
+    def resolve(self, folder_path):
+        return self.cache.resolve("root", folder_path, self.tree.find, self.tree.create)
+
+    def test_shared_prefix_resolved_once(self):
+        course = self.resolve("Fall/CHEM/1113")
+        other = self.resolve("fall/chem/2213")
+
+        self.assertNotEqual(course, other)
+        self.assertEqual(self.tree.finds, ["Fall"])
+        self.assertEqual(self.tree.creates, ["Fall", "CHEM", "1113", "2213"])
+
+    def test_deleted_folder_is_invalidated(self):
+        self.resolve("Fall/CHEM/1113")
+        chem = self.tree.folders[(self.tree.folders[("root", "fall")], "chem")]
+
+        self.tree.delete(chem)
+        self.cache.invalidate(chem)
+        course = self.resolve("Fall/CHEM/1113")
+
+        #the path below the deleted folder is created again rather than resolved to the deleted ids
+        self.assertEqual(self.tree.creates, ["Fall", "CHEM", "1113", "CHEM", "1113"])
+        self.assertNotIn(chem, self.cache.nodes)
+        self.assertEqual(course, self.tree.folders[(self.tree.folders[(self.tree.folders[("root", "fall")], "chem")], "1113")])
+        self.assertEqual(self.cache.get_stats()["invalidations"], 1)
+
+    def test_created_folder_replaces_negative_entry(self):
+        fall = self.tree.create("Fall", "root")
+        self.resolve("Fall")
+        self.assertEqual(self.tree.find("Spring", "root"), "")
+
+        #a lookup which found nothing leaves a negative entry, which a folder created elsewhere replaces
+        self.cache.get_node("root").children["spring"] = folder_paths.path_node(None, "root", "spring")
+        spring = self.tree.create("Spring", "root")
+        self.cache.add("root", "Spring", spring, created=True)
+
+        self.assertEqual(self.resolve("Spring"), spring)
+        self.assertEqual(self.resolve("Fall"), fall)
+        self.assertEqual(self.tree.creates, ["Fall", "Spring"])
+
+class folder_module_cache_tests(unittest.TestCase):
+    def setUp(self):
+        self.server = standin.standin_server(**STANDIN_OPTIONS)
+        self.server.start()
+        self.mediasite = controller.controller(self.server.get_config())
+        self.root_id = self.mediasite.model.get_root_parent_folder_id()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_delete_invalidates_path_cache(self):
+        cache = self.mediasite.folder.create_path_cache()
+        course = self.mediasite.folder.parse_and_create_folders("Path Cache/CHEM/1113", self.root_id, cache)
+        chem = self.mediasite.folder.find_folder_id("CHEM", self.mediasite.folder.find_folder_id("Path Cache", self.root_id))
+
+        self.assertTrue(self.mediasite.folder.delete_folder(chem).ok)
+        self.assertNotIn(chem, cache.nodes)
+        self.assertNotIn(course, cache.nodes)
+
+        recreated = self.mediasite.folder.parse_and_create_folders("Path Cache/CHEM/1113", self.root_id, cache)
+
+        self.assertNotEqual(recreated, course)
+        self.assertEqual(cache.get_stats()["created"], 5)
+
+    def test_create_updates_path_cache(self):
+        cache = self.mediasite.folder.create_path_cache()
+        parent = self.mediasite.folder.parse_and_create_folders("Path Cache", self.root_id, cache)
+
+        #a folder created outside of the cache's resolutions is still found through it
+        created = self.mediasite.folder.create_new_folder("Created Elsewhere", parent)
+        lookups = cache.get_stats()["lookups"]
+
+        self.assertEqual(self.mediasite.folder.parse_and_create_folders("Path Cache/Created Elsewhere", self.root_id, cache), created["Id"])
+        self.assertEqual(cache.get_stats()["lookups"], lookups)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Tests of incremental decoding of collection pages, run with:
+
+    python -m pytest test_json_stream.py
+
+License: MIT - see license.txt
+"""
+
+import json
+import unittest
+import requests
+import assets.mediasite.json_stream as json_stream
+from assets.mediasite.pagination import pager
+
+PAGE = ('{"odata.metadata":"http://localhost/$metadata#Presentations","odata.count":1234567,"value":['
+        '{"Id":"a","Title":"Say \\"hello\\"","Duration":36000012,"Ratio":1.25e-3,"Live":false},'
+        '{"Id":"b","Title":"Caf\\u00e9 \\ud83c\\udfa5 caf\u00e9","Tags":["x","},{"],"Owner":null},'
+        '{"Id":"c","Nested":{"Inner":{"Deep":[1,{"e":"}, "}],"Other":{}},"After":[]},"Count":-7},'
+        '{"Id":"d","Path":"C:\\\\Media\\\\","Count":0}'
+        '],"odata.nextLink":"Presentations?$skip=4"}').encode("utf-8")
+
+def split(content, size):
+    return [content[i:i+size] for i in range(0, len(content), size)]
+
+class value_decoder_tests(unittest.TestCase):
+    def decode(self, chunks):
+        decoder = json_stream.value_decoder(chunks)
+        return list(decoder), decoder.metadata
+
+    def assert_decodes(self, chunks):
+        expected = json.loads(PAGE)
+        values, metadata = self.decode(chunks)
+
+        self.assertEqual(values, expected.pop("value"))
+        self.assertEqual(metadata, expected)
+
+    def test_whole_body(self):
+        self.assert_decodes([PAGE])
+
+    def test_every_split_point(self):
+        #covers numbers ending a chunk, \\" and \\u escapes split in two, multibyte characters and nested objects
+        for i in range(1, len(PAGE)):
+            with self.subTest(split=i):
+                self.assert_decodes([PAGE[:i], PAGE[i:]])
+
+    def test_small_chunks(self):
+        for size in (1, 2, 3, 7, 64):
+            with self.subTest(size=size):
+                self.assert_decodes(split(PAGE, size))
+
+    def test_number_at_end_of_chunk(self):
+        values, metadata = self.decode([b'{"value":[],"odata.count":12', b'34}'])
+
+        self.assertEqual(metadata["odata.count"], 1234)
+
+    def test_empty_value(self):
+        self.assertEqual(self.decode([b'{"value":[ ] }']), ([], {}))
+        self.assertEqual(self.decode([b'{}']), ([], {}))
+
+    def test_truncated_input(self):
+        for i in range(1, len(PAGE)):
+            with self.subTest(length=i):
+                with self.assertRaises(ValueError):
+                    self.decode(split(PAGE[:i], 16))
+
+class streamed_response():
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+        self.closed = False
+
+    def iter_content(self, chunk_size=1):
+        yield from self.chunks
+        if self.error:
+            raise self.error
+
+    def close(self):
+        self.closed = True
+
+class streaming_api_client():
+    def __init__(self, response):
+        self.response = response
+
+    def request(self, request_type, resource, odata_attributes, post_vars, stream=False):
+        return self.response
+
+class streamed_pager_tests(unittest.TestCase):
+    def iterate(self, response):
+        pages = pager(streaming_api_client(response), "Presentations", page_size=4, stream=True)
+
+        with self.assertLogs(level="ERROR"):
+            ids = [presentation["Id"] for presentation in pages]
+
+        return ids, pages.error
+
+    def test_connection_lost_mid_body(self):
+        response = streamed_response(split(PAGE[:200], 50), requests.exceptions.ChunkedEncodingError("Connection broken"))
+        ids, error = self.iterate(response)
+
+        self.assertEqual(ids, ["a"])
+        self.assertEqual(error, "Error: connection lost while reading Presentations page: Connection broken")
+        self.assertTrue(response.closed)
+
+    def test_truncated_body(self):
+        ids, error = self.iterate(streamed_response([PAGE[:200]]))
+
+        self.assertTrue(error.startswith("Error: unable to decode Presentations page: "))
+
+    def test_odata_error(self):
+        ids, error = self.iterate(streamed_response([b'{"odata.error":{"code":"Forbidden","message":{"lang":"en-US","value":"Denied"}}}']))
+
+        self.assertEqual((ids, error), ([], "Error: Forbidden: Denied"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Tests of the SQLite metadata cache and warm start, run with:
+
+    python -m pytest test_metadata_cache.py
+
+License: MIT - see license.txt
+"""
+
+import os
+import time
+import tempfile
+import unittest
+import assets.mediasite.controller as controller
+import assets.mediasite.standin as standin
+import assets.mediasite.metadata_cache as metadata_cache
+from call_budgets import STANDIN_OPTIONS
+
+class metadata_cache_tests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "metadata.sqlite")
+        self.cache = metadata_cache.metadata_cache(self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def get_saved_times(self):
+        with self.cache.transaction() as connection:
+            return dict(connection.execute("SELECT position, saved FROM entities WHERE collection = 'Templates'").fetchall())
+
+    def test_round_trip(self):
+        templates = [{"Id":"2", "Name":"Lecture"}, {"Id":"1", "Name":"Seminar"}]
+        self.cache.save("Templates", templates)
+
+        entities, saved = self.cache.load("Templates")
+
+        self.assertEqual(entities, templates)
+        self.assertAlmostEqual(saved, time.time(), delta=60)
+        self.assertEqual(self.cache.load("Recorders"), (None, None))
+
+    def test_unchanged_entities_keep_saved_time(self):
+        self.cache.save("Templates", [{"Id":"1", "Name":"Seminar"}, {"Id":"2", "Name":"Lecture"}])
+        first = self.get_saved_times()
+        time.sleep(0.01)
+
+        self.cache.save("Templates", [{"Id":"1", "Name":"Seminar"}, {"Id":"2", "Name":"Renamed"}])
+        second = self.get_saved_times()
+
+        self.assertEqual(second[0], first[0])
+        self.assertGreater(second[1], first[1])
+
+    def test_max_age(self):
+        self.cache.save("Templates", [])
+
+        self.assertEqual(self.cache.load("Templates", max_age=3600)[0], [])
+        self.assertEqual(self.cache.load("Templates", max_age=-1), (None, None))
+
+    def test_other_schema_version_is_discarded(self):
+        self.cache.save("Templates", [{"Id":"1"}])
+        with self.cache.transaction() as connection:
+            connection.execute("UPDATE meta SET value = '0' WHERE key = 'schema_version'")
+
+        cache = metadata_cache.metadata_cache(self.path)
+
+        self.assertEqual(cache.load("Templates"), (None, None))
+        self.assertEqual(cache.get_stats()["discarded"], 1)
+
+class warm_start_tests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.server = standin.standin_server(**STANDIN_OPTIONS)
+        self.server.start()
+        self.config_data = self.server.get_config({"mediasite_metadata_cache":os.path.join(self.directory.name, "metadata.sqlite")})
+
+    def tearDown(self):
+        self.server.stop()
+        self.directory.cleanup()
+
+    def test_warm_start_restores_without_requests(self):
+        cold = controller.controller(self.config_data)
+        self.assertIsNone(cold.warm_start())
+
+        requests = len(self.server.standin.request_log)
+        warm = controller.controller(self.config_data)
+        revalidation = warm.warm_start(revalidate=False)
+
+        self.assertIsNone(revalidation)
+        self.assertEqual(len(self.server.standin.request_log), requests)
+        self.assertEqual(warm.model.get_root_parent_folder_id(), cold.model.get_root_parent_folder_id())
+        self.assertEqual(warm.model.get_templates(), cold.model.get_templates())
+        self.assertEqual(sorted(catalog["Id"] for catalog in warm.model.get_catalogs()), sorted(catalog["Id"] for catalog in cold.model.get_catalogs()))
+
+    def test_revalidation_saves_changes(self):
+        controller.controller(self.config_data).warm_start()
+        created = self.server.standin.data.add("Catalogs", {"Name":"Created Since Snapshot", "LinkedFolderId":""})
+
+        warm = controller.controller(self.config_data)
+        warm.warm_start().join()
+
+        self.assertIn(created["Id"], [catalog["Id"] for catalog in warm.model.get_catalogs()])
+        self.assertIn(created["Id"], [catalog["Id"] for catalog in warm.metadata_cache.load("Catalogs")[0]])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Tests of keyset paging, run with:
+
+    python -m pytest test_pagination.py
+
+License: MIT - see license.txt
+"""
+
+import json
+import time
+import unittest
+from urllib.parse import parse_qsl
+import assets.mediasite.controller as controller
+import assets.mediasite.standin as standin
+from assets.mediasite.pagination import keyset_pager, parallel_pager
+
+class page_response():
+    def __init__(self, page):
+        self.content = json.dumps(page).encode("utf-8")
+
+class paged_api_client():
+    def __init__(self, size, count=True, failures=None, delays=None):
+        """
+        Serves $skip pages of a collection of size entities, failing or delaying the pages at given offsets
+        """
+        self.size = size
+        self.count = count
+        self.failures = failures or {}
+        self.delays = delays or {}
+        self.requests = []
+
+    def request(self, request_type, resource, odata_attributes, post_vars, stream=False):
+        attributes = dict(parse_qsl(odata_attributes))
+        skip, top = int(attributes["$skip"]), int(attributes["$top"])
+        self.requests.append(skip)
+
+        time.sleep(self.delays.get(skip, 0))
+        if skip in self.failures:
+            return self.failures[skip]
+
+        page = {"value":[{"Id":i} for i in range(skip, min(skip + top, self.size))]}
+        if self.count:
+            page["odata.count"] = self.size
+
+        return page_response(page)
+
+class keyset_attributes_tests(unittest.TestCase):
+    def test_first_page(self):
+        pages = keyset_pager(None, "Presentations", "Status eq 'Unavailable'", "$select=Id,Title", 50)
+
+        self.assertEqual(pages.get_keyset_attributes(), "$select=Id,Title&$filter=(Status eq 'Unavailable')&$orderby=Id&$top=50")
+
+    def test_conditions_containing_ampersand(self):
+        pages = keyset_pager(None, "Presentations", "Title eq 'R&D' or Title eq 'Q&A'", "", 50)
+
+        self.assertEqual(pages.get_keyset_attributes("ab'c"),
+                        "$filter=(Title eq 'R&D' or Title eq 'Q&A') and Id gt 'ab''c'&$orderby=Id&$top=50")
+
+    def test_composite_key(self):
+        pages = keyset_pager(None, "Presentations", "Status eq 'Unavailable'", "", 10, ("LastModified", "Id"), key_types={"LastModified":"datetime"})
+
+        self.assertEqual(pages.get_keyset_attributes(("2020-01-02T03:04:05Z", "a'b")),
+                        "$filter=(Status eq 'Unavailable') and (LastModified gt datetime'2020-01-02T03:04:05' or "
+                        "(LastModified eq datetime'2020-01-02T03:04:05' and Id gt 'a''b'))&$orderby=LastModified,Id&$top=10")
+
+    def test_no_conditions(self):
+        self.assertEqual(keyset_pager(None, "Catalogs", page_size=10).get_keyset_attributes("a"), "$filter=Id gt 'a'&$orderby=Id&$top=10")
+
+class parallel_pager_tests(unittest.TestCase):
+    def test_without_count_first_page_is_not_requested_again(self):
+        api_client = paged_api_client(25, count=False)
+
+        ids = [entity["Id"] for entity in parallel_pager(api_client, "Presentations", page_size=10)]
+
+        self.assertEqual(ids, list(range(25)))
+        self.assertEqual(api_client.requests, [0, 10, 20])
+
+    def test_window_error_belongs_to_its_window(self):
+        #the window at 40 fails at once while the earlier windows are still in flight
+        api_client = paged_api_client(100, failures={40:"Error: window 40", 60:"Error: window 60"}, delays={10:0.1, 20:0.1, 60:0.2})
+        pages = parallel_pager(api_client, "Presentations", page_size=10, workers=4)
+
+        with self.assertLogs(level="ERROR"):
+            ids = [entity["Id"] for entity in pages]
+
+        self.assertEqual(ids, list(range(40)))
+        self.assertEqual(pages.error, "Error: window 40")
+
+class keyset_paging_tests(unittest.TestCase):
+    def setUp(self):
+        self.server = standin.standin_server(seed=1, max_page_size=40, sizes={"Presentations":230})
+        self.server.start()
+        self.mediasite = controller.controller(self.server.get_config())
+        self.presentations = self.server.standin.data.query("Presentations")
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_matches_skip_paging(self):
+        expected = sorted(presentation["Id"] for presentation in self.presentations if presentation["Status"] == "Unavailable")
+
+        pages = self.mediasite.api_client.seek("Presentations", "Status eq 'Unavailable'", 25, select=("Title",))
+        ids = [presentation["Id"] for presentation in pages]
+
+        self.assertIsNone(pages.error)
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages.pages, len(expected) // 25 + 1)
+
+    def test_capped_pages(self):
+        pages = self.mediasite.api_client.seek("Presentations", "", 100)
+
+        self.assertEqual([presentation["Id"] for presentation in pages], sorted(presentation["Id"] for presentation in self.presentations))
+
+    def test_literal_ampersand(self):
+        self.server.standin.data.add("Presentations", {"Title":"R&D Seminar", "Status":"Viewable"})
+
+        #a literal "&" within the url is percent-encoded, as with every other listing
+        titles = [presentation["Title"] for presentation in self.mediasite.api_client.seek("Presentations", "Title eq 'R%26D Seminar'", 25)]
+
+        self.assertEqual(titles, ["R&D Seminar"])
+
+    def test_request_error(self):
+        pages = self.mediasite.api_client.seek("Presentations", "Title eq", 25)
+
+        self.assertEqual(list(pages), [])
+        self.assertTrue(pages.error.startswith("Error: "))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+Tests of token bucket rate limiting, run with:
+
+    python -m pytest test_rate_limit.py
+
+License: MIT - see license.txt
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import assets.mediasite.rate_limit as rate_limit
+
+class token_bucket_tests(unittest.TestCase):
+    def test_burst_then_wait(self):
+        bucket = rate_limit.token_bucket(rate=10, capacity=2)
+
+        self.assertEqual([bucket.take(), bucket.take()], [0, 0])
+        self.assertAlmostEqual(bucket.take(), 0.1, delta=0.01)
+
+class shared_token_bucket_tests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.directory.name, "mediasite.read")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_buckets_share_one_budget(self):
+        first = rate_limit.shared_token_bucket(rate=0.1, capacity=3, state_path=self.state_path)
+        second = rate_limit.shared_token_bucket(rate=0.1, capacity=3, state_path=self.state_path)
+
+        self.assertEqual([first.take(), first.take(), second.take()], [0, 0, 0])
+
+        #the budget is spent for both, each waiting about one token's refill time
+        self.assertGreater(second.take(), 9)
+        self.assertGreater(first.take(), 9)
+
+    def test_budget_shared_with_another_process(self):
+        bucket = rate_limit.shared_token_bucket(rate=0.1, capacity=2, state_path=self.state_path)
+        self.assertEqual(bucket.take(), 0)
+
+        script = ("import sys; import assets.mediasite.rate_limit as rate_limit; "
+                    "bucket = rate_limit.shared_token_bucket(rate=0.1, capacity=2, state_path=sys.argv[1]); "
+                    "print(bucket.take(), bucket.take())")
+        output = subprocess.run([sys.executable, "-c", script, self.state_path], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()
+
+        self.assertEqual(float(output[0]), 0)
+        self.assertGreater(float(output[1]), 9)
+        self.assertGreater(bucket.take(), 9)
+
+    def test_rate_limiter_buckets_per_method_class(self):
+        limiter = rate_limit.rate_limiter(read_rate=0.1, write_rate=0.1, read_burst=1, write_burst=1, state_path=self.state_path)
+        other = rate_limit.rate_limiter(read_rate=0.1, write_rate=0.1, read_burst=1, write_burst=1, state_path=self.state_path)
+
+        self.assertEqual(limiter.buckets["read"].take(), 0)
+        self.assertEqual(other.buckets["write"].take(), 0)
+        self.assertGreater(other.buckets["read"].take(), 0)
+        self.assertGreater(limiter.buckets["write"].take(), 0)
+
+if __name__ == "__main__":
+    unittest.main()
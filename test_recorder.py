@@ -0,0 +1,58 @@
+"""
+Tests of recorder listings against the local Mediasite API stand-in, run with:
+
+    python -m pytest test_recorder.py
+
+License: MIT - see license.txt
+"""
+
+import unittest
+import assets.mediasite.controller as controller
+import assets.mediasite.standin as standin
+from call_budgets import STANDIN_OPTIONS
+
+class scheduled_recordings_tests(unittest.TestCase):
+    def setUp(self):
+        self.server = standin.standin_server(**STANDIN_OPTIONS)
+        self.server.start()
+        self.mediasite = controller.controller(self.server.get_config())
+        self.data = self.server.standin.data
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_all_scheduled_recordings(self):
+        recordings = self.mediasite.recorder.get_all_scheduled_recordings()
+        expected = self.data.query("ScheduledRecordingTimes")
+
+        self.assertEqual(len(recordings), len(expected))
+        self.assertEqual(sorted(recording["title"] for recording in recordings), sorted(recording["ScheduleName"] for recording in expected))
+
+    def test_missing_schedule(self):
+        schedule_id = self.data.query("ScheduledRecordingTimes")[0]["ScheduleId"]
+        with self.data.lock:
+            del self.data.collections["Schedules"][schedule_id]
+
+        with self.assertLogs(level="ERROR"):
+            result = self.mediasite.recorder.get_all_scheduled_recordings()
+
+        self.assertIsInstance(result, str)
+        self.assertTrue(result.startswith("Error: unable to get schedule "+schedule_id+": NotFound: "))
+
+    def test_failed_recorder(self):
+        recorder_id = self.data.query("ScheduledRecordingTimes")[0]["RecorderId"]
+
+        #the scheduled recordings request of one recorder fails
+        send = self.mediasite.api_client.transport
+        def fail_recorder(method, url, json=None, data=None, headers=None, stream=False):
+            return send(method, url.replace("Recorders('"+recorder_id+"')/", "Recorders('missing')/"), json, data, headers, stream)
+        self.mediasite.api_client.transport = fail_recorder
+
+        with self.assertLogs(level="ERROR"):
+            result = self.mediasite.recorder.get_all_scheduled_recordings()
+
+        self.assertIsInstance(result, str)
+        self.assertTrue(result.startswith("Error: "))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+"""
+Tests of request retries and the circuit breaker, run with:
+
+    python -m pytest test_resilience.py
+
+License: MIT - see license.txt
+"""
+
+import time
+import unittest
+from email.utils import formatdate
+import requests
+import assets.mediasite.api_client as api_client
+import assets.mediasite.resilience as resilience
+
+def create_response(status_code, headers=None):
+    rsp = requests.Response()
+    rsp.status_code = status_code
+    rsp.headers.update(headers or {})
+    rsp._content = b"{}"
+    rsp._content_consumed = True
+    return rsp
+
+class scripted_transport():
+    def __init__(self, responses):
+        """
+        Answers each request with the next of a list of responses (or raises it if it is an exception)
+        """
+        self.responses = list(responses)
+        self.methods = []
+
+    def __call__(self, method, url, json=None, data=None, headers=None, stream=False):
+        self.methods.append(method)
+        rsp = self.responses.pop(0)
+        if isinstance(rsp, Exception):
+            raise rsp
+        return rsp
+
+def create_client(responses, retry_policy=None, circuit_breaker=None):
+    client = api_client.client("http://localhost/mediasite/api/v1/", "key", "user", "password",
+                                retry_policy=retry_policy, circuit_breaker=circuit_breaker)
+    client.transport = scripted_transport(responses)
+    return client
+
+class retry_after_tests(unittest.TestCase):
+    def test_seconds(self):
+        policy = resilience.retry_policy(max_retry_after=120)
+
+        self.assertEqual(policy.get_retry_after(create_response(503, {"Retry-After":"7"})), 7)
+        self.assertEqual(policy.get_retry_after(create_response(503, {"Retry-After":"-3"})), 0)
+        self.assertEqual(policy.get_retry_after(create_response(503, {"Retry-After":"3600"})), 120)
+
+    def test_http_date(self):
+        policy = resilience.retry_policy()
+        delay = policy.get_retry_after(create_response(429, {"Retry-After":formatdate(time.time() + 30, usegmt=True)}))
+
+        self.assertTrue(25 <= delay <= 30, delay)
+
+    def test_unusable_header(self):
+        policy = resilience.retry_policy()
+
+        self.assertIsNone(policy.get_retry_after(create_response(503, {"Retry-After":"soon"})))
+        self.assertIsNone(policy.get_retry_after(create_response(503)))
+        self.assertIsNone(resilience.retry_policy(respect_retry_after=False).get_retry_after(create_response(503, {"Retry-After":"7"})))
+
+    def test_delay_honours_retry_after(self):
+        policy = resilience.retry_policy(backoff_base=100)
+
+        self.assertEqual(policy.get_delay(0, create_response(429, {"Retry-After":"2"})), 2)
+        self.assertEqual(policy.get_stats()["retry_after_honoured"], 1)
+
+class retry_tests(unittest.TestCase):
+    def test_throttled_get_is_retried(self):
+        client = create_client([create_response(503, {"Retry-After":"0"}), create_response(429, {"Retry-After":"0"}), create_response(200)])
+
+        with self.assertLogs(level="WARNING"):
+            rsp = client.send("get", client.serviceroot + "Presentations")
+
+        self.assertEqual(rsp.status_code, 200)
+        self.assertEqual(client.transport.methods, ["get", "get", "get"])
+        self.assertEqual(client.retry_policy.get_stats()["retry_after_honoured"], 2)
+
+    def test_post_is_not_retried(self):
+        client = create_client([create_response(503, {"Retry-After":"0"}), create_response(201)])
+
+        rsp = client.send("post", client.serviceroot + "Presentations", json={"Title":"New"})
+
+        self.assertEqual(rsp.status_code, 503)
+        self.assertEqual(client.transport.methods, ["post"])
+        self.assertEqual(client.retry_policy.get_stats()["retries"], 0)
+
+    def test_post_connection_error_is_not_retried(self):
+        client = create_client([requests.exceptions.ConnectionError("reset"), create_response(201)])
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client.send("post", client.serviceroot + "Presentations", json={"Title":"New"})
+
+        self.assertEqual(client.transport.methods, ["post"])
+
+    def test_retries_exhausted(self):
+        policy = resilience.retry_policy(max_retries=2)
+        client = create_client([create_response(503, {"Retry-After":"0"})] * 3, retry_policy=policy)
+
+        with self.assertLogs(level="WARNING"):
+            rsp = client.send("get", client.serviceroot + "Presentations")
+
+        self.assertEqual(rsp.status_code, 503)
+        self.assertEqual(len(client.transport.methods), 3)
+        self.assertEqual(policy.get_stats()["retries_exhausted"], 1)
+
+class circuit_breaker_tests(unittest.TestCase):
+    def open(self, breaker):
+        with self.assertLogs(level="ERROR"):
+            for i in range(breaker.failure_threshold):
+                self.assertTrue(breaker.allow_request())
+                breaker.record_failure()
+
+        self.assertEqual(breaker.get_stats()["state"], "open")
+
+    def test_open_half_open_closed(self):
+        breaker = resilience.circuit_breaker(failure_threshold=3, recovery_timeout=0.05)
+        self.open(breaker)
+
+        self.assertFalse(breaker.allow_request())
+        time.sleep(0.06)
+
+        #one trial request is let through, others are rejected until it completes
+        self.assertTrue(breaker.allow_request())
+        self.assertEqual(breaker.get_stats()["state"], "half open")
+        self.assertFalse(breaker.allow_request())
+
+        breaker.record_success()
+        stats = breaker.get_stats()
+
+        self.assertEqual((stats["state"], stats["consecutive_failures"], stats["opened"], stats["rejected"]), ("closed", 0, 1, 2))
+        self.assertTrue(breaker.allow_request())
+
+    def test_failed_trial_reopens(self):
+        breaker = resilience.circuit_breaker(failure_threshold=3, recovery_timeout=0.05)
+        self.open(breaker)
+        time.sleep(0.06)
+
+        self.assertTrue(breaker.allow_request())
+        with self.assertLogs(level="ERROR"):
+            breaker.record_failure()
+
+        self.assertEqual(breaker.get_stats()["state"], "open")
+        self.assertEqual(breaker.get_stats()["opened"], 2)
+        self.assertFalse(breaker.allow_request())
+
+    def test_client_fails_fast_while_open(self):
+        breaker = resilience.circuit_breaker(failure_threshold=2, recovery_timeout=0.05)
+        policy = resilience.retry_policy(max_retries=0)
+        client = create_client([create_response(500), create_response(500), create_response(200)], policy, breaker)
+
+        with self.assertLogs(level="ERROR"):
+            client.send("get", client.serviceroot + "Presentations")
+            client.send("get", client.serviceroot + "Presentations")
+
+        with self.assertRaises(resilience.circuit_open_error):
+            client.send("get", client.serviceroot + "Presentations")
+        self.assertEqual(len(client.transport.methods), 2)
+
+        #after the recovery timeout the trial request succeeds and closes the breaker
+        time.sleep(0.06)
+        self.assertEqual(client.send("get", client.serviceroot + "Presentations").status_code, 200)
+        self.assertEqual(breaker.get_stats()["state"], "closed")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+Tests of batched scheduling imports against the local Mediasite API stand-in, run with:
+
+    python -m pytest test_scheduling.py
+
+License: MIT - see license.txt
+"""
+
+import unittest
+import assets.mediasite.controller as controller
+import assets.mediasite.standin as standin
+from call_budgets import STANDIN_OPTIONS, get_schedule_data, setup_reference_data
+
+class scheduling_tests(unittest.TestCase):
+    def setUp(self):
+        self.server = standin.standin_server(**STANDIN_OPTIONS)
+        self.server.start()
+        self.mediasite = controller.controller(self.server.get_config({"mediasite_batch_requests":True}))
+        setup_reference_data(self.mediasite, "scheduling")
+
+    def tearDown(self):
+        self.server.stop()
+
+    def get_row(self, course, module_id):
+        return dict(get_schedule_data(self.mediasite), mediasite_folders="Tests/Course "+course, catalog_name="Course "+course,
+                    module_name="Course "+course, module_id=module_id, schedule_name="Course "+course)
+
+    def get_modules(self, module_id):
+        return [module for module in self.server.standin.data.query("Modules") if module.get("ModuleId") == module_id]
+
+    def test_duplicate_module_ids_in_one_batch(self):
+        rows = [self.get_row("101", "DUP-101"), self.get_row("102", "DUP-101"), self.get_row("103", "dup-101")]
+
+        results = self.mediasite.process_scheduling_data_rows_batched(rows)
+
+        self.assertNotIn("error", results[0])
+        self.assertEqual(results[1]["error"], "Error: Course 102 - Submitted ModuleId already exists.")
+        self.assertEqual(results[2]["error"], "Error: Course 103 - Submitted ModuleId already exists.")
+        self.assertEqual(len(self.get_modules("DUP-101")), 1)
+        self.assertEqual(len(self.get_modules("dup-101")), 0)
+
+    def test_distinct_module_ids_in_one_batch(self):
+        results = self.mediasite.process_scheduling_data_rows_batched([self.get_row("101", "ONE-101"), self.get_row("102", "ONE-102")])
+
+        self.assertEqual([result.get("error") for result in results], [None, None])
+        self.assertEqual(len(self.get_modules("ONE-101")), 1)
+        self.assertEqual(len(self.get_modules("ONE-102")), 1)
+
+    def test_unbatched_recurrence_result(self):
+        self.mediasite.batch_requests = False
+
+        result = self.mediasite.process_scheduling_data_row(self.get_row("101", "SEQ-101"))
+
+        #a one-time recurrence reports only a failed request, as it did before $batch support
+        self.assertIsNone(result["recurrence_result"])
+        self.assertEqual(len(self.mediasite.model.recurrences), 1)
+
+if __name__ == "__main__":
+    unittest.main()
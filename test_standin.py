@@ -0,0 +1,61 @@
+"""
+Tests of the local Mediasite API stand-in, run with:
+
+    python -m pytest test_standin.py
+
+License: MIT - see license.txt
+"""
+
+import json
+import time
+import base64
+import unittest
+import assets.mediasite.standin as standin
+
+BASIC_HEADERS = {"authorization":"Basic " + base64.b64encode(b"standin:standin").decode("utf-8")}
+
+BATCH_BODY = (b"--batch_1\r\n"
+            b"Content-Type: application/http\r\n"
+            b"Content-Transfer-Encoding: binary\r\n\r\n"
+            b"GET http://localhost/mediasite/api/v1/Templates HTTP/1.1\r\n"
+            b"Accept: application/json\r\n\r\n"
+            b"--batch_1--\r\n")
+
+class standin_tests(unittest.TestCase):
+    def setUp(self):
+        self.standin = standin.standin(seed=1, sizes={"Presentations":300}, skip_cost=1.0)
+
+    def batch(self, headers):
+        return self.standin.handle("POST", "$batch", "", dict(headers, **{"content-type":"multipart/mixed; boundary=batch_1"}), BATCH_BODY)
+
+    def test_batch_requires_authentication(self):
+        status, headers, content = self.batch({})
+
+        self.assertEqual(status, 401)
+        self.assertEqual(json.loads(content)["odata.error"]["code"], "Unauthorized")
+        self.assertEqual(self.batch(BASIC_HEADERS)[0], 202)
+
+    def test_requests_require_authentication(self):
+        self.assertEqual(self.standin.handle("GET", "Templates", "", {}, b"")[0], 401)
+        self.assertEqual(self.standin.handle("GET", "Templates", "", BASIC_HEADERS, b"")[0], 200)
+
+    def test_skip_cost_is_reported_not_slept(self):
+        started = time.perf_counter()
+        status, headers, content = self.standin.handle("GET", "Presentations", "$top=100&$skip=200", BASIC_HEADERS, b"")
+
+        self.assertEqual(len(json.loads(content)["value"]), 100)
+        self.assertLess(time.perf_counter() - started, 0.1)
+        self.assertEqual(self.standin.get_skip_stats(), {"entities_skipped":200, "skip_cost":1.0, "modelled_seconds":0.2})
+
+    def test_keyset_and_skip_pages_match(self):
+        query = "$filter=Status eq 'Unavailable'&$orderby=Id&$top=1000"
+        expected = json.loads(self.standin.handle("GET", "Presentations", query, BASIC_HEADERS, b"")[2])["value"]
+
+        after = expected[9]["Id"]
+        status, headers, content = self.standin.handle("GET", "Presentations", "$filter=(Status eq 'Unavailable') and Id gt '"+after+"'&$orderby=Id&$top=5",
+                                                    BASIC_HEADERS, b"")
+
+        self.assertEqual(json.loads(content)["value"], expected[10:15])
+
+if __name__ == "__main__":
+    unittest.main()